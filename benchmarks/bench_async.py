@@ -0,0 +1,139 @@
+# Benchmark: consultas independientes en secuencia (pymongo) vs. en paralelo (async_db)
+# Cada escenario ejecuta las mismas consultas de dos formas por iteración:
+#   secuencial -> una tras otra con el cliente de pymongo de utils.py (como los handlers)
+#   gather     -> async_db.gather con AsyncMongoClient, a lo sumo --concurrency simultáneas
+# Escenarios:
+#   page_total      -> página de 20 plantillas activas de un tipo y su total (count=true)
+#   plantilla_tipo  -> una plantilla y su tipo_plantilla, con ambos _id conocidos
+#   groups          -> última versión activa de --groups grupos (versioning.sync_groups)
+# La ganancia depende de la latencia de red hasta Mongo: contra un mongod local es menor
+# que contra un clúster remoto; para comparar corridas use el mismo servidor.
+#
+# Uso (requiere mongod con el conjunto de load_test.py; por defecto localhost:27017,
+# base de datos plantillas_loadtest):
+#   python benchmarks/load_test.py seed --plantillas 100000 --drop
+#   python benchmarks/bench_async.py [--iterations 200] [--groups 10] [--concurrency 8]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers"))
+
+for _name, _value in {"PLANTILLAS_CRUD_HOST": "localhost", "PLANTILLAS_CRUD_PORT": "27017",
+                      "PLANTILLAS_CRUD_DB": "plantillas_loadtest", "TIMEZONE": "America/Bogota"}.items():
+    os.environ.setdefault(_name, _value)
+
+from bson import ObjectId  # noqa: E402
+from pymongo import DESCENDING  # noqa: E402
+
+import async_db  # noqa: E402
+from utils import get_collection  # noqa: E402
+
+LATEST_SORT = [("version", DESCENDING)]
+
+
+def load_sample(size: int) -> list:
+    plantillas = get_collection("plantilla")
+    if plantillas is None:
+        raise SystemExit("Error connecting to the database")
+    sample = list(plantillas.aggregate([
+        {"$match": {"activo": True}},
+        {"$sample": {"size": size}},
+        {"$project": {"_id": 1, "grupo_id": 1, "tipo_plantilla_id": 1}},
+    ]))
+    if not sample:
+        raise SystemExit("La base de datos no tiene plantillas activas; ejecute primero: load_test.py seed")
+    return sample
+
+
+def scenarios(args) -> dict:
+    """nombre -> función(i) que retorna [(colección, método, argumentos, kwargs)] de la iteración i"""
+    sample = load_sample(max(args.iterations, args.groups) + args.groups)
+
+    def page_total(i):
+        filter_ = {"tipo_plantilla_id": sample[i % len(sample)]["tipo_plantilla_id"], "activo": True}
+        return [("plantilla", "find", (), {"filter": filter_, "projection": {"contenido": 0, "metadatos": 0},
+                                           "sort": [("fecha_creacion", DESCENDING)], "limit": 20}),
+                ("plantilla", "count", (filter_,), {})]
+
+    def plantilla_tipo(i):
+        document = sample[i % len(sample)]
+        return [("plantilla", "find_one", ({"_id": document["_id"]},), {}),
+                ("tipo_plantilla", "find_one", ({"_id": ObjectId(document["tipo_plantilla_id"])},), {})]
+
+    def groups(i):
+        return [("plantilla", "find_one", ({"grupo_id": document["grupo_id"], "activo": True},),
+                 {"projection": {"version": 1}, "sort": LATEST_SORT})
+                for document in (sample[(i + k) % len(sample)] for k in range(args.groups))]
+
+    return {"page_total": page_total, "plantilla_tipo": plantilla_tipo, f"groups_{args.groups}": groups}
+
+
+def sequential(queries: list) -> list:
+    results = []
+    for name, method, arguments, kwargs in queries:
+        collection = get_collection(name)
+        if method == "find":
+            results.append(list(collection.find(**kwargs)))
+        elif method == "count":
+            results.append(collection.count_documents(*arguments))
+        else:
+            results.append(collection.find_one(*arguments, **kwargs))
+    return results
+
+
+def concurrent(queries: list, limit: int) -> list:
+    coroutines = []
+    for name, method, arguments, kwargs in queries:
+        if method == "find":
+            coroutines.append(async_db.find(name, kwargs))
+        elif method == "count":
+            coroutines.append(async_db.count(name, *arguments))
+        else:
+            coroutines.append(async_db.find_one(name, *arguments, **kwargs))
+    results = async_db.run(async_db.gather(*coroutines, limit=limit))
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+    return results
+
+
+def measure(build, execute, iterations: int, warmup: int) -> list:
+    for i in range(warmup):
+        execute(build(i))
+    latencies = []
+    for i in range(iterations):
+        queries = build(i)
+        start = time.perf_counter()
+        execute(queries)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def percentile(ordered: list, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas independientes: secuencial vs. async_db.gather")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--groups", type=int, default=10, help="grupos por iteración del escenario groups")
+    parser.add_argument("--concurrency", type=int, default=async_db.ASYNC_MAX_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    print(f"{'escenario':<16} {'consultas':>9}   {'secuencial p50':>14} {'p95':>8}   {'gather p50':>10} {'p95':>8}"
+          f"   {'aceleración p50':>15}")
+    for name, build in scenarios(args).items():
+        seq = measure(build, sequential, args.iterations, args.warmup)
+        par = measure(build, lambda queries: concurrent(queries, args.concurrency), args.iterations, args.warmup)
+        print(f"{name:<16} {len(build(0)):9d}   {statistics.median(seq):14.2f} {percentile(seq, 95):8.2f}"
+              f"   {statistics.median(par):10.2f} {percentile(par, 95):8.2f}"
+              f"   {statistics.median(seq) / statistics.median(par):14.2f}x")
+
+
+if __name__ == "__main__":
+    main()
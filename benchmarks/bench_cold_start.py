@@ -0,0 +1,176 @@
+# Benchmark: arranques en frío con una función por handler (Deployment=per-route) vs.
+# una sola función con router.py (Deployment=router)
+# Simula la llegada de peticiones (Poisson, --rates peticiones por minuto) con una mezcla
+# de rutas y el ciclo de vida de los contenedores de Lambda: cada petición usa el
+# contenedor libre de su función usado más recientemente, si lleva menos de
+# --idle-minutes sin uso; si no hay uno, la función crea otro (arranque en frío).
+# En per-route cada módulo de router.ROUTES es una función; en router todas las rutas
+# comparten una. Ambos despliegues reciben la misma secuencia de peticiones.
+#
+# El costo de inicialización es el tiempo de importación medido en procesos nuevos
+# (mediana de --repeat): en per-route el del módulo de la función; en router el de
+# router.py más, la primera vez que un contenedor atiende una ruta, el del módulo que la
+# atiende (router.py lo importa en ese momento). No incluye el arranque del runtime de
+# Lambda ni la conexión a Mongo, que se pagan en cada arranque en frío de ambos.
+#
+# Uso (no requiere base de datos):
+#   python benchmarks/bench_cold_start.py [--rates 0.5,2,10,60] [--hours 24] [--idle-minutes 10]
+#   python benchmarks/bench_cold_start.py --replay eventos.jsonl   # mezcla de load_test.py --record
+
+import argparse
+import collections
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+
+HANDLERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers")
+sys.path.insert(0, HANDLERS)
+os.environ.setdefault("TIMEZONE", "America/Bogota")
+
+from router import ROUTES  # noqa: E402
+
+# (httpMethod, resource) -> peso: la mezcla mixed de load_test.py más los health checks
+MIX = {
+    ("GET", "/plantilla/{id}"): 25,
+    ("GET", "/plantilla"): 20,
+    ("GET", "/plantilla/search"): 8,
+    ("GET", "/plantilla/grupo/{grupo_id}/latest"): 8,
+    ("GET", "/plantilla/grupo/{grupo_id}"): 4,
+    ("POST", "/plantilla/{id}/render"): 8,
+    ("POST", "/plantilla/{id}/render/bulk"): 1,
+    ("POST", "/plantilla"): 6,
+    ("PUT", "/plantilla/{id}"): 4,
+    ("GET", "/tipo_plantilla/{id}"): 4,
+    ("GET", "/tipo_plantilla"): 4,
+    ("GET", "/health"): 8,
+}
+IMPORT_SCRIPT = (
+    "import json, sys, time\n"
+    "ms = []\n"
+    "for name in sys.argv[1:]:\n"
+    "    start = time.perf_counter()\n"
+    "    __import__(name)\n"
+    "    ms.append((time.perf_counter() - start) * 1000)\n"
+    "print(json.dumps(ms))\n"
+)
+
+
+def import_ms(modules: list, repeat: int) -> list:
+    """Mediana de los ms de importación de cada módulo, en orden, en un proceso nuevo"""
+    env = dict(os.environ, PYTHONPATH=HANDLERS, PYTHONDONTWRITEBYTECODE="1")
+    runs = [json.loads(subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, *modules], env=env,
+                                      capture_output=True, text=True, check=True).stdout)
+            for _ in range(repeat)]
+    return [statistics.median(run[i] for run in runs) for i in range(len(modules))]
+
+
+def init_costs(repeat: int) -> dict:
+    """{"per-route": {módulo: ms}, "router": ms, "router_modules": {módulo: ms adicionales}}"""
+    modules = sorted({module for module, _ in ROUTES.values()})
+    costs = {"per-route": {}, "router_modules": {}}
+    router_ms = []
+    for module in modules:
+        costs["per-route"][module] = import_ms([module], repeat)[0]
+        base, extra = import_ms(["router", module], repeat)
+        router_ms.append(base)
+        costs["router_modules"][module] = extra
+    costs["router"] = statistics.median(router_ms)
+    return costs
+
+
+def route_weights(replay: str) -> dict:
+    """Pesos por ruta a partir de los eventos de un archivo JSONL (load_test.py --record)"""
+    counts = collections.Counter()
+    with open(replay) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                event = record.get("event", record)
+                route = (event.get("httpMethod"), event.get("resource"))
+                if route in ROUTES:
+                    counts[route] += 1
+    if not counts:
+        raise SystemExit(f"{replay} no tiene eventos de rutas declaradas en router.ROUTES")
+    return dict(counts)
+
+
+def arrivals(rng: random.Random, weights: dict, per_minute: float, hours: float) -> list:
+    """[(segundo, ruta)] de un proceso de Poisson con la mezcla dada"""
+    routes, values = list(weights), list(weights.values())
+    result = []
+    t = rng.expovariate(per_minute / 60)
+    while t < hours * 3600:
+        result.append(t)
+        t += rng.expovariate(per_minute / 60)
+    return list(zip(result, rng.choices(routes, values, k=len(result))))
+
+
+def simulate(requests: list, deployment: str, costs: dict, idle_s: float, duration_s: float) -> dict:
+    """Arranques en frío, ms de inicialización y contenedores simultáneos del despliegue"""
+    # función -> [[libre desde (s), módulos importados]]
+    containers = collections.defaultdict(list)
+    cold = init_ms = peak = 0
+    for t, route in requests:
+        module = ROUTES[route][0]
+        function = module if deployment == "per-route" else "router"
+        pool = containers[function] = [c for c in containers[function] if t - c[0] <= idle_s]
+        free = [c for c in pool if c[0] <= t]
+        spent = 0.0
+        if free:
+            container = max(free, key=lambda c: c[0])
+        else:
+            cold += 1
+            if deployment == "per-route":
+                container, spent = [t, {module}], costs["per-route"][module]
+            else:
+                container, spent = [t, set()], costs["router"]
+            pool.append(container)
+        if module not in container[1]:
+            container[1].add(module)
+            spent += costs["router_modules"][module]
+        init_ms += spent
+        container[0] = t + duration_s + spent / 1000
+        peak = max(peak, sum(len(p) for p in containers.values()))
+    return {"cold": cold, "init_ms": init_ms, "peak": peak}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arranques en frío: función por handler vs. router")
+    parser.add_argument("--rates", default="0.5,2,10,60", help="peticiones por minuto, separadas por coma")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--idle-minutes", type=float, default=10,
+                        help="minutos sin uso tras los que Lambda retira un contenedor")
+    parser.add_argument("--duration-ms", type=float, default=50, help="duración de una petición caliente")
+    parser.add_argument("--replay", help="archivo JSONL de eventos (load_test.py --record) para la mezcla")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    weights = route_weights(args.replay) if args.replay else MIX
+    costs = init_costs(args.repeat)
+    print(f"{'importación ms':<26} {'per-route':>10} {'router':>10}")
+    print(f"{'router':<26} {'-':>10} {costs['router']:10.1f}")
+    for module, ms in costs["per-route"].items():
+        print(f"{module:<26} {ms:10.1f} {costs['router_modules'][module]:10.1f}")
+    print()
+
+    print(f"{'req/min':>8} {'peticiones':>10}   {'frío per-route':>14} {'frío router':>12}"
+          f"   {'init ms/pet per-route':>21} {'router':>7}   {'máx contenedores per-route':>26} {'router':>7}")
+    rng = random.Random(args.seed)
+    for rate in (float(value) for value in args.rates.split(",")):
+        requests = arrivals(rng, weights, rate, args.hours)
+        if not requests:
+            continue
+        per_route, router = (simulate(requests, deployment, costs, args.idle_minutes * 60, args.duration_ms / 1000)
+                             for deployment in ("per-route", "router"))
+        n = len(requests)
+        print(f"{rate:8g} {n:10d}   {per_route['cold'] / n:14.2%} {router['cold'] / n:12.2%}"
+              f"   {per_route['init_ms'] / n:21.2f} {router['init_ms'] / n:7.2f}"
+              f"   {per_route['peak']:26d} {router['peak']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# Benchmark: camino común de cada petición (entrada y respuesta)
+# Mide parse_body, parse_bulk_body, parse_query_params, get_query, get_sort_by, la
+# construcción de los modelos pydantic y format_response de crud_plantilla y
+# crud_tipo_plantilla, sobre entradas con distribuciones realistas: cuerpos pequeños y
+# con contenidos grandes, filtros largos, proyecciones anchas y respuestas de 1k y 10k
+# documentos. Compara contra benchmarks/hotpath_baseline.json y, sólo si se indica
+# --max-regression, termina con código 1 si algún caso es más lento que la línea base en
+# más de ese margen. Por defecto sólo reporta: el ruido entre ejecuciones de un mismo caso
+# supera a menudo el 25 %.
+#
+# La línea base no guarda µs sino la razón entre cada caso y un bucle de referencia
+# (reference_work) medido en el mismo proceso justo antes del caso, por lo que no depende
+# de la velocidad de la máquina ni de su carga. Se actualiza (--update) tras un cambio de
+# rendimiento intencional.
+#
+# Uso (no requiere base de datos):
+#   python benchmarks/bench_hotpath.py [--filter format_response] [--repeat 5] [--max-regression 0.5]
+#   python benchmarks/bench_hotpath.py --update
+
+import argparse
+import base64
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers"))
+os.environ.setdefault("TIMEZONE", "America/Bogota")
+
+from bson import ObjectId  # noqa: E402
+
+from core import get_sort_by  # noqa: E402
+from crud_plantilla import app as plantilla_app  # noqa: E402
+from crud_tipo_plantilla import app as tipo_plantilla_app  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hotpath_baseline.json")
+# Cada repetición ejecuta el caso durante al menos este tiempo
+MIN_REPEAT_S = 0.2
+INPUTS_PER_CASE = 200
+
+PLANTILLA_FIELDS = ("tipo_plantilla_id", "sistema_id", "nombre", "codigo_abreviacion", "contenido",
+                    "grupo_id", "version", "uid", "metadatos", "activo", "fecha_creacion")
+TIPO_FILTER = "codigo_abreviacion__in:" + "|".join(f"TP{i:03d}" for i in range(20)) + ",nombre__prefix:Tipo"
+
+
+# Entradas
+def contenido(rng: random.Random, size: int) -> str:
+    words = ("<p>Estimado(a) {{ nombre }},</p> solicitud certificado constancia matrícula estudiante "
+             "resolución pago recibo inscripción admisión grado acta notificación").split(" ")
+    text = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        text.append(word)
+        length += len(word) + 1
+    return " ".join(text)
+
+
+def plantilla_data(rng: random.Random) -> dict:
+    # Tamaños de contenido: la mayoría pocos KB, algunos cercanos al umbral de externalización
+    size = rng.choice((500, 2000, 4000, 4000, 8000, 16000, 64000))
+    return {
+        "tipo_plantilla_id": str(ObjectId()),
+        "sistema_id": rng.randint(1, 20),
+        "nombre": f"Plantilla {rng.randint(0, 10 ** 6)}",
+        "codigo_abreviacion": f"PL{rng.randint(0, 999):03d}",
+        "contenido": contenido(rng, size),
+        "metadatos": {"autor": "bench", "etiquetas": ["a", "b", "c"], "orden": rng.randint(0, 100)},
+        "activo": True,
+    }
+
+
+def tipo_plantilla_data(rng: random.Random) -> dict:
+    return {"nombre": f"Tipo {rng.randint(0, 1000)}", "descripcion": contenido(rng, 200),
+            "codigo_abreviacion": f"TP{rng.randint(0, 999):03d}"}
+
+
+def body_event(data) -> dict:
+    return {"body": json.dumps(data), "isBase64Encoded": False}
+
+
+def base64_event(data) -> dict:
+    return {"body": base64.b64encode(json.dumps(data).encode()).decode(), "isBase64Encoded": True}
+
+
+def plantilla_filter(rng: random.Random, terms: int) -> str:
+    """Filtro con terms condiciones sobre campos declarados, operadores y listas"""
+    conditions = [
+        "activo:true", f"tipo_plantilla_id:{ObjectId()}",
+        "sistema_id__in:" + "|".join(str(i) for i in range(1, 21)),
+        "version__gte:2", "nombre__prefix:Cert",
+        "codigo_abreviacion__in:" + "|".join(f"PL{i:03d}" for i in range(50)),
+        "uid__exists:true", "fecha_creacion__gte:2024-01-01T00:00:00", f"grupo_id:{uuid.uuid4()}",
+        "metadatos.autor:bench",
+    ]
+    return ",".join(rng.choice(conditions) if i >= len(conditions) else conditions[i] for i in range(terms))
+
+
+def wide_fields(count: int, exclude: bool = False) -> str:
+    """Proyección de count campos: los del modelo y rutas anidadas de metadatos"""
+    if exclude:
+        return ",".join(["-contenido"] + [f"-metadatos.campo_{i}" for i in range(count - 1)])
+    fields = [field for field in PLANTILLA_FIELDS if field != "metadatos"]
+    return ",".join(fields + [f"metadatos.campo_{i}" for i in range(count - len(fields))])
+
+
+def query_params(rng: random.Random) -> dict:
+    """Parámetros de get_all: la mayoría simples, algunos con filtros largos o proyecciones anchas"""
+    kind = rng.choices(("none", "page", "filter", "large_filter", "wide_fields", "exclude_fields"),
+                       (10, 30, 30, 10, 10, 10))[0]
+    if kind == "none":
+        return {"queryStringParameters": None}
+    params = {"limit": str(rng.choice((10, 20, 50, 100))), "offset": str(rng.randint(0, 1000))}
+    if kind in ("filter", "large_filter"):
+        params["query"] = plantilla_filter(rng, 3 if kind == "filter" else 30)
+        params["sortby"], params["order"] = "fecha_creacion,nombre", "desc,asc"
+    elif kind == "wide_fields":
+        params["fields"] = wide_fields(60)
+    elif kind == "exclude_fields":
+        params["fields"] = wide_fields(20, exclude=True)
+    return {"queryStringParameters": params}
+
+
+def tipo_query_params(rng: random.Random) -> dict:
+    kind = rng.choice(("none", "page", "filter"))
+    if kind == "none":
+        return {"queryStringParameters": None}
+    params = {"limit": "50"}
+    if kind == "filter":
+        params["query"] = TIPO_FILTER
+        params["sortby"], params["order"] = "nombre", "asc"
+    return {"queryStringParameters": params}
+
+
+def sort_params(rng: random.Random) -> dict:
+    fields = ("fecha_creacion", "nombre", "version", "sistema_id", "codigo_abreviacion")
+    fields = rng.sample(fields, rng.randint(1, len(fields)))
+    orders = rng.choice((None, "desc", ",".join(rng.choice(("asc", "desc")) for _ in fields)))
+    return {"sortby": ",".join(fields), **({"order": orders} if orders else {})}
+
+
+def documents(n: int, rng: random.Random, with_contenido: bool = False) -> list:
+    """Documentos como los entrega pymongo (ObjectId, UUID, datetime)"""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [{
+        "_id": ObjectId(),
+        "tipo_plantilla_id": str(ObjectId()),
+        "sistema_id": i % 20,
+        "nombre": f"Plantilla {i}",
+        "codigo_abreviacion": f"PL{i % 500:03d}",
+        **({"contenido": contenido(rng, 2000)} if with_contenido else {}),
+        "grupo_id": uuid.uuid4(),
+        "version": i % 7,
+        "uid": None,
+        "activo": True,
+        "fecha_creacion": now,
+    } for i in range(n)]
+
+
+def cases(rng: random.Random) -> list:
+    """[(nombre, función, entradas)]: cada repetición recorre las entradas en orden"""
+    plantillas = [plantilla_data(rng) for _ in range(INPUTS_PER_CASE)]
+    tipos = [tipo_plantilla_data(rng) for _ in range(INPUTS_PER_CASE)]
+    bulk_bodies = [{"body": "\n".join(json.dumps(plantilla_data(rng)) for _ in range(100)),
+                    "isBase64Encoded": False} for _ in range(5)]
+    plantilla_models = plantilla_app.models()
+    tipo_plantilla_models = tipo_plantilla_app.models()
+    single = documents(1, rng, with_contenido=True)[0]
+
+    result = []
+    for prefix, app, make_params, bodies in (("plantilla", plantilla_app, query_params, plantillas),
+                                             ("tipo_plantilla", tipo_plantilla_app, tipo_query_params, tipos)):
+        query_inputs = [make_params(rng) for _ in range(INPUTS_PER_CASE)]
+        result += [
+            (f"{prefix}.parse_body", app.parse_body,
+             [(body_event(data) if i % 10 else base64_event(data),) for i, data in enumerate(bodies)]),
+            (f"{prefix}.parse_query_params", app.parse_query_params, [(event,) for event in query_inputs]),
+            (f"{prefix}.format_response_one", app.format_response,
+             [(single, "Request successful", 200, True)]),
+            (f"{prefix}.format_response_1k", app.format_response,
+             [(documents(1000, rng), "Request successful", 200, True)]),
+            (f"{prefix}.format_response_10k", app.format_response,
+             [(documents(10000, rng), "Request successful", 200, True)]),
+        ]
+    result += [
+        ("core.get_sort_by", get_sort_by, [(sort_params(rng),) for _ in range(INPUTS_PER_CASE)]),
+        ("plantilla.parse_bulk_body_100", plantilla_app.parse_bulk_body, [(event,) for event in bulk_bodies]),
+        ("plantilla.get_query_3", plantilla_app.get_query,
+         [(plantilla_filter(rng, 3),) for _ in range(INPUTS_PER_CASE)]),
+        ("plantilla.get_query_30", plantilla_app.get_query,
+         [(plantilla_filter(rng, 30),) for _ in range(INPUTS_PER_CASE)]),
+        ("tipo_plantilla.get_query", tipo_plantilla_app.get_query, [(TIPO_FILTER,)]),
+        ("plantilla.PlantillaCreationModel",
+         lambda data: plantilla_models.PlantillaCreationModel(**data).__dict__, [(data,) for data in plantillas]),
+        ("plantilla.PlantillaModel",
+         lambda data: plantilla_models.PlantillaModel(**data).__dict__, [(data,) for data in plantillas]),
+        ("tipo_plantilla.TipoPlantillaModel",
+         lambda data: tipo_plantilla_models.TipoPlantillaModel(**data).__dict__, [(data,) for data in tipos]),
+    ]
+    return result
+
+
+# Medición
+REFERENCE_DATA = {f"campo_{i}": [i, str(i), i * 0.5, {"activo": i % 2 == 0}] for i in range(50)}
+
+
+def reference_work():
+    """Trabajo fijo de Python puro y de la biblioteca estándar: unidad de las razones"""
+    data = json.loads(json.dumps(REFERENCE_DATA))
+    return sorted((key, str(value)) for key, value in data.items() if key[-1] != "0")
+
+
+def run_inputs(fn, inputs: list) -> float:
+    start = time.perf_counter()
+    for args in inputs:
+        fn(*args)
+    return time.perf_counter() - start
+
+
+def measure(fn, inputs: list, repeat: int) -> float:
+    """Mínimo de los µs por llamada entre repeticiones (el menos afectado por la carga de la máquina);
+    cada repetición recorre las entradas las veces necesarias"""
+    # Calentamiento: caché de planes de consulta, construcción diferida de los modelos
+    elapsed = run_inputs(fn, inputs)
+    loops = max(1, int(MIN_REPEAT_S / max(elapsed, 1e-9)))
+    timings = []
+    for _ in range(repeat):
+        elapsed = sum(run_inputs(fn, inputs) for _ in range(loops))
+        timings.append(elapsed / (loops * len(inputs)))
+    return min(timings) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del camino común de las peticiones")
+    parser.add_argument("--filter", default="", help="sólo los casos cuyo nombre contiene el texto")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="falla si un caso es más lento que esto (0.5 = 50 %%); por defecto sólo reporta")
+    parser.add_argument("--update", action="store_true", help="reescribe hotpath_baseline.json con las mediciones")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    base_results = baseline.get("results", {})
+
+    regressions = []
+    measured = {}
+    print(f"{'caso':<36} {'µs/llamada':>12} {'razón':>10} {'línea base':>12} {'cambio':>8}")
+    for name, fn, inputs in cases(random.Random(args.seed)):
+        if args.filter not in name:
+            continue
+        # La referencia se mide junto a cada caso: ambos ven la misma carga de la máquina
+        reference = measure(reference_work, [()], args.repeat)
+        us = measure(fn, inputs, args.repeat)
+        ratio = measured[name] = float(f"{us / reference:.4g}")
+        base = base_results.get(name)
+        change = (ratio - base) / base if base else None
+        flag = "  REGRESIÓN" if None not in (change, args.max_regression) and change > args.max_regression else ""
+        print(f"{name:<36} {us:12.2f} {ratio:10.3f} {base if base is not None else '-':>12} "
+              f"{f'{change:+.1%}' if change is not None else '-':>8}{flag}")
+        if flag:
+            regressions.append(name)
+
+    if args.update:
+        baseline = {
+            "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                     "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")},
+            "results": {**base_results, **measured},
+        }
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Línea base actualizada en {BASELINE_FILE}")
+    elif regressions:
+        print(f"Más lentos que la línea base en más de {args.max_regression:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: tiempo de importación de los módulos de los handlers (arranque en frío)
+# Importa cada módulo en un proceso nuevo con "python -X importtime" y toma la mediana
+# del tiempo acumulado de --repeat ejecuciones. Compara contra los presupuestos de
+# benchmarks/import_budget.json y termina con código 1 si algún módulo los supera,
+# por lo que puede usarse como verificación en CI.
+#
+# Uso (no requiere base de datos):
+#   python benchmarks/bench_import.py [--repeat 7] [--modules crud_plantilla.app,utils]
+#   python benchmarks/bench_import.py --update   # reescribe los presupuestos (+50 %, mínimo +20 ms)
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+HANDLERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers")
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+MODULES = (
+    "crud_plantilla.app",
+    "crud_tipo_plantilla.app",
+    "router",
+    "crud_plantilla.models",
+    "utils",
+    "rendering",
+    "search",
+    "health.app",
+)
+# Los presupuestos absorben la variación entre máquinas: +50 %, y al menos UPDATE_MIN_SLACK_MS
+# para los módulos livianos, cuyo tiempo varía más en proporción (p.ej. search)
+UPDATE_MARGIN = 1.5
+UPDATE_MIN_SLACK_MS = 20
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_time_ms(module: str) -> tuple:
+    """Retorna (ms acumulados del módulo, [(ms, dependencia)] directas más costosas)"""
+    env = dict(os.environ, PYTHONPATH=HANDLERS, PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("TIMEZONE", "America/Bogota")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, capture_output=True, text=True, check=True)
+    # -X importtime escribe cada módulo después de sus dependencias, con sangría por nivel
+    total = 0
+    children = []
+    dependencies = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 2:
+            children.append((cumulative / 1000, name))
+        elif indent == 0:
+            if name == module:
+                total, dependencies = cumulative, children
+            children = []
+    return total / 1000, sorted(dependencies, reverse=True)[:3]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de importación de los handlers contra un presupuesto")
+    parser.add_argument("--modules", default=",".join(MODULES))
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--update", action="store_true", help="reescribe import_budget.json con las mediciones")
+    args = parser.parse_args(argv)
+
+    budgets = {}
+    if os.path.exists(BUDGET_FILE):
+        with open(BUDGET_FILE) as f:
+            budgets = json.load(f)
+
+    failed = []
+    measured = {}
+    print(f"{'módulo':<26} {'mediana ms':>10} {'presupuesto':>12}  dependencias más costosas")
+    for module in args.modules.split(","):
+        runs = [import_time_ms(module) for _ in range(args.repeat)]
+        median = statistics.median(ms for ms, _ in runs)
+        measured[module] = median
+        budget = budgets.get(module)
+        heaviest = ", ".join(f"{name} {ms:.0f}" for ms, name in runs[-1][1])
+        status = "" if budget is None or median <= budget else "  EXCEDIDO"
+        print(f"{module:<26} {median:10.1f} {budget if budget is not None else '-':>12}  {heaviest}{status}")
+        if status:
+            failed.append(module)
+
+    if args.update:
+        budgets.update({module: round(max(ms * UPDATE_MARGIN, ms + UPDATE_MIN_SLACK_MS))
+                        for module, ms in measured.items()})
+        with open(BUDGET_FILE, "w") as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Presupuestos actualizados en {BUDGET_FILE}")
+    elif failed:
+        print(f"Importación sobre el presupuesto: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
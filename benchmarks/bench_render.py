@@ -0,0 +1,75 @@
+# Benchmark: renderizado masivo de una plantilla (rendering.render_rows)
+# Mide filas/segundo según la cantidad de trabajadores, con pool de procesos y de
+# hilos. El pool de procesos es el que escala con los núcleos; con hilos el GIL
+# limita el renderizado (Python puro) a un núcleo.
+#
+# Uso (no requiere base de datos; requiere Jinja2):
+#   python benchmarks/bench_render.py [--rows 20000] [--workers 1,2,4,8] [--pools process,thread]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers"))
+
+import rendering  # noqa: E402
+
+TEMPLATE = """<html><body>
+<p>Estimado(a) {{ nombre | title }},</p>
+<p>Le informamos que su solicitud {{ radicado }} fue {{ "aprobada" if aprobada else "rechazada" }}.</p>
+<table>{% for item in items %}<tr><td>{{ loop.index }}</td><td>{{ item.descripcion }}</td>
+<td>{{ "%.2f" | format(item.valor) }}</td></tr>{% endfor %}</table>
+<p>Total: {{ items | sum(attribute="valor") | round(2) }}</p>
+</body></html>"""
+
+POOLS = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
+
+
+def make_rows(n: int) -> list:
+    return [({
+        "nombre": f"usuario {i}",
+        "radicado": f"RAD-{i:08d}",
+        "aprobada": i % 3 != 0,
+        "items": [{"descripcion": f"concepto {j}", "valor": (i * j) % 1000 / 7} for j in range(10)],
+    }, None) for i in range(n)]
+
+
+def run(template, rows: list, executor, chunk_size: int, workers: int = None) -> float:
+    start = time.perf_counter()
+    for result in rendering.render_rows(template, TEMPLATE, rows, executor, chunk_size, workers):
+        if not result["Success"]:
+            raise RuntimeError(result["Message"])
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de renderizado masivo de plantillas")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--workers", default=",".join(str(2 ** i) for i in range(4)
+                                                    if 2 ** i <= max(os.cpu_count() or 1, 1)))
+    parser.add_argument("--pools", default="process,thread")
+    parser.add_argument("--chunk-size", type=int, default=rendering.RENDER_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    template = rendering._environment.from_string(TEMPLATE)
+    rows = make_rows(args.rows)
+    print(f"{args.rows} filas, bloques de {args.chunk_size}, {os.cpu_count()} CPU")
+
+    baseline = statistics.median(run(template, rows, None, args.chunk_size) for _ in range(args.repeat))
+    print(f"{'sin pool':<20} {args.rows / baseline:12.0f} filas/s  x1.00")
+    for pool in args.pools.split(","):
+        for workers in [int(w) for w in args.workers.split(",")]:
+            with POOLS[pool](max_workers=workers) as executor:
+                # Calentamiento: arranque de procesos y compilación en cada trabajador
+                run(template, rows[:args.chunk_size * workers], executor, args.chunk_size, workers)
+                elapsed = statistics.median(run(template, rows, executor, args.chunk_size, workers)
+                                            for _ in range(args.repeat))
+            print(f"{pool + ' x' + str(workers):<20} {args.rows / elapsed:12.0f} filas/s  x{baseline / elapsed:4.2f}")
+
+
+if __name__ == "__main__":
+    main()
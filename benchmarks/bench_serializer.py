@@ -0,0 +1,100 @@
+# Benchmark: serialización de respuestas de lista
+# Compara el camino anterior (format_specific_values + json.dumps) con serializer.dumps
+# (backend json y orjson si está instalado) sobre respuestas de 10k documentos.
+#
+# Uso (no requiere base de datos):
+#   python benchmarks/bench_serializer.py [--docs 10000] [--repeat 5]
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers"))
+
+from bson import ObjectId  # noqa: E402
+
+import serializer  # noqa: E402
+
+
+def legacy_format_specific_values(result):
+    """Copia del formato anterior de crud_plantilla (sólo convierte tres campos)"""
+    if result.get("_id"):
+        result["_id"] = str(result["_id"])
+    if result.get("fecha_creacion"):
+        result["fecha_creacion"] = str(result["fecha_creacion"])
+    if result.get("grupo_id"):
+        result["grupo_id"] = str(result["grupo_id"])
+    return result
+
+
+def legacy_dumps(documents):
+    body = {"Success": True, "Status": 200, "Message": "Request successful"}
+    body["Data"] = [legacy_format_specific_values(item) for item in documents]
+    return json.dumps(body)
+
+
+def new_dumps(dumps):
+    def run(documents):
+        return dumps({"Success": True, "Status": 200, "Message": "Request successful", "Data": documents})
+    return run
+
+
+def make_documents(n: int, contenido_size: int) -> list:
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [{
+        "_id": ObjectId(),
+        "tipo_plantilla_id": str(ObjectId()),
+        "sistema_id": i % 20,
+        "nombre": f"Plantilla {i}",
+        "codigo_abreviacion": f"PL{i % 500}",
+        "contenido": "<p>{{ nombre }}</p>" * (contenido_size // 20),
+        "grupo_id": uuid.uuid4(),
+        "version": i % 7,
+        "uid": None,
+        "metadatos": {"autor": "bench", "tags": ["a", "b"], "orden": i},
+        "activo": True,
+        "fecha_creacion": now,
+    } for i in range(n)]
+
+
+def measure(fn, make_input, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        data = make_input()
+        start = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de respuestas de lista")
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--contenido-size", type=int, default=1000, help="bytes de contenido por documento")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    base = make_documents(args.docs, args.contenido_size)
+    # El camino anterior modifica los documentos, por lo que cada corrida usa una copia
+    make_input = lambda: [dict(document) for document in base]  # noqa: E731
+
+    candidates = [("legacy format_specific_values + json", legacy_dumps),
+                  ("serializer json", new_dumps(serializer._dumps_json))]
+    if serializer.orjson:
+        candidates.append(("serializer orjson", new_dumps(serializer._dumps_orjson)))
+
+    print(f"{args.docs} documentos, contenido {args.contenido_size} bytes, {args.repeat} repeticiones")
+    baseline = None
+    for name, fn in candidates:
+        median = statistics.median(measure(fn, make_input, args.repeat))
+        baseline = baseline or median
+        print(f"{name:<40} {median * 1000:10.1f} ms  x{baseline / median:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
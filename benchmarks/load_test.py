@@ -0,0 +1,582 @@
+# Prueba de carga local de extremo a extremo
+# Invoca los lambda_handler de crud_plantilla y crud_tipo_plantilla (o router.py con
+# --router) en proceso, con eventos con la forma de API Gateway (proxy REST), contra un
+# mongod local.
+#   seed     -> genera un conjunto sintético de tipo_plantilla / plantilla (grupos con
+#               varias versiones, contenidos con tamaños log-normales, los grandes
+#               externalizados como en content_store.py) y sincroniza los índices
+#   run      -> ejecuta una mezcla ponderada de rutas (o reproduce eventos de un
+#               archivo JSONL) con la concurrencia dada y reporta p50/p95/p99 y
+#               throughput por ruta; guarda el resultado en JSON como línea base
+#   compare  -> compara dos resultados guardados
+#
+# La concurrencia se simula con hilos en un solo proceso: comparten el cliente de
+# Mongo y los cachés del contenedor, como invocaciones sucesivas de un contenedor
+# caliente. Para medir sin caché use CACHE_BACKEND=none.
+#
+# Uso (requiere mongod; por defecto localhost:27017, base de datos plantillas_loadtest):
+#   docker run -d --name mongo-loadtest -p 27017:27017 mongo:6
+#   python benchmarks/load_test.py seed --plantillas 100000 --drop
+#   python benchmarks/load_test.py run --requests 20000 --concurrency 8 --output benchmarks/results/base.json
+#   python benchmarks/load_test.py run --replay eventos.jsonl --compare benchmarks/results/base.json
+#   python benchmarks/load_test.py compare benchmarks/results/base.json benchmarks/results/nuevo.json
+
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "handlers"))
+
+# Valores por defecto para un mongod local; las variables de entorno los reemplazan
+LOCAL_ENVIRONMENT = {
+    "PLANTILLAS_CRUD_HOST": "localhost",
+    "PLANTILLAS_CRUD_PORT": "27017",
+    "PLANTILLAS_CRUD_DB": "plantillas_loadtest",
+    "TIMEZONE": "America/Bogota",
+}
+for _name, _value in LOCAL_ENVIRONMENT.items():
+    os.environ.setdefault(_name, _value)
+
+from bson import ObjectId  # noqa: E402
+
+import content_store  # noqa: E402
+import indexes  # noqa: E402
+import router  # noqa: E402
+import versioning  # noqa: E402
+from crud_plantilla import app as plantilla_app  # noqa: E402
+from crud_tipo_plantilla import app as tipo_plantilla_app  # noqa: E402
+from utils import PLANTILLAS_CRUD_HOST, get_collection  # noqa: E402
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1", "mongo", "mongodb")
+# Variables de entorno que afectan el rendimiento y se guardan con cada resultado
+RECORDED_ENV_PREFIXES = ("MONGO_", "CACHE_", "RENDER_", "RESPONSE_", "FIND_", "CONTENT_", "SEARCH_",
+                         "BULK_", "QUERY_", "COMPRESSION_", "SERIALIZER_")
+# Rutas con menos muestras no se consideran al buscar regresiones
+MIN_SAMPLES_FOR_REGRESSION = 20
+
+VOCABULARIO = (
+    "solicitud certificado constancia matrícula estudiante docente resolución pago recibo "
+    "inscripción admisión grado acta notificación contrato convocatoria beneficio descuento "
+    "liquidación semestre asignatura calificación horario facultad proyecto curricular "
+    "investigación extensión bienestar egresado diploma homologación reintegro transferencia "
+    "aplazamiento cancelación apoyo alimentario monitoria tutoría laboratorio biblioteca "
+    "presupuesto factura proveedor vinculación nómina comisión viáticos informe"
+).split()
+PARRAFOS_BASE = (
+    "<p>Estimado(a) {{ nombre | title }},</p>",
+    "<p>Le informamos que su solicitud {{ radicado }} fue "
+    "{{ \"aprobada\" if aprobada else \"rechazada\" }}.</p>",
+    "<table>{% for item in items %}<tr><td>{{ loop.index }}</td><td>{{ item.descripcion }}</td>"
+    "<td>{{ item.valor }}</td></tr>{% endfor %}</table>",
+    "<p>Fecha de expedición: {{ fecha }}</p>",
+)
+
+
+# Conjunto de datos sintético
+def _paragraphs(rng: random.Random, count: int = 200) -> list:
+    """Párrafos de texto (200-700 caracteres) para componer contenidos"""
+    paragraphs = list(PARRAFOS_BASE)
+    while len(paragraphs) < count:
+        words = [rng.choice(VOCABULARIO) for _ in range(rng.randint(25, 90))]
+        paragraphs.append("<p>" + " ".join(words).capitalize() + ".</p>")
+    return paragraphs
+
+
+def make_contenido(rng: random.Random, paragraphs: list, size: int) -> str:
+    """Plantilla HTML de aproximadamente size bytes, con variables Jinja2 al inicio"""
+    parts = ["<html><body>", *PARRAFOS_BASE]
+    length = sum(len(part) for part in parts)
+    while length < size:
+        part = rng.choice(paragraphs)
+        parts.append(part)
+        length += len(part) + 1
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def content_size(rng: random.Random, args) -> int:
+    """Tamaño log-normal: la mayoría cerca de la mediana, con una cola de contenidos grandes"""
+    size = int(rng.lognormvariate(math.log(args.content_median), args.content_sigma))
+    return min(max(size, 200), args.content_max)
+
+
+def seed_tipos(collection, rng: random.Random, count: int) -> list:
+    documents = [{
+        "_id": ObjectId(),
+        "nombre": f"Tipo {' '.join(rng.sample(VOCABULARIO, 2))} {i}",
+        "descripcion": " ".join(rng.choice(VOCABULARIO) for _ in range(12)),
+        "codigo_abreviacion": f"TP{i:04d}",
+    } for i in range(count)]
+    collection.insert_many(documents)
+    return [str(document["_id"]) for document in documents]
+
+
+def plantilla_groups(rng: random.Random, args, tipos: list):
+    """Genera los documentos de cada grupo (todas sus versiones) y su puntero de versión"""
+    paragraphs = _paragraphs(rng)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    created = 0
+    group = 0
+    while created < args.plantillas:
+        versions = min(rng.randint(1, 2 * args.versions - 1), args.plantillas - created)
+        grupo_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+        tipo_plantilla_id = rng.choice(tipos)
+        sistema_id = rng.randint(1, args.sistemas)
+        codigo = f"PL{group:07d}"
+        nombre = f"{' '.join(rng.sample(VOCABULARIO, 3)).capitalize()} {group}"
+        documents = []
+        for version in range(versions):
+            documents.append({
+                "_id": ObjectId(),
+                "tipo_plantilla_id": tipo_plantilla_id,
+                "sistema_id": sistema_id,
+                "nombre": nombre,
+                "codigo_abreviacion": codigo,
+                "contenido": make_contenido(rng, paragraphs, content_size(rng, args)),
+                "grupo_id": grupo_id,
+                "version": version,
+                "uid": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "metadatos": {"autor": rng.choice(VOCABULARIO), "etiquetas": rng.sample(VOCABULARIO, 3)},
+                "activo": rng.random() >= args.inactive,
+                "fecha_creacion": start + timedelta(minutes=created + version),
+            })
+        active = [document for document in documents if document["activo"]]
+        pointer = {
+            "_id": grupo_id,
+            "versiones": versions,
+            "version_actual": active[-1]["version"] if active else None,
+            "plantilla_id": active[-1]["_id"] if active else None,
+        }
+        created += versions
+        group += 1
+        yield documents, pointer
+
+
+def seed(args) -> int:
+    host = PLANTILLAS_CRUD_HOST or ""
+    if args.drop and host not in LOCAL_HOSTS:
+        print(f"--drop sólo se permite contra un mongod local (PLANTILLAS_CRUD_HOST={host})")
+        return 2
+    tipo_collection = get_collection(tipo_plantilla_app.COLLECTION)
+    plantilla_collection = get_collection(plantilla_app.COLLECTION)
+    if tipo_collection is None or plantilla_collection is None:
+        print("Error connecting to the database")
+        return 2
+    pointers_collection = versioning.versions_collection(plantilla_collection)
+    if args.drop:
+        for collection in (tipo_collection, plantilla_collection, pointers_collection,
+                           content_store.content_collection(plantilla_collection)):
+            collection.drop()
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    tipos = seed_tipos(tipo_collection, rng, args.tipos)
+    documents, pointers = [], []
+    inserted, offloaded, content_bytes = 0, 0, 0
+    for group_documents, pointer in plantilla_groups(rng, args, tipos):
+        for document in group_documents:
+            content_bytes += len(document["contenido"].encode())
+            document = content_store.offload(document, plantilla_collection)
+            offloaded += document[content_store.REF_FIELD] is not None
+            documents.append(document)
+        pointers.append(pointer)
+        if len(documents) >= args.batch_size:
+            plantilla_collection.insert_many(documents, ordered=False)
+            pointers_collection.insert_many(pointers, ordered=False)
+            inserted += len(documents)
+            documents, pointers = [], []
+            print(f"\r{inserted}/{args.plantillas} plantillas "
+                  f"({inserted / (time.perf_counter() - start):.0f} docs/s)", end="", flush=True)
+    if documents:
+        plantilla_collection.insert_many(documents, ordered=False)
+        pointers_collection.insert_many(pointers, ordered=False)
+        inserted += len(documents)
+    print(f"\r{inserted} plantillas, {len(tipos)} tipos en {time.perf_counter() - start:.1f} s; "
+          f"contenido promedio {content_bytes / max(inserted, 1):.0f} bytes, {offloaded} externalizados")
+
+    start = time.perf_counter()
+    for collection in (tipo_collection, plantilla_collection):
+        report = indexes.sync_collection(collection)
+        print(f"Índices de {collection.name}: creados {report['created']}")
+    print(f"Índices sincronizados en {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+# Eventos
+def api_event(method: str, resource: str, path_parameters: dict = None, query: dict = None,
+              body=None) -> dict:
+    """Evento con la forma que entrega API Gateway (integración proxy REST)"""
+    path = resource
+    for name, value in (path_parameters or {}).items():
+        path = path.replace("{" + name + "}", str(value))
+    return {
+        "httpMethod": method,
+        "resource": resource,
+        "path": path,
+        "pathParameters": path_parameters,
+        "queryStringParameters": query,
+        "headers": {"Accept-Encoding": "gzip", "Content-Type": "application/json"},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def render_datos(rng: random.Random) -> dict:
+    return {
+        "nombre": " ".join(rng.sample(VOCABULARIO, 2)),
+        "radicado": f"RAD-{rng.randint(0, 10 ** 8):08d}",
+        "aprobada": rng.random() < 0.7,
+        "fecha": "2024-01-15",
+        "items": [{"descripcion": rng.choice(VOCABULARIO), "valor": rng.randint(1, 10 ** 6)}
+                  for _ in range(rng.randint(1, 10))],
+    }
+
+
+def plantilla_body(rng: random.Random, sample: dict) -> dict:
+    document = rng.choice(sample["plantillas"])
+    return {
+        "tipo_plantilla_id": document["tipo_plantilla_id"],
+        "sistema_id": document["sistema_id"],
+        "nombre": f"{' '.join(rng.sample(VOCABULARIO, 3)).capitalize()} carga",
+        "codigo_abreviacion": f"LT{rng.randint(0, 10 ** 6):06d}",
+        "contenido": make_contenido(rng, sample["paragraphs"], rng.randint(500, 4000)),
+        "metadatos": {"autor": "load_test"},
+    }
+
+
+def _plantilla(rng, sample):
+    return rng.choice(sample["plantillas"])
+
+
+# name -> (peso en mezcla mixed, peso en mezcla read, constructor del evento)
+SCENARIOS = {
+    "plantilla_get_one": (25, 30, lambda rng, s: api_event(
+        "GET", "/plantilla/{id}", {"id": str(_plantilla(rng, s)["_id"])})),
+    "plantilla_list": (10, 12, lambda rng, s: api_event(
+        "GET", "/plantilla", query={"query": "activo:true", "limit": "20", "sortby": "fecha_creacion",
+                                    "order": "desc"})),
+    "plantilla_list_tipo": (10, 12, lambda rng, s: api_event(
+        "GET", "/plantilla", query={"query": f"tipo_plantilla_id:{_plantilla(rng, s)['tipo_plantilla_id']},"
+                                             "activo:true", "limit": "20"})),
+    "plantilla_search": (8, 10, lambda rng, s: api_event(
+        "GET", "/plantilla/search", query={"q": " ".join(rng.sample(VOCABULARIO, rng.randint(1, 2)))})),
+    "plantilla_latest": (8, 10, lambda rng, s: api_event(
+        "GET", "/plantilla/grupo/{grupo_id}/latest", {"grupo_id": str(_plantilla(rng, s)["grupo_id"])})),
+    "plantilla_history": (4, 5, lambda rng, s: api_event(
+        "GET", "/plantilla/grupo/{grupo_id}", {"grupo_id": str(_plantilla(rng, s)["grupo_id"])})),
+    "plantilla_render": (8, 10, lambda rng, s: api_event(
+        "POST", "/plantilla/{id}/render", {"id": str(_plantilla(rng, s)["_id"])},
+        body={"datos": render_datos(rng)})),
+    "plantilla_render_bulk": (1, 1, lambda rng, s: api_event(
+        "POST", "/plantilla/{id}/render/bulk", {"id": str(_plantilla(rng, s)["_id"])},
+        body=[render_datos(rng) for _ in range(50)])),
+    "plantilla_create": (6, 0, lambda rng, s: api_event(
+        "POST", "/plantilla", body=plantilla_body(rng, s))),
+    "plantilla_update": (4, 0, lambda rng, s: api_event(
+        "PUT", "/plantilla/{id}", {"id": str(_plantilla(rng, s)["_id"])}, body=plantilla_body(rng, s))),
+    "tipo_plantilla_get_one": (4, 5, lambda rng, s: api_event(
+        "GET", "/tipo_plantilla/{id}", {"id": rng.choice(s["tipos"])})),
+    "tipo_plantilla_list": (4, 5, lambda rng, s: api_event(
+        "GET", "/tipo_plantilla", query={"limit": "50"})),
+}
+MIXES = {"mixed": 0, "read": 1}
+
+
+def load_sample(size: int, rng: random.Random) -> dict:
+    """Muestra de plantillas activas y tipos existentes para construir los eventos"""
+    plantilla_collection = get_collection(plantilla_app.COLLECTION)
+    tipo_collection = get_collection(tipo_plantilla_app.COLLECTION)
+    if plantilla_collection is None or tipo_collection is None:
+        raise RuntimeError("Error connecting to the database")
+    plantillas = list(plantilla_collection.aggregate([
+        {"$match": {"activo": True}},
+        {"$sample": {"size": size}},
+        {"$project": {"_id": 1, "grupo_id": 1, "tipo_plantilla_id": 1, "sistema_id": 1}},
+    ]))
+    tipos = [str(document["_id"]) for document in tipo_collection.aggregate([
+        {"$sample": {"size": size}}, {"$project": {"_id": 1}}])]
+    if not plantillas or not tipos:
+        raise RuntimeError("La base de datos no tiene plantillas activas; ejecute primero: load_test.py seed")
+    return {"plantillas": plantillas, "tipos": tipos, "paragraphs": _paragraphs(rng)}
+
+
+def synthetic_events(count: int, mix: str, rng: random.Random, sample: dict) -> list:
+    """[(nombre, evento)] según los pesos de la mezcla"""
+    names = [name for name, scenario in SCENARIOS.items() if scenario[MIXES[mix]]]
+    weights = [SCENARIOS[name][MIXES[mix]] for name in names]
+    return [(name, SCENARIOS[name][2](rng, sample)) for name in rng.choices(names, weights, k=count)]
+
+
+def route_name(event: dict) -> str:
+    return f"{event.get('httpMethod')} {event.get('resource') or event.get('path')}"
+
+
+def read_events(path: str) -> list:
+    """
+    Eventos a reproducir, uno por línea (JSONL): el evento de API Gateway tal como se
+    capturó, o {"name", "event"} como los guarda --record. Sin name se agrupan por ruta.
+    """
+    events = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                event = record.get("event", record)
+                events.append((record.get("name") or route_name(event), event))
+    return events
+
+
+def write_events(path: str, events: list):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        for name, event in events:
+            f.write(json.dumps({"name": name, "event": event}) + "\n")
+
+
+def handler_for(event: dict, via_router: bool = False):
+    if via_router:
+        return router.lambda_handler
+    resource = event.get("resource") or event.get("path") or ""
+    if resource.startswith("/tipo_plantilla"):
+        return tipo_plantilla_app.lambda_handler
+    return plantilla_app.lambda_handler
+
+
+# Ejecución y estadísticas
+def execute(events: list, concurrency: int, via_router: bool = False) -> tuple:
+    """Invoca los handlers con concurrency hilos; retorna ([(nombre, ruta, ms, status, bytes)], segundos)"""
+    results = [None] * len(events)
+    counter = itertools.count()
+
+    def worker():
+        for i in iter(counter.__next__, None):
+            if i >= len(events):
+                return
+            name, event = events[i]
+            start = time.perf_counter()
+            try:
+                response = handler_for(event, via_router)(event, None)
+                status, size = response.get("statusCode", 500), len(response.get("body") or "")
+            except Exception as ex:
+                print(f"Unhandled error in {name}: {ex}", file=sys.stderr)
+                status, size = 599, 0
+            results[i] = (name, route_name(event), (time.perf_counter() - start) * 1000, status, size)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return results, time.perf_counter() - start
+
+
+def percentile(ordered: list, p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(latencies: list, statuses: list, sizes: list, elapsed_s: float) -> dict:
+    ordered = sorted(latencies)
+    status_counts = {}
+    for status in statuses:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    return {
+        "count": len(ordered),
+        "errors": sum(1 for status in statuses if status >= 500),
+        "status": status_counts,
+        "throughput_rps": round(len(ordered) / elapsed_s, 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "mean_body_bytes": round(sum(sizes) / len(sizes)),
+    }
+
+
+def report(results: list, elapsed_s: float) -> dict:
+    grouped = {}
+    for name, route, ms, status, size in results:
+        entry = grouped.setdefault(name, {"route": route, "ms": [], "status": [], "bytes": []})
+        entry["ms"].append(ms)
+        entry["status"].append(status)
+        entry["bytes"].append(size)
+    routes = {name: {"route": entry["route"], **summarize(entry["ms"], entry["status"], entry["bytes"], elapsed_s)}
+              for name, entry in sorted(grouped.items())}
+    total = summarize([r[2] for r in results], [r[3] for r in results], [r[4] for r in results], elapsed_s)
+    return {"routes": routes, "total": total}
+
+
+def print_report(result: dict):
+    width = max([len(name) for name in result["routes"]] + [24])
+    print(f"{'ruta':<{width}} {'n':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for name, stats in [*result["routes"].items(), ("TOTAL", result["total"])]:
+        print(f"{name:<{width}} {stats['count']:7d} {stats['errors']:5d} {stats['throughput_rps']:9.1f} "
+              f"{stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f} {stats['max_ms']:9.2f}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def metadata(args, events: list) -> dict:
+    plantilla_collection = get_collection(plantilla_app.COLLECTION)
+    tipo_collection = get_collection(tipo_plantilla_app.COLLECTION)
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "requests": len(events),
+        "concurrency": args.concurrency,
+        "mix": None if args.replay else args.mix,
+        "router": args.router,
+        "replay": args.replay,
+        "seed": args.seed,
+        "dataset": {
+            "plantilla": plantilla_collection.estimated_document_count(),
+            "tipo_plantilla": tipo_collection.estimated_document_count(),
+        },
+        "env": {name: value for name, value in sorted(os.environ.items())
+                if name.startswith(RECORDED_ENV_PREFIXES)},
+    }
+
+
+def compare(baseline: dict, current: dict, max_regression: float = None) -> list:
+    """Imprime las diferencias por ruta y retorna las rutas cuyo p95 empeoró más de max_regression"""
+    def change(new, old):
+        return f"{(new - old) / old * 100:+6.1f}%" if old else "     -"
+
+    regressions = []
+    routes = {**current["routes"], "TOTAL": current["total"]}
+    base_routes = {**baseline["routes"], "TOTAL": baseline["total"]}
+    width = max([len(name) for name in routes] + [24])
+    print(f"{'ruta':<{width}} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17} {'rps':>15}")
+    for name, stats in routes.items():
+        base = base_routes.get(name)
+        if base is None:
+            print(f"{name:<{width}} (sin línea base)")
+            continue
+        columns = [f"{stats[k]:9.2f} {change(stats[k], base[k])}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        columns.append(f"{stats['throughput_rps']:7.1f} {change(stats['throughput_rps'], base['throughput_rps'])}")
+        print(f"{name:<{width}} {' '.join(columns)}")
+        if (max_regression is not None and name != "TOTAL" and base["p95_ms"]
+                and min(stats["count"], base["count"]) >= MIN_SAMPLES_FOR_REGRESSION
+                and (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] > max_regression):
+            regressions.append(name)
+    return regressions
+
+
+def run(args) -> int:
+    rng = random.Random(args.seed)
+    if args.replay:
+        events = read_events(args.replay)
+        if args.requests:
+            events = [events[i % len(events)] for i in range(args.requests)]
+        warmup = events[:args.warmup]
+    else:
+        sample = load_sample(args.sample_size, rng)
+        events = synthetic_events(args.requests or 10000, args.mix, rng, sample)
+        warmup = synthetic_events(args.warmup, args.mix, rng, sample)
+    if args.record:
+        write_events(args.record, events)
+        print(f"{len(events)} eventos guardados en {args.record}")
+
+    quiet = open(os.devnull, "w") if not args.verbose else None
+    with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+        # Calentamiento: arranque en frío, conexiones del pool y cachés
+        execute(warmup, args.concurrency, args.router)
+        results, elapsed_s = execute(events, args.concurrency, args.router)
+    if quiet:
+        quiet.close()
+
+    result = {"meta": metadata(args, events), **report(results, elapsed_s)}
+    print(f"{len(events)} peticiones, concurrencia {args.concurrency}, {elapsed_s:.1f} s")
+    print_report(result)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Resultado guardado en {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), result, args.max_regression)
+        if regressions:
+            print(f"p95 empeoró más de {args.max_regression:.0%} en: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga local de los handlers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="genera el conjunto de datos sintético")
+    seed_parser.add_argument("--plantillas", type=int, default=100000)
+    seed_parser.add_argument("--tipos", type=int, default=50)
+    seed_parser.add_argument("--sistemas", type=int, default=10)
+    seed_parser.add_argument("--versions", type=int, default=3, help="versiones promedio por grupo")
+    seed_parser.add_argument("--inactive", type=float, default=0.1, help="fracción de plantillas inactivas")
+    seed_parser.add_argument("--content-median", type=int, default=4096, help="bytes")
+    seed_parser.add_argument("--content-sigma", type=float, default=1.0)
+    seed_parser.add_argument("--content-max", type=int, default=512 * 1024, help="bytes")
+    seed_parser.add_argument("--batch-size", type=int, default=1000)
+    seed_parser.add_argument("--seed", type=int, default=42)
+    seed_parser.add_argument("--drop", action="store_true", help="elimina las colecciones antes de generar")
+
+    run_parser = commands.add_parser("run", help="ejecuta la carga y reporta latencias por ruta")
+    run_parser.add_argument("--requests", type=int, default=None,
+                            help="peticiones (por defecto 10000, o una pasada por el archivo de --replay)")
+    run_parser.add_argument("--concurrency", type=int, default=4)
+    run_parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    run_parser.add_argument("--replay", help="archivo JSONL con eventos de API Gateway a reproducir")
+    run_parser.add_argument("--record", help="guarda los eventos ejecutados en JSONL (para --replay)")
+    run_parser.add_argument("--warmup", type=int, default=200)
+    run_parser.add_argument("--sample-size", type=int, default=1000)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="archivo JSON donde guardar el resultado")
+    run_parser.add_argument("--compare", help="resultado JSON de referencia")
+    run_parser.add_argument("--max-regression", type=float, default=None,
+                            help="con --compare: termina con código 1 si el p95 de una ruta empeora más (0.2 = 20%%)")
+    run_parser.add_argument("--router", action="store_true",
+                            help="invoca router.lambda_handler (Deployment=router) en lugar del handler de cada ruta")
+    run_parser.add_argument("--verbose", action="store_true", help="muestra los logs de los handlers")
+
+    compare_parser = commands.add_parser("compare", help="compara dos resultados guardados")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--max-regression", type=float, default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "seed":
+        return seed(args)
+    if args.command == "run":
+        return run(args)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.max_regression)
+    if regressions:
+        print(f"p95 empeoró más de {args.max_regression:.0%} en: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
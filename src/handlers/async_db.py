@@ -0,0 +1,120 @@
+# Acceso asíncrono a Mongo (AsyncMongoClient nativo de pymongo)
+# Permite que un handler ejecute en paralelo las consultas independientes de una misma
+# invocación (p.ej. una página y su total, o la última versión de varios grupos) en lugar
+# de encadenar llamadas bloqueantes de pymongo:
+#   future = async_db.submit(async_db.gather(async_db.count("plantilla", filtro)))
+#   ...                                         # trabajo síncrono mientras se cuenta
+#   total, = async_db.result(future)
+#   latest = async_db.run(async_db.gather(*(async_db.find_one("plantilla", f) for f in filtros)))
+# El event loop corre en un hilo del contenedor y, como el cliente de pymongo de
+# utils.py, se conserva entre invocaciones junto con su AsyncMongoClient. El cliente
+# usa las opciones de utils.client_options, con un pool de a lo sumo
+# ASYNC_MAX_CONCURRENCY conexiones y sin conexiones mínimas: el contenedor abre como
+# máximo MONGO_MAX_POOL_SIZE + ASYNC_MAX_CONCURRENCY conexiones. utils.reset_db_client
+# también descarta este cliente.
+# gather admite hasta ASYNC_MAX_CONCURRENCY consultas simultáneas y limita cada una a
+# ASYNC_QUERY_TIMEOUT_MS (también en el servidor, con maxTimeMS). Una consulta que falla
+# o excede el timeout retorna su excepción en la posición de su resultado, sin cancelar
+# las demás; quien llama decide si la respuesta puede construirse sin ella.
+
+import asyncio
+import os
+import threading
+
+from pymongo import AsyncMongoClient
+from pymongo.errors import ConnectionFailure
+
+import logger
+from metrics import phase
+from utils import PLANTILLAS_CRUD_DB, build_uri, client_options
+
+# Optional environment variables
+ASYNC_MAX_CONCURRENCY = int(os.environ.get('ASYNC_MAX_CONCURRENCY', 8))
+ASYNC_QUERY_TIMEOUT_MS = int(os.environ.get('ASYNC_QUERY_TIMEOUT_MS', 3000))
+
+# Estado por contenedor: se conserva entre invocaciones "warm"
+_loop = None
+_loop_lock = threading.Lock()
+# Se crea y se usa desde el hilo del event loop; reset_client lo cierra en ese hilo
+_client = None
+
+
+def get_loop():
+    """Event loop del contenedor, en ejecución en su propio hilo"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async_db", daemon=True).start()
+    return _loop
+
+
+def get_client():
+    """AsyncMongoClient del contenedor, creado en el event loop la primera vez"""
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(build_uri(), **client_options(maxPoolSize=ASYNC_MAX_CONCURRENCY, minPoolSize=0))
+        logger.info("Successful async connection to the database")
+    return _client
+
+
+def reset_client():
+    """Descarta el cliente; la siguiente consulta crea uno nuevo. Se puede llamar desde cualquier hilo"""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        # close es una corrutina: se ejecuta en el event loop sin esperar su resultado
+        asyncio.run_coroutine_threadsafe(client.close(), get_loop())
+
+
+def collection(name: str, database: str = None):
+    return get_client()[str(database or PLANTILLAS_CRUD_DB)][name]
+
+
+async def find_one(name: str, filter_: dict, projection=None, sort=None, database: str = None):
+    return await collection(name, database).find_one(filter_, projection, sort=sort,
+                                                     max_time_ms=ASYNC_QUERY_TIMEOUT_MS)
+
+
+async def find(name: str, query: dict, database: str = None) -> list:
+    """collection.find(**query) completo, con query como la de streaming.stream_find"""
+    cursor = collection(name, database).find(**query, max_time_ms=ASYNC_QUERY_TIMEOUT_MS)
+    return await cursor.to_list(length=None)
+
+
+async def count(name: str, filter_: dict, database: str = None) -> int:
+    return await collection(name, database).count_documents(filter_ or {}, maxTimeMS=ASYNC_QUERY_TIMEOUT_MS)
+
+
+async def gather(*queries, limit: int = None, timeout_ms: int = None) -> list:
+    """
+    Ejecuta las corrutinas dadas con a lo sumo limit simultáneas y timeout_ms cada una.
+    Retorna los resultados en el mismo orden; las que fallan retornan su excepción.
+    """
+    semaphore = asyncio.Semaphore(limit or ASYNC_MAX_CONCURRENCY)
+    timeout_s = (timeout_ms or ASYNC_QUERY_TIMEOUT_MS) / 1000
+
+    async def bounded(query):
+        async with semaphore:
+            return await asyncio.wait_for(query, timeout_s)
+
+    results = await asyncio.gather(*(bounded(query) for query in queries), return_exceptions=True)
+    if any(isinstance(result, ConnectionFailure) for result in results):
+        reset_client()
+    return results
+
+
+def submit(coroutine):
+    """Inicia la corrutina en el event loop del contenedor; retorna un concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+
+
+def result(future):
+    """Espera el resultado de submit; el tiempo de espera se registra en la fase db"""
+    with phase("db"):
+        return future.result()
+
+
+def run(coroutine):
+    """Ejecuta la corrutina en el event loop del contenedor y espera su resultado"""
+    return result(submit(coroutine))
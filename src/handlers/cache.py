@@ -0,0 +1,144 @@
+# Caché de respuestas por contenedor (LRU + TTL)
+# Guarda (ETag, body ya serializado) de get_one, con llave "<colección>:<_id>".
+# Los caminos de escritura (create, update, delete) invalidan la entrada y ejecutan
+# los hooks registrados con register_invalidation_hook.
+# CACHE_BACKEND selecciona el backend (BACKENDS): memory o none.
+#
+# Nota: cada contenedor tiene su propia memoria, por lo que una escritura atendida
+# por otro contenedor sólo se refleja aquí cuando vence el TTL.
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import logger
+
+# Optional environment variables
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_TTL_S = float(os.environ.get('CACHE_TTL_S', 60))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1000))
+
+
+class CacheBackend(ABC):
+    """Interfaz de backend de caché. Las subclases implementan _get, _set y delete"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        self._set(key, value)
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def _get(self, key: str):
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value):
+        ...
+
+    def size(self) -> int:
+        return 0
+
+
+class MemoryCache(CacheBackend):
+    """LRU con expiración por TTL, en la memoria del contenedor"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_s: float = CACHE_TTL_S):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class NullCache(CacheBackend):
+    """Desactiva el caché (CACHE_BACKEND=none)"""
+
+    def _get(self, key: str):
+        return None
+
+    def _set(self, key: str, value):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+
+BACKENDS = {
+    "memory": MemoryCache,
+    "none": NullCache,
+}
+
+_cache = None
+# Funciones adicionales a ejecutar al invalidar (p.ej. plantillas compiladas de rendering.py)
+_invalidation_hooks = []
+
+
+def get_cache() -> CacheBackend:
+    """Retorna el caché compartido del contenedor, creándolo la primera vez"""
+    global _cache
+    if _cache is None:
+        factory = BACKENDS.get(CACHE_BACKEND)
+        if factory is None:
+            logger.warning("Unknown cache backend, using memory", backend=CACHE_BACKEND)
+            factory = MemoryCache
+        _cache = factory()
+    return _cache
+
+
+def cache_key(collection: str, _id) -> str:
+    return f"{collection}:{_id}"
+
+
+def register_invalidation_hook(hook):
+    """Registra hook(collection, _id), ejecutado en cada invalidate"""
+    _invalidation_hooks.append(hook)
+
+
+def invalidate(collection: str, _id):
+    get_cache().delete(cache_key(collection, _id))
+    for hook in _invalidation_hooks:
+        hook(collection, _id)
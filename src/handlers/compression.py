@@ -0,0 +1,96 @@
+# Compresión de respuestas según Accept-Encoding
+# Se aplica a las respuestas de listas (get_all). Codificaciones soportadas, en orden
+# de preferencia del servidor: zstd (si zstandard está instalado), gzip y deflate.
+# Bajo COMPRESSION_MIN_BYTES no se comprime. El body comprimido se retorna en base64
+# con isBase64Encoded, como lo requiere API Gateway (BinaryMediaTypes en template.yaml).
+
+import base64
+import gzip
+import os
+import time
+import zlib
+
+from metrics import record, timed
+from utils import get_header
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Optional environment variables
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1400))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 5))
+ZSTD_LEVEL = int(os.environ.get('ZSTD_LEVEL', 3))
+
+_zstd_compressor = None
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _deflate(data: bytes) -> bytes:
+    return zlib.compress(data, GZIP_LEVEL)
+
+
+def _zstd(data: bytes) -> bytes:
+    global _zstd_compressor
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return _zstd_compressor.compress(data)
+
+
+CODECS = {"gzip": _gzip, "deflate": _deflate}
+if zstandard:
+    CODECS = {"zstd": _zstd, **CODECS}
+
+
+def negotiate(accept_encoding: str):
+    """Elige la codificación soportada con mayor preferencia (respetando q=0)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    candidates = [(accepted.get(coding, wildcard), -i, coding) for i, coding in enumerate(CODECS)]
+    q, _, coding = max(candidates)
+    return coding if q > 0 else None
+
+
+@timed("compress")
+def compress_response(response: dict, event) -> dict:
+    """Comprime el body de la respuesta si el cliente lo acepta y supera el umbral"""
+    if not COMPRESSION_ENABLED or response.get("isBase64Encoded"):
+        return response
+    headers = response.setdefault("headers", {})
+    headers["Vary"] = "Accept-Encoding"
+    raw = response["body"].encode()
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return response
+    coding = negotiate(get_header(event, "Accept-Encoding"))
+    if coding is None:
+        return response
+
+    start = time.perf_counter()
+    compressed = CODECS[coding](raw)
+    record(content_encoding=coding, uncompressed_bytes=len(raw), compressed_bytes=len(compressed),
+           compress_ms=round((time.perf_counter() - start) * 1000, 3))
+
+    headers["Content-Encoding"] = coding
+    # El ETag fuerte identifica la representación sin comprimir
+    if headers.get("ETag", "").startswith('"'):
+        headers["ETag"] = "W/" + headers["ETag"]
+    response["body"] = base64.b64encode(compressed).decode()
+    response["isBase64Encoded"] = True
+    return response
@@ -0,0 +1,133 @@
+# Almacenamiento de contenidos grandes de plantilla
+# Un contenido que supera CONTENT_OFFLOAD_BYTES se comprime con zlib y se guarda en
+# la colección CONTENT_COLLECTION con _id = sha256 del texto, por lo que un mismo
+# contenido repetido entre versiones se guarda una sola vez. El documento principal
+# queda con contenido = None y contenido_ref con el hash y los tamaños.
+# Para la búsqueda de texto (search.py) el documento principal conserva además
+# contenido_texto: el texto del contenido sin marcado, hasta CONTENT_SEARCH_MAX_BYTES,
+# que el índice de texto ($**) cubre en lugar de contenido.
+# Al leer, el contenido se carga sólo si la proyección lo solicita (hydrate).
+# contenido_ref y contenido_texto son internos: no se incluyen en las respuestas.
+#
+# Los contenidos son inmutables; los que dejan de estar referenciados no se eliminan.
+
+import hashlib
+import html
+import os
+import re
+import zlib
+from datetime import datetime, timezone
+
+from bson import Binary
+
+from projections import with_fields
+
+# Optional environment variables
+CONTENT_COLLECTION = os.environ.get('CONTENT_COLLECTION', 'plantilla_contenido')
+CONTENT_OFFLOAD_BYTES = int(os.environ.get('CONTENT_OFFLOAD_BYTES', 16384))
+CONTENT_COMPRESSION_LEVEL = int(os.environ.get('CONTENT_COMPRESSION_LEVEL', 6))
+# Bytes máximos del texto indexado de un contenido externalizado
+CONTENT_SEARCH_MAX_BYTES = int(os.environ.get('CONTENT_SEARCH_MAX_BYTES', 16384))
+
+FIELD = "contenido"
+REF_FIELD = "contenido_ref"
+TEXT_FIELD = "contenido_texto"
+INTERNAL_FIELDS = (REF_FIELD, TEXT_FIELD)
+
+# Etiquetas HTML y bloques Jinja2 ({{ }}, {% %}, {# #}), que no aportan a la búsqueda
+MARKUP_PATTERN = re.compile(r"<[^>]*>|\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.S)
+
+
+def content_collection(collection):
+    """Colección de contenidos en la misma base de datos que la colección principal"""
+    return collection.database[CONTENT_COLLECTION]
+
+
+def store(collection, contenido: str) -> dict:
+    """Guarda el contenido (idempotente por hash) y retorna la referencia"""
+    raw = contenido.encode()
+    content_hash = hashlib.sha256(raw).hexdigest()
+    compressed = zlib.compress(raw, CONTENT_COMPRESSION_LEVEL)
+    content_collection(collection).update_one(
+        {"_id": content_hash},
+        {"$setOnInsert": {"data": Binary(compressed), "encoding": "zlib", "size": len(raw),
+                          "compressed_size": len(compressed), "fecha_creacion": datetime.now(timezone.utc)}},
+        upsert=True)
+    return {"hash": content_hash, "size": len(raw), "compressed_size": len(compressed), "encoding": "zlib"}
+
+
+def search_text(contenido: str) -> str:
+    """Texto del contenido sin marcado ni espacios repetidos, hasta CONTENT_SEARCH_MAX_BYTES"""
+    text = " ".join(html.unescape(MARKUP_PATTERN.sub(" ", contenido)).split())
+    return text.encode()[:CONTENT_SEARCH_MAX_BYTES].decode(errors="ignore")
+
+
+def offload(data: dict, collection) -> dict:
+    """
+    Retorna una copia de data lista para escribir: si contenido supera el umbral se
+    externaliza y su texto se conserva en contenido_texto para el índice. Siempre que
+    data incluya contenido se fijan contenido_ref y contenido_texto (o None), para que
+    un $set no deje valores anteriores.
+    """
+    if FIELD not in data:
+        return data
+    document = dict(data)
+    contenido = document[FIELD]
+    if contenido and len(contenido.encode()) > CONTENT_OFFLOAD_BYTES:
+        document[REF_FIELD] = store(collection, contenido)
+        document[TEXT_FIELD] = search_text(contenido)
+        document[FIELD] = None
+    else:
+        document[REF_FIELD] = None
+        document[TEXT_FIELD] = None
+    return document
+
+
+def wants_content(projection) -> bool:
+    """Indica si la proyección solicita el campo contenido"""
+    if not projection:
+        return True
+    if any(projection.values()):
+        return bool(projection.get(FIELD))
+    return FIELD not in projection
+
+
+def read_projection(projection):
+    """
+    Agrega contenido_ref a una proyección de inclusión que solicita contenido (hydrate
+    lo retira) y excluye los campos internos que no hacen falta de una de exclusión
+    """
+    if not projection:
+        return projection
+    if any(projection.values()):
+        return with_fields(projection, [REF_FIELD]) if wants_content(projection) else projection
+    excluded = (TEXT_FIELD,) if wants_content(projection) else INTERNAL_FIELDS
+    return {**projection, **{field: 0 for field in excluded}}
+
+
+def without_internal(document: dict) -> dict:
+    """Retira del documento los campos internos (contenido_ref, contenido_texto)"""
+    for field in INTERNAL_FIELDS:
+        document.pop(field, None)
+    return document
+
+
+def hydrate(documents: list, collection) -> list:
+    """Carga en lote los contenidos externalizados de los documentos dados y retira los campos internos"""
+    pending = [d for d in documents if d.get(REF_FIELD) and d.get(FIELD) is None]
+    if pending:
+        hashes = list({d[REF_FIELD]["hash"] for d in pending})
+        contents = {c["_id"]: zlib.decompress(c["data"]).decode()
+                    for c in content_collection(collection).find({"_id": {"$in": hashes}})}
+        for document in pending:
+            document[FIELD] = contents.get(document[REF_FIELD]["hash"])
+    for document in documents:
+        without_internal(document)
+    return documents
+
+
+def loader(collection, projection):
+    """Función para streaming.stream_find que hidrata cada lote, o None si no hace falta"""
+    if not wants_content(projection):
+        return None
+    return lambda documents: hydrate(documents, collection)
@@ -0,0 +1,218 @@
+# Núcleo compartido por los handlers
+# Deserialización del body, parámetros de los listados, lecturas con caché/ETag y formato
+# de las respuestas, comunes a crud_plantilla, crud_tipo_plantilla, los handlers anteriores y router.py.
+# Cada handler conserva sus propios nombres (parse_body, format_response, ...) importándolos
+# de aquí, por lo que su interfaz no cambia.
+
+import base64
+import json
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+import logger
+from cache import cache_key, get_cache
+from etags import body_etag, document_etag, etag_matches, not_modified
+from metrics import record, timed
+from pagination import apply_cursor
+from projections import record_bytes_saved, resolve_projection
+from serializer import dumps
+from streaming import stream_find
+from utils import handle_db_error
+
+ORDER_LABEL = {
+    "desc": DESCENDING,
+    "asc": ASCENDING
+}
+
+
+# Deserialización de parámetros de entrada
+# parse_body -> body de las peticiones POST, PUT, DELETE
+@timed("parse")
+def parse_body(event) -> tuple:
+    try:
+        body = event["body"]
+        # Con BinaryMediaTypes API Gateway puede entregar el body en base64
+        if event.get("isBase64Encoded"):
+            body = base64.b64decode(body)
+        return json.loads(body), None
+    except Exception as ex:
+        return None, ex
+
+
+def get_sort_by(query_params) -> list:
+    sort_by_total = []
+    if query_params.get("sortby"):
+        sort_by_list = str(query_params.get("sortby")).split(",")
+        if query_params.get("order"):
+            order_list = str(query_params.get("order")).split(",")
+            if len(order_list) == 1:
+                # Default ASCENDING
+                order_label = ORDER_LABEL.get(query_params.get("order"), ASCENDING)
+                sort_by_total = [(e, order_label) for e in sort_by_list]
+            elif len(order_list) == len(sort_by_list):
+                for i, e in enumerate(sort_by_list):
+                    order_label = ORDER_LABEL.get(order_list[i], ASCENDING)
+                    sort_by_total.append((e, order_label))
+            else:
+                # Default ASCENDING
+                sort_by_total = [(e, ASCENDING) for e in sort_by_list]
+    return sort_by_total
+
+
+def parse_list_params(event, get_query, projection_profiles: dict, query_strict: bool,
+                      countable: bool = False) -> tuple:
+    """
+    Parámetros de get_all: (query de stream_find, None) o ({}, error).
+    get_query(query_str, strict) compila el filtro con los modelos del handler.
+    Con countable, count=true agrega "count_filter": el filtro sin el cursor, para el total.
+    """
+    try:
+        query_params_result = {"limit": 10}
+        query_params = event["queryStringParameters"]
+        if isinstance(query_params, dict):
+            # query: k:v, k__gte:v, k__in:v1|v2 (strict=true rechaza filtros sin índice)
+            if query_params.get("query"):
+                strict = str(query_params.get("strict", query_strict)).lower() == "true"
+                query_params_result["filter"] = get_query(str(query_params.get("query")), strict)
+
+            # count: true agrega el total de documentos del filtro (X-Total-Count)
+            if countable and str(query_params.get("count", "")).lower() == "true":
+                query_params_result["count_filter"] = query_params_result.get("filter", {})
+
+            # profile: summary (por defecto) | full | ids
+            # fields: col1, col2, entity.col3 | -col1, -entity.col3 (reemplaza profile)
+            projection = resolve_projection(query_params, projection_profiles)
+            if projection:
+                query_params_result["projection"] = projection
+
+            # sortby: col1,col2
+            # order: desc,asc
+            if query_params.get("sortby"):
+                query_params_result["sort"] = get_sort_by(query_params)
+
+            # limit: 10 (default is 10)
+            if query_params.get("limit"):
+                query_params_result["limit"] = int(query_params.get("limit"))
+
+            # offset: 0 (default is 0)
+            if query_params.get("offset"):
+                query_params_result["skip"] = int(query_params.get("offset"))
+
+            # cursor: start | NextCursor de la respuesta anterior (reemplaza offset)
+            if query_params.get("cursor"):
+                query_params_result = apply_cursor(query_params_result, str(query_params.get("cursor")))
+
+            return query_params_result, None
+        else:
+            projection = resolve_projection({}, projection_profiles)
+            if projection:
+                query_params_result["projection"] = projection
+            return query_params_result, None
+    except Exception as ex:
+        logger.warning("Error in parse_query_params", error=ex)
+        return {}, ex
+
+
+# Lecturas compartidas por los CRUD
+def count_async(collection, filter_):
+    """Inicia el conteo de filter_ en async_db, en paralelo con el trabajo síncrono que sigue"""
+    import async_db
+    return async_db.submit(async_db.gather(async_db.count(collection.name, filter_, collection.database.name)))
+
+
+def await_count(future):
+    """Total de count_async, o None si la consulta falló (la página se retorna sin total)"""
+    import async_db
+    total, = async_db.result(future)
+    if isinstance(total, BaseException):
+        logger.warning("Error counting documents", error=total)
+        return None
+    return total
+
+
+def get_all(query, collection, if_none_match=None, read_projection=None, loader=None):
+    """
+    Listado de collection con ETag (304 si coincide con If-None-Match).
+    read_projection(projection) -> proyección enviada a Mongo y loader(collection, projection) ->
+    prepare de stream_find permiten al modelo leer campos internos y completar cada documento.
+    Si query trae count_filter (count=true), el total se cuenta en paralelo y va en X-Total-Count.
+    """
+    try:
+        stats = {}
+        projection = query.get("projection")
+        count_filter = query.get("count_filter")
+        query = {key: value for key, value in query.items() if key != "count_filter"}
+        if read_projection is not None:
+            query["projection"] = read_projection(projection)
+        # count=true: la página y el total se consultan en paralelo
+        total = count_async(collection, count_filter) if count_filter is not None else None
+        response = stream_find(query, collection, "Request successful", stats=stats,
+                               prepare=loader(collection, projection) if loader is not None else None)
+        record_bytes_saved(collection, projection, stats["count"], stats["bytes"])
+        headers = {}
+        if total is not None:
+            total = await_count(total)
+            if total is not None:
+                headers["X-Total-Count"] = str(total)
+        # El total forma parte del ETag: cambia aunque la página sea la misma
+        etag = body_etag(response["body"] + headers.get("X-Total-Count", ""))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response["headers"] = {**headers, "ETag": etag}
+        return response
+    except Exception as ex:
+        handle_db_error(ex)
+        return format_response({}, f"Error service GetAll: {ex}", 500, False)
+
+
+def get_one(_id, collection, if_none_match=None, prepare=None):
+    """
+    Documento _id de collection con caché read-through y ETag.
+    prepare(document) -> documento de la respuesta (p.ej. contenido externo de plantilla).
+    """
+    try:
+        filter_ = {"_id": ObjectId(_id)}
+        # Read-through: el caché guarda (ETag, body ya serializado)
+        response_cache = get_cache()
+        key = cache_key(collection.name, filter_["_id"])
+        cached = response_cache.get(key)
+        record(cache_hits=int(cached is not None), cache_misses=int(cached is None), cache_size=response_cache.size())
+        if cached is not None:
+            etag, body = cached
+            # 304 sin consultar la base de datos
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return {"statusCode": 200, "body": body, "headers": {"X-Cache": "HIT", "ETag": etag}}
+        data = collection.find_one(filter_)
+        if data:
+            etag = document_etag(data)
+            # 304 sin serializar el documento
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            response = format_response(prepare(data) if prepare is not None else data, "Request successful", 200, True)
+            evictions = response_cache.evictions
+            response_cache.set(key, (etag, response["body"]))
+            record(cache_evictions=response_cache.evictions - evictions, cache_size=response_cache.size())
+            response["headers"] = {"X-Cache": "MISS", "ETag": etag}
+            return response
+        return format_response({}, "Request unsuccessful", 404, False)
+    except Exception as ex:
+        handle_db_error(ex)
+        return format_response({}, f"Error service GetOne: {ex}", 500, False)
+
+
+# Formato de respuestas
+@timed("serialize")
+def format_response(result, message: str, status_code: int, success: bool) -> dict:
+    """Formats the HTTP response."""
+    record(documents=len(result) if isinstance(result, list) else int(bool(result)))
+    body = {
+        "Success": success,
+        "Status": status_code,
+        "Message": message
+    }
+    # Un error con detalle (p.ej. el resultado por elemento de un lote fallido) también lo incluye
+    if (success and result is not None) or (isinstance(result, dict) and result):
+        body["Data"] = result
+    return {"statusCode": status_code, "body": dumps(body)}
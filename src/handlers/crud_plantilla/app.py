@@ -1,278 +1,494 @@
 # CRUD PLANTILLA
 # Get one, Get All, Post, Put and Delete endpoints
 
+import base64
 import json
 import os
 import uuid
-from datetime import datetime
-from typing import Dict, Optional
 
-import pytz
 from bson import ObjectId
-from pydantic import BaseModel, Field
-from pymongo import MongoClient, ASCENDING, DESCENDING
-
-# Required environment variables
-PLANTILLAS_CRUD_HOST = os.environ.get('PLANTILLAS_CRUD_HOST')
-PLANTILLAS_CRUD_PORT = os.environ.get('PLANTILLAS_CRUD_PORT')
-PLANTILLAS_CRUD_USERNAME = os.environ.get('PLANTILLAS_CRUD_USERNAME')
-PLANTILLAS_CRUD_PASS = os.environ.get('PLANTILLAS_CRUD_PASS')
-PLANTILLAS_CRUD_DB = os.environ.get('PLANTILLAS_CRUD_DB')
-TIMEZONE = os.environ.get('TIMEZONE')
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+import core
+import logger
+from cache import invalidate
+from compression import compress_response
+from content_store import hydrate, loader, offload, read_projection, without_internal
+from core import format_response, parse_body, parse_list_params
+from metrics import instrument, phase, timed
+from query_compiler import compile_query
+from search import search
+from utils import as_stored, get_collection, get_header, handle_db_error, with_write_concern
+from versioning import allocate_versions, get_pointer, move_to_group, set_latest, sync_groups
+
 COLLECTION = "plantilla"
 
-ORDER_LABEL = {
-    "desc": DESCENDING,
-    "asc": ASCENDING
+# Optional environment variables
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 500))
+# Tiempo (ms) reservado antes del timeout de la Lambda para cortar una operación masiva
+BULK_RESERVED_TIME_MS = int(os.environ.get('BULK_RESERVED_TIME_MS', 5000))
+# Rechaza filtros que ningún índice declarado puede atender
+QUERY_STRICT = os.environ.get('QUERY_STRICT', 'false').lower() == 'true'
+
+# Perfiles de proyección de los listados (ver projections.py)
+PROJECTION_PROFILES = {
+    "summary": {"contenido": 0, "metadatos": 0},
+    "full": None,
+    "ids": {"_id": 1},
 }
 
+LATEST_RESOURCE = "/plantilla/grupo/{grupo_id}/latest"
+HISTORY_RESOURCE = "/plantilla/grupo/{grupo_id}"
+RENDER_RESOURCE = "/plantilla/{id}/render"
+BULK_RENDER_RESOURCE = "/plantilla/{id}/render/bulk"
+SEARCH_RESOURCE = "/plantilla/search"
+# Filtros de igualdad admitidos por la búsqueda de texto
+SEARCH_FILTERS = ("sistema_id", "tipo_plantilla_id", "activo")
 
-def local_now():
-    """Datetime por Timezone"""
-    return datetime.now(tz=pytz.timezone(TIMEZONE))
+# Campos de versión asignados por el servidor (ver versioning.py)
+VERSION_FIELDS = ("grupo_id", "version")
 
 
-class PlantillaModel(BaseModel):
-    """Modelo de datos de Plantilla"""   
-    tipo_plantilla_id: str
-    sistema_id: int
-    nombre: Optional[str] = None
-    codigo_abreviacion: Optional[str] = None
-    contenido: Optional[str] = None
-    grupo_id: Optional[str] = None
-    version: Optional[int] = 0
-    uid: Optional[str] = None
-    metadatos: Optional[Dict] = None
-    activo: bool = Field(default=True)
+def models():
+    """Modelos pydantic (crud_plantilla/models.py), importados en el primer uso"""
+    from crud_plantilla import models as plantilla_models
+    return plantilla_models
 
 
-class PlantillaCreationModel(PlantillaModel):
-    fecha_creacion: datetime = Field(default=local_now())
+# Deserialización de parámetros de entrada
+# parse_bulk_body -> body de POST /plantilla/bulk: arreglo JSON o NDJSON (un objeto por línea)
+@timed("parse")
+def parse_bulk_body(event) -> tuple:
+    """Retorna ([(data, error), ...], error). Una línea NDJSON inválida sólo falla ese elemento"""
+    try:
+        body = event["body"] or ""
+        if event.get("isBase64Encoded"):
+            body = base64.b64decode(body).decode()
+        if body.lstrip().startswith("["):
+            return [(data, None) for data in json.loads(body)], None
+        items = []
+        for line in body.splitlines():
+            if line.strip():
+                try:
+                    items.append((json.loads(line), None))
+                except Exception as ex:
+                    items.append((None, ex))
+        return items, None
+    except Exception as ex:
+        return None, ex
 
 
-class DeletePlantillaModel(BaseModel):
-    activo: Optional[bool] = Field(default=False)
+def get_query(query_str: str, strict: bool = QUERY_STRICT) -> dict:
+    """Filtro de Mongo a partir del parámetro query (sintaxis en query_compiler.py)"""
+    overrides = {"_id": ObjectId, "grupo_id": uuid.UUID}
+    return compile_query(query_str, models().PlantillaCreationModel, COLLECTION, overrides, strict)
 
 
-# Gestión de conexión con la BD
-def connect_db_client():
-    """Genera el cliente para establecer la conexión con la base de datos"""
-    try:
-        # With password
-        if PLANTILLAS_CRUD_USERNAME and PLANTILLAS_CRUD_PASS:
-            uri = f"mongodb://{PLANTILLAS_CRUD_USERNAME}:{PLANTILLAS_CRUD_PASS}@{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}/"
-        else:
-            # Without password
-            uri = f"mongodb://{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}/"
-        
-        client = MongoClient(uri, uuidRepresentation='standard')
-        print("Successful connection to the database")
-        return client
-    except Exception as ex:
-        print(f"Error connecting to the database: {ex}")
-        return None
+@timed("parse")
+def parse_query_params(event) -> tuple:
+    return parse_list_params(event, get_query, PROJECTION_PROFILES, QUERY_STRICT, countable=True)
 
 
-def close_connect_db(client):
-    try:
-        print("Closing client DB")
-        if client:
-            client.close()
-    except Exception as ex:
-        print(f"Error close Client DB. Detail: {ex}")
+def set_grupo_id(data):
+    """Usa el grupo_id recibido o genera uno nuevo (nueva plantilla)"""
+    if data.get("grupo_id"):
+        data["grupo_id"] = uuid.UUID(data.get("grupo_id"))
+    else:
+        data["grupo_id"] = uuid.uuid4()
+    return data
 
 
-# Deserialización de parámetros de entrada
-# parse_body -> body de las peticiones POST, PUT, DELETE
-def parse_body(event) -> tuple:
+def create(data, collection):
     try:
-        return json.loads(event["body"]), None
+        new_group = not data.get("grupo_id")
+        set_grupo_id(data)
+        data["version"] = allocate_versions(collection, data["grupo_id"], 1, new_group)
+        document = offload(data, collection)
+        result = with_write_concern(collection, "create").insert_one(document)
+        if result:
+            # insert_one agrega el _id al documento: la respuesta es el documento
+            # almacenado, como lo retorna get_one, sin releerlo
+            invalidate(COLLECTION, result.inserted_id)
+            set_latest(collection, document)
+            stored = as_stored({**document, "contenido": data.get("contenido")}, collection)
+            return format_response(hydrate([stored], collection)[0], "Registration successful", 201, True)
+        return format_response({}, "Registration unsuccessful", 400, False)
     except Exception as ex:
-        return None, ex
-
-
-def get_query(query_str: str) -> dict:
-    query_total = {}
-    int_fields = ['version', 'sistema_id']
-    for cond in query_str.split(","):
-        kv = cond.split(":", 1)
-        if len(kv) == 2:
-            k, v = kv
-            if v == 'false':
-                v = False
-            elif v == 'true':
-                v = True
-
-            if k in int_fields:
-                v = int(v)
-            elif k == 'grupo_id':
-                v = uuid.UUID(v)
-
-            if k == "_id":
-                v = ObjectId(v)
-        else:
-            k, v = kv[0], None
-        query_total[k] = v
-    return query_total
-
-
-def get_sort_by(query_params) -> list:
-    sort_by_total = []
-    if query_params.get("sortby"):
-        sort_by_list = str(query_params.get("sortby")).split(",")
-        if query_params.get("order"):
-            order_list = str(query_params.get("order")).split(",")
-            if len(order_list) == 1:
-                # Default ASCENDING
-                order_label = ORDER_LABEL.get(query_params.get("order"), ASCENDING)
-                sort_by_total = [(e, order_label) for e in sort_by_list]
-            elif len(order_list) == len(sort_by_list):
-                for i, e in enumerate(sort_by_list):
-                    order_label = ORDER_LABEL.get(order_list[i], ASCENDING)
-                    sort_by_total.append((e, order_label))
-            else:
-                # Default ASCENDING
-                sort_by_total = [(e, ASCENDING) for e in sort_by_list]
-    return sort_by_total
+        handle_db_error(ex)
+        return format_response({}, f"Error service Post: {ex}", 500, False)
 
 
-def parse_query_params(event) -> tuple:
+def bulk_create(items, collection):
+    """
+    Valida todos los elementos y registra los válidos con insert_many no ordenado,
+    en bloques de BULK_CHUNK_SIZE. Retorna el resultado por elemento.
+    """
     try:
-        query_params_result = {"limit": 10}
-        query_params = event["queryStringParameters"]
-        if isinstance(query_params, dict):
-            # query: k:v, k: v
-            if query_params.get("query"):
-                query_params_result["filter"] = get_query(str(query_params.get("query")))
-
-            # fields: col1, col2, entity.col3
-            if query_params.get("fields"):
-                query_params_result["projection"] = str(query_params.get("fields")).split(",")
-
-            # sortby: col1,col2
-            # order: desc,asc
-            if query_params.get("sortby"):
-                query_params_result["sort"] = get_sort_by(query_params)
-
-            # limit: 10 (default is 10)
-            if query_params.get("limit"):
-                query_params_result["limit"] = int(query_params.get("limit"))
-
-            # offset: 0 (default is 0)
-            if query_params.get("offset"):
-                query_params_result["skip"] = int(query_params.get("offset"))
-
-            return query_params_result, None
-        else:
-            return query_params_result, None
+        results = [None] * len(items)
+        valid = []
+        new_groups = set()
+        for i, (data, error) in enumerate(items):
+            if error is None:
+                try:
+                    # Validate structure
+                    with phase("validate"):
+                        document = models().PlantillaCreationModel(**data).__dict__
+                    new_group = not document.get("grupo_id")
+                    document = offload(set_grupo_id(document), collection)
+                    if new_group:
+                        new_groups.add(document["grupo_id"])
+                    valid.append((i, document))
+                    continue
+                except Exception as ex:
+                    error = ex
+            results[i] = {"index": i, "Success": False, "Message": f"Error in input data: {error}"}
+
+        # Un bloque de versiones por grupo, en el orden recibido
+        groups = {}
+        for _, document in valid:
+            groups.setdefault(document["grupo_id"], []).append(document)
+        for grupo_id, documents in groups.items():
+            first = allocate_versions(collection, grupo_id, len(documents), grupo_id in new_groups)
+            for offset, document in enumerate(documents):
+                document["version"] = first + offset
+
+        latest = {}
+        for start in range(0, len(valid), BULK_CHUNK_SIZE):
+            chunk = valid[start:start + BULK_CHUNK_SIZE]
+            write_errors = {}
+            try:
+                with_write_concern(collection, "bulk").insert_many(
+                    [document for _, document in chunk], ordered=False)
+            except BulkWriteError as ex:
+                write_errors = {e["index"]: e.get("errmsg") for e in ex.details.get("writeErrors", [])}
+            for j, (i, document) in enumerate(chunk):
+                if j in write_errors:
+                    results[i] = {"index": i, "Success": False, "Message": write_errors[j]}
+                else:
+                    results[i] = {"index": i, "Success": True, "_id": str(document["_id"]),
+                                  "grupo_id": str(document["grupo_id"]), "version": document["version"]}
+                    latest[document["grupo_id"]] = document
+
+        for document in latest.values():
+            set_latest(collection, document)
+
+        inserted = sum(1 for result in results if result["Success"])
+        summary = {"inserted": inserted, "failed": len(results) - inserted, "results": results}
+        if inserted == len(results) and inserted:
+            return format_response(summary, "Registration successful", 201, True)
+        if inserted:
+            return format_response(summary, "Registration partially successful", 207, True)
+        return format_response(summary, "Registration unsuccessful", 400, False)
     except Exception as ex:
-        print(f"Error in parse_query_params. Detail: {ex}")
-        return {}, ex
-
-
-# Formato de respuestas
-def format_specific_values(result):
-    if result.get("_id"):
-        result["_id"] = str(result["_id"])
-    if result.get("fecha_creacion"):
-        result["fecha_creacion"] = str(result["fecha_creacion"])
-    if result.get("grupo_id"):
-        result["grupo_id"] = str(result["grupo_id"])
+        handle_db_error(ex)
+        return format_response({}, f"Error service BulkPost: {ex}", 500, False)
+
+
+@timed("validate")
+def validate_partial(data: dict, allowed: tuple = ()) -> dict:
+    """
+    Valida un $set parcial contra los campos de PlantillaModel.
+    Los campos de versión se rechazan salvo los indicados en allowed (grupo_id en bulk).
+    """
+    plantilla_models = models()
+    result = {}
+    for k, v in data.items():
+        if k not in plantilla_models.PlantillaModel.model_fields:
+            raise ValueError(f"Unknown field {k}")
+        if k in VERSION_FIELDS and k not in allowed:
+            raise ValueError(f"Field {k} is assigned by the server")
+        result[k] = plantilla_models.validate_field(plantilla_models.PlantillaModel, k, v)
+    if result.get("grupo_id") is not None:
+        result["grupo_id"] = uuid.UUID(result["grupo_id"])
+    elif "grupo_id" in result:
+        raise ValueError("Field grupo_id cannot be null")
     return result
 
 
-def format_response(result, message: str, status_code: int, success: bool) -> dict:
-    """Formats the HTTP response."""
-    body = {
-        "Success": success,
-        "Status": status_code,
-        "Message": message
-    }
-    if success and result is not None:
-        if isinstance(result, dict):
-            body["Data"] = format_specific_values(result)
-        elif isinstance(result, list):
-            body["Data"] = [format_specific_values(item) for item in result]
-        else:
-            body["Data"] = result
-    return {"statusCode": status_code, "body": json.dumps(body)}
+def out_of_time(context) -> bool:
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return False
+    return context.get_remaining_time_in_millis() < BULK_RESERVED_TIME_MS
 
 
-def create(data, collection):
+def bulk_update(request, data, collection, context=None):
+    """
+    Aplica $set sobre los documentos seleccionados por ids o query, en bloques de
+    BULK_CHUNK_SIZE recorridos por _id. Si el tiempo de la Lambda se agota retorna
+    un cursor para reanudar la operación enviándolo en la siguiente petición.
+    Con grupo_id en data las plantillas se mueven a ese grupo (versioning.move_to_group).
+    Un campo o filtro inválido retorna 400 con el detalle.
+    """
     try:
-        if data.get("grupo_id"):
-            data["grupo_id"] = uuid.UUID(data.get("grupo_id"))
+        if bool(request.ids) == bool(request.query):
+            return format_response({}, "Bulk request requires either ids or query", 400, False)
+        if not data:
+            return format_response({}, "Bulk request without data to update", 400, False)
+        data = validate_partial(data, allowed=("grupo_id",))
+
+        if request.ids:
+            filter_ = {"_id": {"$in": [ObjectId(_id) for _id in request.ids]}}
         else:
-            data["grupo_id"] = uuid.uuid4()
-        result = collection.insert_one(data)
-        if result:
-            new_data_id = result.inserted_id
-            new_data = collection.find_one(new_data_id)
-            return format_response(new_data, "Registration successful", 201, True)
-        return format_response({}, "Registration unsuccessful", 400, False)
+            filter_ = get_query(request.query)
+
+        if request.dry_run:
+            return format_response({"matched": collection.count_documents(filter_)}, "Dry run successful", 200, True)
+
+        data = offload(data, collection)
+
+        last_id = ObjectId(request.cursor) if request.cursor else None
+        matched, modified, cursor = 0, 0, None
+        while True:
+            page_filter = {"$and": [filter_, {"_id": {"$gt": last_id}}]} if last_id else filter_
+            documents = list(collection.find(page_filter, {"_id": 1, "grupo_id": 1},
+                                             sort=[("_id", ASCENDING)], limit=BULK_CHUNK_SIZE))
+            ids = [d["_id"] for d in documents]
+            if not ids:
+                break
+            # Se repite el filtro para no modificar documentos que dejaron de coincidir
+            if "grupo_id" in data:
+                result = move_to_group(collection, documents, data["grupo_id"], filter_, data,
+                                       with_write_concern(collection, "bulk"))
+            else:
+                result = with_write_concern(collection, "bulk").update_many(
+                    {"$and": [filter_, {"_id": {"$in": ids}}]}, {"$set": data})
+            for _id in ids:
+                invalidate(COLLECTION, _id)
+            if "activo" in data and "grupo_id" not in data:
+                sync_groups(collection, documents, data["activo"])
+            matched += result.matched_count
+            modified += result.modified_count
+            last_id = ids[-1]
+            if len(ids) < BULK_CHUNK_SIZE:
+                break
+            if out_of_time(context):
+                cursor = str(last_id)
+                break
+
+        summary = {"matched": matched, "modified": modified, "cursor": cursor}
+        if cursor:
+            return format_response(summary, "Bulk operation incomplete, resume with cursor", 200, True)
+        return format_response(summary, "Bulk operation successful", 200, True)
+    except ValueError as ex:
+        # Incluye pydantic.ValidationError
+        return format_response({}, f"Error service Bulk: {ex}", 400, False)
     except Exception as ex:
-        return format_response({}, f"Error service Post: {ex}", 500, False)
+        handle_db_error(ex)
+        return format_response({}, f"Error service Bulk: {ex}", 500, False)
 
 
 def update(_id, data, collection):
     try:
         filter_ = {"_id": ObjectId(_id)}
-        result = collection.update_one(filter_, {"$set": data})
-        if result.modified_count:
-            updated_data = collection.find_one(filter_)
+        # grupo_id y version los asigna el servidor al crear
+        data = {k: v for k, v in data.items() if k not in VERSION_FIELDS}
+        updated_data = with_write_concern(collection, "update").find_one_and_update(
+            filter_, {"$set": offload(data, collection)}, return_document=ReturnDocument.AFTER)
+        invalidate(COLLECTION, filter_["_id"])
+        if updated_data:
+            if "activo" in data:
+                sync_groups(collection, [updated_data], data["activo"])
+            hydrate([updated_data], collection)
             return format_response(updated_data, "Update successful", 200, True)
         return format_response({}, "Update unsuccessful", 400, False)
     except Exception as ex:
+        handle_db_error(ex)
         return format_response({}, f"Error service Put: {ex}", 500, False)
 
 
 def delete(_id, data, collection):
     try:
         filter_ = {"_id": ObjectId(_id)}
-        result = collection.update_one(filter_,{"$set": data})
-        if result.modified_count:
-            updated_data = collection.find_one(filter_)
-            return format_response(updated_data, "Delete successful", 200, True)
+        # Sólo documentos aún activos, como cuando se validaba modified_count
+        updated_data = with_write_concern(collection, "delete").find_one_and_update(
+            {**filter_, "activo": {"$ne": data["activo"]}}, {"$set": data},
+            return_document=ReturnDocument.AFTER)
+        invalidate(COLLECTION, filter_["_id"])
+        if updated_data:
+            sync_groups(collection, [updated_data], data["activo"])
+            return format_response(without_internal(updated_data), "Delete successful", 200, True)
         return format_response(None, "Delete unsuccessful", 400, False)
     except Exception as ex:
+        handle_db_error(ex)
         return format_response({}, f"Error service Delete: {ex}", 500, False)
 
 
-def get_all(query, collection):
+def get_all(query, collection, if_none_match=None):
+    # El contenido externo se lee de S3 sólo si la proyección lo pide (ver content_store.py)
+    return core.get_all(query, collection, if_none_match, read_projection=read_projection, loader=loader)
+
+
+def get_one(_id, collection, if_none_match=None):
+    return core.get_one(_id, collection, if_none_match, prepare=lambda data: hydrate([data], collection)[0])
+
+
+def render(_id, request, collection):
+    # Jinja2 se carga sólo al renderizar
+    from jinja2 import TemplateError
+    from rendering import TemplateNotFound, render_plantilla
     try:
-        data = list(collection.find(**query))
-        if data:
-            return format_response(data, "Request successful", 200, True)
-        return format_response([], "Request successful", 200, True)
+        result = render_plantilla(_id, request.datos, collection)
+        return format_response(result, "Render successful", 200, True)
+    except TemplateNotFound as ex:
+        return format_response({}, f"Render unsuccessful: {ex}", 404, False)
+    except TemplateError as ex:
+        return format_response({}, f"Error in template: {ex}", 400, False)
     except Exception as ex:
-        return format_response({}, f"Error service GetAll: {ex}", 500, False)
+        handle_db_error(ex)
+        return format_response({}, f"Error service Render: {ex}", 500, False)
 
 
-def get_one(_id, collection):
+def bulk_render(_id, rows, collection):
+    """Renderiza la plantilla con cada fila; respuesta NDJSON en el orden recibido"""
+    from jinja2 import TemplateError
+    from rendering import TemplateNotFound, render_many
     try:
-        data = collection.find_one({"_id": ObjectId(_id)})
-        if data:
-            return format_response(data, "Request successful", 200, True)
-        return format_response({}, "Request unsuccessful", 404, False)
+        return render_many(_id, rows, collection)
+    except TemplateNotFound as ex:
+        return format_response({}, f"Render unsuccessful: {ex}", 404, False)
+    except TemplateError as ex:
+        return format_response({}, f"Error in template: {ex}", 400, False)
     except Exception as ex:
-        return format_response({}, f"Error service GetOne: {ex}", 500, False)
+        handle_db_error(ex)
+        return format_response({}, f"Error service BulkRender: {ex}", 500, False)
 
 
-def lambda_handler(event, context):
-    client = None
+def search_plantillas(event, collection):
+    """GET /plantilla/search?q=...&sistema_id=&tipo_plantilla_id=&activo=&limit=&offset="""
+    try:
+        query_params = event.get("queryStringParameters") or {}
+        q = str(query_params.get("q") or "").strip()
+        if not q:
+            return format_response({}, "Search requires the q parameter", 400, False)
+        plantilla_models = models()
+        filters = {}
+        for field in SEARCH_FILTERS:
+            if query_params.get(field) is not None:
+                filters[field] = plantilla_models.validate_field(
+                    plantilla_models.PlantillaModel, field, query_params[field])
+        limit = int(query_params.get("limit", 0)) or None
+        skip = int(query_params.get("offset", 0))
+    except Exception as ex:
+        logger.warning("Error in search parameters", error=ex)
+        return format_response(
+            {}, "Error service Search: The request contains an incorrect parameter", 404, True)
+    try:
+        return format_response(search(q, filters, collection, limit, skip), "Request successful", 200, True)
+    except Exception as ex:
+        handle_db_error(ex)
+        return format_response({}, f"Error service Search: {ex}", 500, False)
+
+
+def get_latest(grupo_id, collection, if_none_match=None):
+    """Versión activa más reciente del grupo: puntero por _id y lectura de get_one (con caché)"""
+    try:
+        pointer = get_pointer(collection, uuid.UUID(grupo_id))
+        if not pointer or pointer.get("plantilla_id") is None:
+            return format_response({}, "Request unsuccessful", 404, False)
+        return get_one(str(pointer["plantilla_id"]), collection, if_none_match)
+    except Exception as ex:
+        handle_db_error(ex)
+        return format_response({}, f"Error service GetLatest: {ex}", 500, False)
+
+
+def get_history(grupo_id, event, collection):
+    """Versiones del grupo (por defecto de la más reciente a la más antigua) con los parámetros de get_all"""
+    query_params = dict(event.get("queryStringParameters") or {})
+    if not query_params.get("sortby"):
+        query_params.update(sortby="version", order="desc")
+    query, err = parse_query_params({**event, "queryStringParameters": query_params})
+    if err is not None:
+        return format_response(
+            {}, "Error service GetHistory: The request contains an incorrect parameter", 404, True)
+    group_filter = {"grupo_id": uuid.UUID(grupo_id)}
+    query["filter"] = {"$and": [query["filter"], group_filter]} if query.get("filter") else group_filter
+    # El total (count=true) también se limita al grupo
+    if "count_filter" in query:
+        query["count_filter"] = (
+            {"$and": [query["count_filter"], group_filter]} if query["count_filter"] else group_filter)
+    return get_all(query, collection, get_header(event, "If-None-Match"))
+
+
+def handle(event, context):
+    """Atiende la petición; router.py la llama directamente con su propia instrumentación"""
     try:
         http_method = event['httpMethod']
 
-        if http_method == 'POST':
+        if http_method == 'POST' and event.get("resource") == "/plantilla/bulk":
+            items, error = parse_bulk_body(event)
+            if error is None:
+                plantilla_collection = get_collection(COLLECTION)
+                if plantilla_collection is not None:
+                    return bulk_create(items, plantilla_collection)
+                return format_response({}, "Error registering plantillas!", 500, False)
+            else:
+                return format_response({}, "Error registering plantillas! Detail: Error in input data", 500, False)
+
+        elif http_method in ('PUT', 'DELETE') and event.get("resource") == "/plantilla/bulk":
             data, error = parse_body(event)
             if error is None:
                 # Validate structure
-                plantilla_data = PlantillaCreationModel(**data).__dict__
-                client = connect_db_client()
-                if client:
-                    plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
+                with phase("validate"):
+                    bulk_request = models().BulkRequestModel(**data)
+                if http_method == 'PUT':
+                    plantilla_data = bulk_request.data or {}
+                else:
+                    plantilla_data = models().DeletePlantillaModel().__dict__
+                plantilla_collection = get_collection(COLLECTION)
+                if plantilla_collection is not None:
+                    return bulk_update(bulk_request, plantilla_data, plantilla_collection, context)
+                return format_response({}, "Error in bulk plantilla request!", 500, False)
+            else:
+                return format_response({}, "Error in bulk plantilla request! Detail: Error in input data", 500, False)
+
+        elif http_method == 'GET' and event.get("resource") == SEARCH_RESOURCE:
+            plantilla_collection = get_collection(COLLECTION)
+            if plantilla_collection is not None:
+                return compress_response(search_plantillas(event, plantilla_collection), event)
+            return format_response({}, "Error searching plantillas!", 500, False)
+
+        elif http_method == 'GET' and event.get("resource") in (LATEST_RESOURCE, HISTORY_RESOURCE):
+            plantilla_collection = get_collection(COLLECTION)
+            if plantilla_collection is not None:
+                grupo_id = event["pathParameters"]["grupo_id"]
+                if event["resource"] == LATEST_RESOURCE:
+                    return get_latest(grupo_id, plantilla_collection, get_header(event, "If-None-Match"))
+                return compress_response(get_history(grupo_id, event, plantilla_collection), event)
+            return format_response({}, "Error getting plantilla versions!", 500, False)
+
+        elif http_method == 'POST' and event.get("resource") == BULK_RENDER_RESOURCE:
+            rows, error = parse_bulk_body(event)
+            if error is None:
+                plantilla_collection = get_collection(COLLECTION)
+                if plantilla_collection is not None:
+                    return compress_response(bulk_render(event["pathParameters"]["id"], rows, plantilla_collection), event)
+                return format_response({}, "Error rendering plantilla!", 500, False)
+            else:
+                return format_response({}, "Error rendering plantilla! Detail: Error in input data", 500, False)
+
+        elif http_method == 'POST' and event.get("resource") == RENDER_RESOURCE:
+            data, error = parse_body(event)
+            if error is None:
+                # Validate structure
+                with phase("validate"):
+                    render_request = models().RenderRequestModel(**(data or {}))
+                plantilla_collection = get_collection(COLLECTION)
+                if plantilla_collection is not None:
+                    return render(event["pathParameters"]["id"], render_request, plantilla_collection)
+                return format_response({}, "Error rendering plantilla!", 500, False)
+            else:
+                return format_response({}, "Error rendering plantilla! Detail: Error in input data", 500, False)
+
+        elif http_method == 'POST':
+            data, error = parse_body(event)
+            if error is None:
+                # Validate structure
+                with phase("validate"):
+                    plantilla_data = models().PlantillaCreationModel(**data).__dict__
+                plantilla_collection = get_collection(COLLECTION)
+                if plantilla_collection is not None:
                     response = create(plantilla_data, plantilla_collection)
-                    close_connect_db(client)
                     return response
                 return format_response({}, "Error registering new plantilla!", 500, False)
             else:
@@ -283,12 +499,11 @@ def lambda_handler(event, context):
             if error is None:
                 # Validate structure
                 plantilla_id = event["pathParameters"]["id"]
-                plantilla_data = PlantillaModel(**data).__dict__
-                client = connect_db_client()
-                if client:
-                    plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
+                with phase("validate"):
+                    plantilla_data = models().PlantillaModel(**data).__dict__
+                plantilla_collection = get_collection(COLLECTION)
+                if plantilla_collection is not None:
                     response = update(plantilla_id, plantilla_data, plantilla_collection)
-                    close_connect_db(client)
                     return response
                 return format_response({}, "Error updating plantilla!", 500, False)
             else:
@@ -296,30 +511,25 @@ def lambda_handler(event, context):
             
         elif http_method == 'DELETE':
             plantilla_id = event["pathParameters"]["id"]
-            plantilla_data = DeletePlantillaModel().__dict__
-            client = connect_db_client()
-            if client:
-                plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
+            plantilla_data = models().DeletePlantillaModel().__dict__
+            plantilla_collection = get_collection(COLLECTION)
+            if plantilla_collection is not None:
                 response = delete(plantilla_id, plantilla_data, plantilla_collection)
-                close_connect_db(client)
                 return response
             return format_response(None, "Error deleting plantilla!", 500, False)
         
         elif http_method == 'GET':
-            client = connect_db_client()
-            if client:
-                plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
+            plantilla_collection = get_collection(COLLECTION)
+            if plantilla_collection is not None:
                 if 'pathParameters' in event and event['pathParameters'] is not None:
                     _id = event["pathParameters"]["id"]
-                    response = get_one(_id, plantilla_collection)
-                    close_connect_db(client)
+                    response = get_one(_id, plantilla_collection, get_header(event, "If-None-Match"))
                     return response
                 else:
                     query_complement, err = parse_query_params(event)
                     if err is None:
-                        response = get_all(query_complement, plantilla_collection)
-                        close_connect_db(client)
-                        return response
+                        response = get_all(query_complement, plantilla_collection, get_header(event, "If-None-Match"))
+                        return compress_response(response, event)
                     else:
                         return format_response(
                             {},
@@ -329,8 +539,13 @@ def lambda_handler(event, context):
             return format_response({}, "Error getting plantilla!", 500, False)
         
         else:
-            close_connect_db(client)
             return format_response({}, f"HTTP method not allowed", 500, False)
     except Exception as ex:
-        close_connect_db(client)
+        handle_db_error(ex)
         return format_response({}, f"Error in plantilla request! Detail: {ex}", 500, False)
+
+
+@logger.log_invocation
+@instrument
+def lambda_handler(event, context):
+    return handle(event, context)
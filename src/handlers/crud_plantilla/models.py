@@ -0,0 +1,68 @@
+# Modelos de datos de Plantilla
+# Se importan de forma diferida desde app.py (models()), por lo que pydantic sólo se
+# carga en los caminos que validan datos. defer_build pospone la construcción del
+# esquema de cada modelo hasta su primera validación.
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+from utils import local_now
+
+
+class PlantillaModel(BaseModel):
+    """Modelo de datos de Plantilla"""
+    model_config = ConfigDict(defer_build=True)
+
+    tipo_plantilla_id: str
+    sistema_id: int
+    nombre: Optional[str] = None
+    codigo_abreviacion: Optional[str] = None
+    contenido: Optional[str] = None
+    grupo_id: Optional[str] = None
+    version: Optional[int] = 0
+    uid: Optional[str] = None
+    metadatos: Optional[Dict] = None
+    activo: bool = Field(default=True)
+
+
+class PlantillaCreationModel(PlantillaModel):
+    # Se calcula en cada validación, no al importar el módulo
+    fecha_creacion: datetime = Field(default_factory=local_now)
+
+
+class DeletePlantillaModel(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+    activo: Optional[bool] = Field(default=False)
+
+
+class RenderRequestModel(BaseModel):
+    """POST /plantilla/{id}/render: datos disponibles en la plantilla"""
+    model_config = ConfigDict(defer_build=True)
+
+    datos: Dict = Field(default_factory=dict)
+
+
+class BulkRequestModel(BaseModel):
+    """PUT/DELETE /plantilla/bulk: ids o query (sintaxis de get_query)"""
+    model_config = ConfigDict(defer_build=True)
+
+    ids: Optional[List[str]] = None
+    query: Optional[str] = None
+    data: Optional[Dict] = None
+    dry_run: bool = False
+    cursor: Optional[str] = None
+
+
+@lru_cache(maxsize=None)
+def field_adapter(model, field: str) -> TypeAdapter:
+    """TypeAdapter del campo, construido una sola vez por contenedor"""
+    return TypeAdapter(model.model_fields[field].annotation)
+
+
+def validate_field(model, field: str, value):
+    """Valida y convierte value según el tipo del campo en el modelo"""
+    return field_adapter(model, field).validate_python(value)
@@ -0,0 +1,15 @@
+# Modelos de datos de TipoPlantilla
+# Se importan de forma diferida desde app.py (models()), por lo que pydantic sólo se
+# carga en los caminos que validan datos. defer_build pospone la construcción del
+# esquema hasta la primera validación.
+
+from pydantic import BaseModel, ConfigDict
+
+
+class TipoPlantillaModel(BaseModel):
+    """Modelo de datos de TipoPlantilla"""
+    model_config = ConfigDict(defer_build=True)
+
+    nombre: str
+    descripcion: str
+    codigo_abreviacion: str
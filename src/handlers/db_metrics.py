@@ -0,0 +1,67 @@
+# Listeners de pymongo para metrics.py
+# Registran el tiempo de los comandos de Mongo (fase db, db_ops) y la espera por una
+# conexión del pool (fase connect) en la invocación muestreada en curso. Se importan al
+# crear el cliente (metrics.event_listeners), para que metrics.py no cargue pymongo.
+
+import time
+
+from pymongo import monitoring
+
+from metrics import add_time, current
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Tiempo de cada comando de Mongo (fase db)"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics = current()
+        if metrics is not None:
+            add_time("db", event.duration_micros / 1000)
+            metrics["values"]["db_ops"] = metrics["values"].get("db_ops", 0) + 1
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+class PoolTimer(monitoring.ConnectionPoolListener):
+    """Espera por una conexión del pool, incluida su creación (fase connect)"""
+
+    def connection_check_out_started(self, event):
+        metrics = current()
+        if metrics is not None:
+            metrics["checkout_start"] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        metrics = current()
+        if metrics is not None and metrics.get("checkout_start") is not None:
+            add_time("connect", (time.perf_counter() - metrics.pop("checkout_start")) * 1000)
+
+    def connection_check_out_failed(self, event):
+        self.connection_checked_out(event)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
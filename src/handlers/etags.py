@@ -0,0 +1,42 @@
+# ETag y GET condicional (If-None-Match -> 304)
+# Documento: identidad (_id) + version + hash del contenido BSON. El hash evita
+# servir un 304 incorrecto cuando un PUT modifica el documento sin cambiar version,
+# y se calcula sin serializar a JSON.
+# Listas: hash del body ya construido.
+
+import hashlib
+
+import bson
+from bson.binary import UuidRepresentation
+from bson.codec_options import CodecOptions
+
+ETAG_CODEC_OPTIONS = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
+
+
+def document_etag(document: dict) -> str:
+    digest = hashlib.blake2b(bson.encode(document, codec_options=ETAG_CODEC_OPTIONS), digest_size=8).hexdigest()
+    return f'"{document.get("_id")}-{document.get("version", 0)}-{digest}"'
+
+
+def body_etag(body: str) -> str:
+    return f'"{hashlib.blake2b(body.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil (RFC 9110) entre If-None-Match y el ETag actual"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> dict:
+    return {"statusCode": 304, "headers": {"ETag": etag}, "body": ""}
@@ -1,7 +1,12 @@
 # Health Check to API Gateway and lambda
 import json
 
-def lambda_handler(event, context):
+import logger
+from metrics import instrument
+
+
+def handle(event, context):
+    """Atiende la petición; router.py la llama directamente con su propia instrumentación"""
     return {
         "statusCode": 200,
         "body": json.dumps({
@@ -10,3 +15,9 @@ def lambda_handler(event, context):
             "Message": "API CRUD Plantillas v2"
         })
     }
+
+
+@logger.log_invocation
+@instrument
+def lambda_handler(event, context):
+    return handle(event, context)
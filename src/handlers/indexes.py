@@ -0,0 +1,162 @@
+# Registro declarativo de índices
+# Declara los índices requeridos por los filtros (get_query) y ordenamientos
+# (sortby) de cada colección. Se sincroniza de forma idempotente:
+#   - en despliegue:  python indexes.py sync  [--drop-conflicting] [--prune]
+#   - en el primer arranque del contenedor con INDEXES_SYNC_ON_START=true
+# y se verifica contra la base de datos con:  python indexes.py verify
+
+import argparse
+import json
+import sys
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+import logger
+
+# Opciones que se comparan al verificar diferencias (drift)
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds",
+                    "weights", "default_language")
+
+ACTIVE_ONLY = {"activo": True}
+TEXT_WEIGHTS = {"nombre": 10, "codigo_abreviacion": 8, "contenido": 1}
+
+INDEXES = {
+    "plantilla": [
+        # Versiones de un grupo (última versión: grupo_id + version desc)
+        {"name": "grupo_id_version", "keys": [("grupo_id", ASCENDING), ("version", DESCENDING)]},
+        {"name": "sistema_id_tipo_plantilla_id_version",
+         "keys": [("sistema_id", ASCENDING), ("tipo_plantilla_id", ASCENDING), ("version", DESCENDING)]},
+        {"name": "tipo_plantilla_id_version", "keys": [("tipo_plantilla_id", ASCENDING), ("version", DESCENDING)]},
+        {"name": "codigo_abreviacion_version", "keys": [("codigo_abreviacion", ASCENDING), ("version", DESCENDING)]},
+        # Ordenamientos frecuentes, con _id como desempate para la paginación por cursor
+        {"name": "fecha_creacion_id", "keys": [("fecha_creacion", DESCENDING), ("_id", DESCENDING)]},
+        {"name": "nombre_id", "keys": [("nombre", ASCENDING), ("_id", ASCENDING)]},
+        # Consultas sobre plantillas activas (activo:true)
+        {"name": "activo_sistema_id_id", "keys": [("sistema_id", ASCENDING), ("_id", ASCENDING)],
+         "options": {"partialFilterExpression": ACTIVE_ONLY}},
+        {"name": "activo_tipo_plantilla_id_id", "keys": [("tipo_plantilla_id", ASCENDING), ("_id", ASCENDING)],
+         "options": {"partialFilterExpression": ACTIVE_ONLY}},
+        # Búsqueda de texto (search.py): todos los campos de texto, con más peso en nombre y código
+        # (incluye contenido_texto, el texto de los contenidos externalizados)
+        {"name": "texto", "keys": [("$**", "text")],
+         "options": {"weights": TEXT_WEIGHTS, "default_language": "spanish"}},
+    ],
+    "tipo_plantilla": [
+        {"name": "codigo_abreviacion", "keys": [("codigo_abreviacion", ASCENDING)]},
+        {"name": "nombre_id", "keys": [("nombre", ASCENDING), ("_id", ASCENDING)]},
+    ],
+}
+
+# Colecciones ya sincronizadas en este contenedor
+_synced = set()
+
+
+def _normalize_keys(keys) -> list:
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in keys]
+
+
+def _normalize(spec: dict) -> dict:
+    options = spec.get("options", spec)
+    keys = _normalize_keys(spec.get("keys", spec.get("key", [])))
+    compared = {k: options[k] for k in COMPARED_OPTIONS if k in options}
+    text_fields = [field for field, direction in keys if direction == "text"]
+    if text_fields and "_fts" not in text_fields:
+        # El servidor guarda los campos de texto como _fts/_ftsx y pondera con 1 los que no tienen peso
+        first = next(i for i, (_, direction) in enumerate(keys) if direction == "text")
+        rest = [(field, direction) for field, direction in keys if direction != "text"]
+        keys = rest[:first] + [("_fts", "text"), ("_ftsx", 1)] + rest[first:]
+        compared["weights"] = {**{field: 1 for field in text_fields}, **compared.get("weights", {})}
+    return {"keys": keys, "options": compared}
+
+
+def verify_collection(collection) -> dict:
+    """Compara los índices declarados con los existentes. Retorna missing, different y extra"""
+    declared = {spec["name"]: _normalize(spec) for spec in INDEXES.get(collection.name, [])}
+    existing = {name: _normalize(info) for name, info in collection.index_information().items()
+                if name != "_id_"}
+    return {
+        "missing": sorted(name for name in declared if name not in existing),
+        "different": sorted(name for name in declared
+                            if name in existing and existing[name] != declared[name]),
+        "extra": sorted(name for name in existing if name not in declared),
+    }
+
+
+def sync_collection(collection, drop_conflicting: bool = False, prune: bool = False) -> dict:
+    """
+    Crea los índices faltantes. Es idempotente: los índices idénticos no se modifican.
+    drop_conflicting: recrea los índices declarados cuya definición cambió.
+    prune: elimina los índices existentes que no están declarados.
+    """
+    report = verify_collection(collection)
+    specs = {spec["name"]: spec for spec in INDEXES.get(collection.name, [])}
+
+    if drop_conflicting:
+        for name in report["different"]:
+            collection.drop_index(name)
+    elif report["different"]:
+        logger.warning("Index drift, use --drop-conflicting", collection=collection.name,
+                       indexes=report["different"])
+
+    to_create = report["missing"] + (report["different"] if drop_conflicting else [])
+    if to_create:
+        collection.create_indexes([
+            IndexModel(specs[name]["keys"], name=name, **specs[name].get("options", {}))
+            for name in to_create
+        ])
+
+    if prune:
+        for name in report["extra"]:
+            collection.drop_index(name)
+
+    report["created"] = sorted(to_create)
+    report["dropped"] = sorted(report["extra"]) if prune else []
+    return report
+
+
+def ensure_indexes(collection):
+    """Sincroniza la colección una sola vez por contenedor (arranque en frío)"""
+    if collection.name in _synced:
+        return
+    try:
+        report = sync_collection(collection)
+        if report["created"]:
+            logger.info("Indexes created", collection=collection.name, indexes=report["created"])
+    except OperationFailure as ex:
+        logger.error("Error syncing indexes", collection=collection.name, error=ex)
+    _synced.add(collection.name)
+
+
+def main(argv=None) -> int:
+    from utils import get_collection
+
+    parser = argparse.ArgumentParser(description="Sincroniza o verifica los índices declarados")
+    parser.add_argument("command", choices=["sync", "verify"])
+    parser.add_argument("--collection", action="append", choices=sorted(INDEXES),
+                        help="Colección a procesar (por defecto todas)")
+    parser.add_argument("--drop-conflicting", action="store_true",
+                        help="sync: recrea índices declarados cuya definición cambió")
+    parser.add_argument("--prune", action="store_true",
+                        help="sync: elimina índices no declarados")
+    args = parser.parse_args(argv)
+
+    drift = False
+    result = {}
+    for name in args.collection or sorted(INDEXES):
+        collection = get_collection(name)
+        if collection is None:
+            logger.error("Error connecting to the database", collection=name)
+            return 2
+        if args.command == "sync":
+            result[name] = sync_collection(collection, args.drop_conflicting, args.prune)
+        else:
+            result[name] = verify_collection(collection)
+            drift = drift or bool(result[name]["missing"] or result[name]["different"])
+    sys.stdout.write(json.dumps(result, indent=2) + "\n")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# Logging estructurado por invocación
+# Cada entrada es una línea JSON con level, time, message, request_id, correlation_id,
+# function y los campos dados:
+#   logger.info("Response truncated", documents=count, bytes=size)
+# Durante una invocación (log_invocation) las entradas se acumulan y se escriben en
+# stdout con una sola escritura al terminar. Una entrada ERROR, o LOG_BUFFER_MAX_ENTRIES
+# acumuladas, vacían el buffer antes, para no perderlas si la invocación excede el
+# timeout. Fuera de una invocación (arranque, scripts) se escriben de inmediato.
+#
+# correlation_id es el header X-Correlation-Id de la petición, o el requestId de API
+# Gateway, o el aws_request_id de la Lambda; se retorna en el header X-Correlation-Id.
+# Los valores de los campos se recortan a LOG_FIELD_MAX_CHARS y las listas o dicts con
+# más de LOG_FIELD_MAX_ITEMS elementos (o anidados a más de dos niveles) se resumen,
+# por lo que nunca se escriben documentos completos.
+# Las entradas DEBUG se escriben con LOG_LEVEL=DEBUG, o en una fracción
+# LOG_DEBUG_SAMPLE_RATE de las invocaciones (todas las de esa invocación). El nivel se
+# verifica antes de construir la entrada.
+
+import functools
+import os
+import random
+import sys
+import time
+from contextvars import ContextVar
+
+# Optional environment variables
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0))
+LOG_FIELD_MAX_CHARS = int(os.environ.get('LOG_FIELD_MAX_CHARS', 256))
+LOG_FIELD_MAX_ITEMS = int(os.environ.get('LOG_FIELD_MAX_ITEMS', 20))
+LOG_BUFFER_MAX_ENTRIES = int(os.environ.get('LOG_BUFFER_MAX_ENTRIES', 50))
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+DEBUG, INFO, WARNING, ERROR = LEVELS["DEBUG"], LEVELS["INFO"], LEVELS["WARNING"], LEVELS["ERROR"]
+CORRELATION_HEADER = "X-Correlation-Id"
+MAX_DEPTH = 2
+
+_level = LEVELS.get(LOG_LEVEL, INFO)
+# Estado de la invocación en curso: ids, DEBUG muestreado y buffer
+_current = ContextVar("log_invocation", default=None)
+
+
+def _cap(text: str) -> str:
+    if len(text) <= LOG_FIELD_MAX_CHARS:
+        return text
+    return f"{text[:LOG_FIELD_MAX_CHARS]}…(+{len(text) - LOG_FIELD_MAX_CHARS} chars)"
+
+
+def render_field(value, depth: int = 0):
+    """Valor JSON de un campo con el tamaño acotado"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return _cap(value)
+    if isinstance(value, dict):
+        if depth >= MAX_DEPTH or len(value) > LOG_FIELD_MAX_ITEMS:
+            return f"<dict with {len(value)} keys>"
+        return {str(k): render_field(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        if depth >= MAX_DEPTH or len(value) > LOG_FIELD_MAX_ITEMS:
+            return f"<{type(value).__name__} with {len(value)} items>"
+        return [render_field(v, depth + 1) for v in value]
+    if isinstance(value, BaseException):
+        return _cap(f"{type(value).__name__}: {value}")
+    # ObjectId, UUID, datetime y demás
+    return _cap(str(value))
+
+
+def enabled(level: int) -> bool:
+    """True si una entrada del nivel dado se escribiría en la invocación en curso"""
+    if level >= _level:
+        return True
+    state = _current.get()
+    return level == DEBUG and state is not None and state["debug"]
+
+
+def _write(line: str, state, urgent: bool = False):
+    if state is None:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+        return
+    state["buffer"].append(line)
+    if urgent or len(state["buffer"]) >= LOG_BUFFER_MAX_ENTRIES:
+        flush(state)
+
+
+def _log(level: int, name: str, message: str, fields: dict):
+    if not enabled(level):
+        return
+    state = _current.get()
+    entry = {"level": name, "time": round(time.time(), 3), "message": message}
+    if state is not None:
+        entry.update(request_id=state["request_id"], correlation_id=state["correlation_id"],
+                     function=state["function"])
+    for key, value in fields.items():
+        entry[key] = render_field(value)
+    # serializer (bson) se carga con la primera entrada: importar logger no lo requiere
+    from serializer import dumps
+    _write(dumps(entry) + "\n", state, level >= ERROR)
+
+
+def debug(message: str, **fields):
+    _log(DEBUG, "DEBUG", message, fields)
+
+
+def info(message: str, **fields):
+    _log(INFO, "INFO", message, fields)
+
+
+def warning(message: str, **fields):
+    _log(WARNING, "WARNING", message, fields)
+
+
+def error(message: str, **fields):
+    _log(ERROR, "ERROR", message, fields)
+
+
+def raw(line: str):
+    """Línea ya formateada (p.ej. métricas EMF), escrita junto con el buffer de la invocación"""
+    _write(line + "\n", _current.get())
+
+
+def flush(state=None):
+    """Escribe las entradas acumuladas de la invocación con una sola escritura"""
+    state = state or _current.get()
+    if state is not None and state["buffer"]:
+        sys.stdout.write("".join(state["buffer"]))
+        sys.stdout.flush()
+        state["buffer"].clear()
+
+
+def correlation_id(event: dict, request_id):
+    """Header X-Correlation-Id de la petición, requestId de API Gateway o request_id de la Lambda"""
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == CORRELATION_HEADER.lower() and value:
+            return value
+    return (event.get("requestContext") or {}).get("requestId") or request_id
+
+
+def log_invocation(handler):
+    """Decorador de lambda_handler: contexto de logging y buffer por invocación"""
+    @functools.wraps(handler)
+    def lambda_handler(event, context):
+        request_id = getattr(context, "aws_request_id", None)
+        state = {
+            "request_id": request_id,
+            "correlation_id": correlation_id(event if isinstance(event, dict) else {}, request_id),
+            "function": getattr(context, "function_name", None) or handler.__module__,
+            "debug": _level <= DEBUG or (LOG_DEBUG_SAMPLE_RATE > 0 and random.random() < LOG_DEBUG_SAMPLE_RATE),
+            "buffer": [],
+        }
+        token = _current.set(state)
+        try:
+            response = handler(event, context)
+            if isinstance(response, dict) and state["correlation_id"]:
+                response["headers"] = {**(response.get("headers") or {}),
+                                       CORRELATION_HEADER: state["correlation_id"]}
+            return response
+        except Exception as ex:
+            error("Unhandled error", error=ex)
+            raise
+        finally:
+            flush(state)
+            _current.reset(token)
+    return lambda_handler
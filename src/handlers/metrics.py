@@ -0,0 +1,224 @@
+# Instrumentación por invocación
+# instrument envuelve el lambda_handler de cada función y, en las invocaciones
+# muestreadas (METRICS_SAMPLE_RATE), registra el tiempo de cada fase:
+#   parse      -> parse_body, parse_bulk_body, parse_query_params
+#   validate   -> construcción de los modelos pydantic
+#   connect    -> obtención del cliente (get_collection) y espera por una conexión del pool
+#   db         -> comandos enviados a Mongo (CommandListener), con su cantidad en db_ops
+#   render     -> renderizado de plantillas (rendering.py)
+#   serialize  -> codificación del body (format_response, stream_find)
+#   compress   -> compress_response
+#   total      -> invocación completa
+# Los módulos agregan valores de la invocación con record(); los de VALUE_UNITS se
+# publican como métricas (compresión, bytes evitados por la proyección, caché de
+# get_one, compilación de plantillas) y los demás como propiedades.
+# Las fases son exclusivas: el tiempo de Mongo o de una fase anidada se descuenta de
+# la fase que la contiene. Al terminar se escribe una línea JSON en formato CloudWatch
+# Embedded Metric Format (EMF), con dimensiones Function y Route, y se agrega el
+# header Server-Timing a la respuesta.
+#
+# Con METRICS_SAMPLE_RATE=0 no se registran listeners en el cliente de Mongo y cada
+# fase cuesta una lectura de ContextVar. Con valores entre 0 y 1 los conteos de las
+# métricas (peticiones, cold starts) corresponden sólo a la muestra.
+
+import functools
+import os
+import random
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+import logger
+
+# Optional environment variables
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 1))
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'PlantillasCrud')
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true').lower() == 'true'
+
+PHASES = ("parse", "validate", "connect", "db", "render", "serialize", "compress")
+# Valores de record() que se publican como métricas, con su unidad
+VALUE_UNITS = {
+    "documents": "Count",
+    "db_ops": "Count",
+    "uncompressed_bytes": "Bytes",
+    "compressed_bytes": "Bytes",
+    "compress_ms": "Milliseconds",
+    "bytes_saved": "Bytes",
+    "cache_hits": "Count",
+    "cache_misses": "Count",
+    "cache_evictions": "Count",
+    "cache_size": "Count",
+    "compile_ms": "Milliseconds",
+    "rows": "Count",
+    "failed_rows": "Count",
+}
+_NOOP = nullcontext()
+# Métricas de la invocación en curso (None si no está muestreada)
+_current = ContextVar("metrics", default=None)
+# El primer evento atendido por el contenedor es un arranque en frío
+_cold = True
+
+
+class _Phase:
+    """Context manager de una fase: acumula su tiempo propio en las métricas de la invocación"""
+    __slots__ = ("metrics", "name", "start", "attributed")
+
+    def __init__(self, metrics: dict, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.attributed = self.metrics["attributed"]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        own = elapsed - (self.metrics["attributed"] - self.attributed)
+        phases = self.metrics["phases"]
+        phases[self.name] = phases.get(self.name, 0.0) + own
+        self.metrics["attributed"] = self.attributed + elapsed
+        return False
+
+
+def phase(name: str):
+    """with phase("parse"): ... registra la fase si la invocación está muestreada"""
+    metrics = _current.get()
+    return _NOOP if metrics is None else _Phase(metrics, name)
+
+
+def timed(name: str):
+    """Decorador: registra cada llamada a la función como la fase name"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            metrics = _current.get()
+            if metrics is None:
+                return function(*args, **kwargs)
+            with _Phase(metrics, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_time(name: str, ms: float):
+    """Suma ms medidos fuera de un bloque with (listeners) a la fase name"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics["phases"][name] = metrics["phases"].get(name, 0.0) + ms
+        metrics["attributed"] += ms
+
+
+def recording() -> bool:
+    """Indica si la invocación en curso está muestreada (record tiene efecto)"""
+    return _current.get() is not None
+
+
+def record(**values):
+    """Valores adicionales de la invocación, p.ej. record(documents=10)"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics["values"].update(values)
+
+
+def current():
+    """Métricas de la invocación en curso, o None si no está muestreada (db_metrics.py)"""
+    return _current.get()
+
+
+def event_listeners() -> list:
+    """Listeners para MongoClient; ninguno si el muestreo está desactivado"""
+    if METRICS_SAMPLE_RATE <= 0:
+        return []
+    # pymongo.monitoring se carga al crear el cliente: importar metrics no lo requiere (health)
+    from db_metrics import CommandTimer, PoolTimer
+    return [CommandTimer(), PoolTimer()]
+
+
+def _ordered(phases: dict) -> list:
+    """Fases registradas en el orden de PHASES, seguidas de las no declaradas"""
+    return [name for name in PHASES if name in phases] + [name for name in phases if name not in PHASES]
+
+
+def server_timing(phases: dict, total: float, db_ops: int) -> str:
+    """Header Server-Timing: fase;dur=ms por cada fase registrada y el total"""
+    entries = []
+    for name in _ordered(phases):
+        entry = f"{name};dur={phases[name]:.2f}"
+        if name == "db":
+            entry += f';desc="{db_ops} ops"'
+        entries.append(entry)
+    entries.append(f"total;dur={total:.2f}")
+    return ", ".join(entries)
+
+
+def emf_line(function_name: str, route: str, metrics: dict, total: float, status_code, cold: bool,
+             response_bytes: int, request_id) -> str:
+    """Línea de log en CloudWatch Embedded Metric Format"""
+    values = metrics["values"]
+    names = [("total", "Milliseconds")] + [(name, "Milliseconds") for name in _ordered(metrics["phases"])]
+    names += [("response_bytes", "Bytes"), ("cold_start", "Count")]
+    names += [(name, unit) for name, unit in VALUE_UNITS.items() if name in values]
+    line = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["Function", "Route"]],
+                "Metrics": [{"Name": name, "Unit": unit} for name, unit in names],
+            }],
+        },
+        "Function": function_name,
+        "Route": route,
+        "StatusCode": status_code,
+        "RequestId": request_id,
+        "total": round(total, 3),
+        **{name: round(ms, 3) for name, ms in metrics["phases"].items()},
+        "response_bytes": response_bytes,
+        "cold_start": int(cold),
+        **values,
+    }
+    # serializer (bson) se carga con la primera línea publicada
+    from serializer import dumps
+    return dumps(line)
+
+
+def instrument(handler):
+    """Decorador de lambda_handler: fases, métricas EMF y header Server-Timing por invocación"""
+    @functools.wraps(handler)
+    def lambda_handler(event, context):
+        global _cold
+        cold, _cold = _cold, False
+        if METRICS_SAMPLE_RATE <= 0 or random.random() >= METRICS_SAMPLE_RATE:
+            return handler(event, context)
+
+        metrics = {"phases": {}, "values": {}, "attributed": 0.0}
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = handler(event, context)
+            return response
+        finally:
+            total = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+            try:
+                _publish(handler, event, context, response, metrics, total, cold)
+            except Exception as ex:
+                logger.error("Error publishing metrics", error=ex)
+    return lambda_handler
+
+
+def _publish(handler, event, context, response, metrics: dict, total: float, cold: bool):
+    event = event if isinstance(event, dict) else {}
+    response = response if isinstance(response, dict) else {}
+    headers = response.get("headers") or {}
+    if headers.get("X-Cache"):
+        metrics["values"]["cache"] = headers["X-Cache"]
+    function_name = getattr(context, "function_name", None) or handler.__module__
+    route = f"{event.get('httpMethod') or ''} {event.get('resource') or event.get('path') or ''}".strip()
+    logger.raw(emf_line(function_name, route, metrics, total, response.get("statusCode"), cold,
+                        len(response.get("body") or ""), getattr(context, "aws_request_id", None)))
+    if SERVER_TIMING and response:
+        response["headers"] = {**headers, "Server-Timing": server_timing(
+            metrics["phases"], total, metrics["values"].get("db_ops", 0))}
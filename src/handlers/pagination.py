@@ -0,0 +1,130 @@
+# Paginación por llave (keyset / cursor)
+# En lugar de skip, cada página continúa desde la última llave de ordenamiento
+# de la página anterior, por lo que el costo no crece con la profundidad.
+#
+# Uso en la petición GET:
+#   cursor=start           -> primera página
+#   cursor=<NextCursor>    -> página siguiente (valor devuelto en la respuesta)
+# Compatible con sortby/order; "_id" se agrega como desempate si no está presente.
+
+import base64
+
+from bson import json_util
+from bson.binary import UuidRepresentation
+from pymongo import ASCENDING, DESCENDING
+
+from projections import with_fields
+
+CURSOR_START = "start"
+CURSOR_JSON_OPTIONS = json_util.JSONOptions(
+    json_mode=json_util.JSONMode.CANONICAL,
+    uuid_representation=UuidRepresentation.STANDARD)
+
+
+def keyset_sort(sort_by: list) -> list:
+    """Agrega _id como desempate usando la dirección del último campo"""
+    sort_by = list(sort_by or [])
+    if not any(field == "_id" for field, _ in sort_by):
+        direction = sort_by[-1][1] if sort_by else ASCENDING
+        sort_by.append(("_id", direction))
+    return sort_by
+
+
+def get_path(document: dict, path: str):
+    """Obtiene el valor de un campo, soportando rutas anidadas (entity.col3)"""
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def sort_key(sort_by: list, document: dict) -> list:
+    """Valores de los campos de ordenamiento del documento (antes de formatearlo)"""
+    return [get_path(document, field) for field, _ in sort_by]
+
+
+def encode_cursor(sort_by: list, values: list) -> str:
+    """Codifica la llave de ordenamiento (ver sort_key) en un token opaco"""
+    payload = {
+        "s": [[field, direction] for field, direction in sort_by],
+        "v": values,
+    }
+    raw = json_util.dumps(payload, json_options=CURSOR_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token: str, sort_by: list) -> list:
+    """Decodifica el token y valida que corresponda al mismo ordenamiento"""
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token.encode()).decode(),
+                                  json_options=CURSOR_JSON_OPTIONS)
+        cursor_sort = [(field, direction) for field, direction in payload["s"]]
+        values = payload["v"]
+    except Exception as ex:
+        raise ValueError(f"Invalid cursor. Detail: {ex}")
+    if cursor_sort != sort_by or len(values) != len(sort_by):
+        raise ValueError("Invalid cursor. Detail: cursor does not match sortby/order")
+    return values
+
+
+def after(field: str, direction: int, value) -> dict:
+    """
+    Predicado de los valores de field que se ordenan después de value.
+    Mongo ordena null (o campo ausente) antes que cualquier otro valor y $gt/$lt no
+    comparan entre tipos, por lo que null se trata aparte:
+      asc  -> después de null: {$ne: null}; después de v: {$gt: v}
+      desc -> después de null: nada (None); después de v: {$lt: v} o null (salvo _id)
+    """
+    if direction == DESCENDING:
+        if value is None:
+            return None
+        if field == "_id":
+            return {field: {"$lt": value}}
+        return {"$or": [{field: {"$lt": value}}, {field: None}]}
+    return {field: {"$ne": None} if value is None else {"$gt": value}}
+
+
+def keyset_filter(sort_by: list, values: list) -> dict:
+    """
+    Construye el predicado de rango para continuar después de la llave dada.
+    Para sort [(a, 1), (b, -1), (_id, -1)] genera:
+    {$or: [{a: {$gt: va}}, {a: va, $or: [{b: {$lt: vb}}, {b: null}]}, {a: va, b: vb, _id: {$lt: vid}}]}
+    La igualdad con null ({a: null}) incluye los documentos sin el campo.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort_by):
+        predicate = after(field, direction, values[i])
+        if predicate is None:
+            continue
+        branch = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort_by[:i])}
+        branch.update(predicate)
+        branches.append(branch)
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def apply_cursor(query: dict, token: str) -> dict:
+    """
+    Convierte los parámetros de find en una consulta por llave:
+    ordena con desempate por _id y reemplaza skip por el predicado de rango.
+    La marca "cursor" indica a streaming.stream_find que debe generar NextCursor.
+    """
+    query = dict(query)
+    query.pop("skip", None)
+    sort_by = keyset_sort(query.get("sort"))
+    query["sort"] = sort_by
+
+    if query.get("limit", 0) <= 0:
+        raise ValueError("limit must be greater than 0 when using cursor")
+
+    if token != CURSOR_START:
+        predicate = keyset_filter(sort_by, decode_cursor(token, sort_by))
+        query["filter"] = {"$and": [query["filter"], predicate]} if query.get("filter") else predicate
+
+    # Los campos de ordenamiento son necesarios para construir el siguiente cursor
+    if query.get("projection"):
+        query["projection"] = with_fields(query["projection"], [field for field, _ in sort_by])
+
+    query["cursor"] = token
+    return query
@@ -0,0 +1,84 @@
+# Proyecciones de los listados (get_all)
+# Cada handler declara perfiles con nombre; el parámetro "profile" elige uno
+# (por defecto "summary") y "fields" los reemplaza con una lista explícita:
+#   fields=nombre,metadatos.x        inclusión, admite rutas anidadas
+#   fields=-contenido,-metadatos.x   exclusión (prefijo "-")
+# Un perfil con valor None retorna el documento completo.
+# Los bytes que la proyección evitó enviar se publican como la métrica bytes_saved.
+
+import logger
+from metrics import record, recording
+
+# Tamaño promedio del documento completo por colección (collStats), una vez por contenedor
+_avg_obj_size = {}
+
+
+def parse_fields(fields_str: str) -> dict:
+    """Convierte "a,b.c" o "-a,-b.c" en una proyección de Mongo"""
+    projection = {}
+    for field in fields_str.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if field.startswith("-"):
+            projection[field[1:]] = 0
+        else:
+            projection[field] = 1
+    # Mongo no permite mezclar inclusión y exclusión, salvo la exclusión de _id
+    modes = {value for field, value in projection.items() if field != "_id"}
+    if len(modes) > 1:
+        raise ValueError("fields cannot mix included and excluded fields")
+    return projection
+
+
+def resolve_projection(query_params: dict, profiles: dict, default: str = "summary"):
+    """Proyección de la petición: fields explícito o el perfil indicado"""
+    if query_params.get("fields"):
+        return parse_fields(str(query_params.get("fields")))
+    profile = str(query_params.get("profile", default))
+    if profile not in profiles:
+        raise ValueError(f"Unknown profile {profile}, expected one of {', '.join(profiles)}")
+    projection = profiles[profile]
+    return dict(projection) if projection else None
+
+
+def with_fields(projection: dict, fields: list) -> dict:
+    """Asegura que los campos dados estén presentes en el resultado de la proyección"""
+    projection = dict(projection)
+    inclusion = any(projection.values())
+    for field in fields:
+        if inclusion:
+            # Un campo padre incluido ya contiene al campo anidado
+            if not any(field == path or field.startswith(path + ".") for path in projection if projection[path]):
+                projection[field] = 1
+        else:
+            for path in list(projection):
+                if field == path or field.startswith(path + "."):
+                    del projection[path]
+    # Una exclusión vacía equivale al documento completo
+    return projection or None
+
+
+def full_document_size(collection) -> int:
+    """Tamaño promedio (BSON) del documento completo; 0 si no está disponible"""
+    name = collection.name
+    if name not in _avg_obj_size:
+        try:
+            _avg_obj_size[name] = int(collection.database.command("collStats", name).get("avgObjSize", 0))
+        except Exception as ex:
+            logger.warning("Error in full_document_size", collection=name, error=ex)
+            _avg_obj_size[name] = 0
+    return _avg_obj_size[name]
+
+
+def record_bytes_saved(collection, projection, count: int, body_bytes: int):
+    """
+    Registra (métrica bytes_saved) los bytes estimados que la proyección evitó enviar.
+    Sólo en invocaciones muestreadas, por lo que collStats no se consulta en las demás.
+    """
+    if not projection or not count or not recording():
+        return
+    avg_size = full_document_size(collection)
+    if not avg_size:
+        return
+    record(bytes_saved=max(avg_size * count - body_bytes, 0))
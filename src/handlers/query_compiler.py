@@ -0,0 +1,198 @@
+# Compilador del parámetro "query" a filtros de Mongo
+# Sintaxis: condiciones separadas por coma, "campo[__operador]:valor"
+#   sistema_id:3                  igualdad (compatible con la sintaxis anterior k:v)
+#   campo                         sin valor -> {campo: None} (un operador sin valor es un error)
+#   version__gte:2                gt, gte, lt, lte, ne
+#   sistema_id__in:1|2|3          in, nin (valores separados por |)
+#   nombre__prefix:Cert           prefijo (regex anclada, puede usar índice)
+#   uid__exists:true              exists
+#   version:1,version__gte:0      varias condiciones del mismo campo se combinan ($eq, $gte);
+#                                 repetir un operador con otro valor es un error
+# Los valores se convierten según el tipo del campo en el modelo Pydantic del handler;
+# los campos datetime admiten también una fecha sola (2024-01-01 -> medianoche);
+# los campos no declarados (p.ej. metadatos.x) conservan la conversión true/false.
+# El plan de cada forma de consulta (campos + operadores) se guarda en un caché LRU de
+# QUERY_PLAN_CACHE_MAX_ENTRIES entradas: las formas las elige el cliente.
+# En modo estricto se rechazan los predicados que ningún índice declarado
+# (indexes.py) puede atender.
+
+import datetime
+import os
+import re
+import typing
+from collections import OrderedDict
+
+from indexes import INDEXES
+
+# Optional environment variables
+QUERY_PLAN_CACHE_MAX_ENTRIES = int(os.environ.get('QUERY_PLAN_CACHE_MAX_ENTRIES', 256))
+
+RANGE_OPERATORS = {"gt": "$gt", "gte": "$gte", "lt": "$lt", "lte": "$lte", "ne": "$ne"}
+LIST_OPERATORS = {"in": "$in", "nin": "$nin"}
+OPERATORS = {"eq", "prefix", "exists", *RANGE_OPERATORS, *LIST_OPERATORS}
+EQUALITY_OPERATORS = {"eq", "in"}
+ORDERABLE_TYPES = (int, float, str, datetime.datetime, datetime.date)
+DATE_ONLY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Planes compilados por (colección, forma de la consulta), del menos al más reciente
+_plans = OrderedDict()
+
+
+def legacy_coerce(value: str):
+    """Conversión para campos no declarados en el modelo"""
+    if value == 'false':
+        return False
+    if value == 'true':
+        return True
+    return value
+
+
+def _base_type(annotation):
+    """Tipo base de una anotación, sin Optional"""
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+    return typing.get_origin(annotation) or annotation
+
+
+def _field_spec(field: str, model, overrides: dict) -> tuple:
+    """Retorna (función de conversión, tipo base) del campo; tipo None si no está declarado"""
+    if field in overrides:
+        return overrides[field], overrides[field]
+    info = model.model_fields.get(field)
+    if info is None:
+        return legacy_coerce, None
+    # pydantic se importa al compilar el primer plan (arranque en frío sin pydantic)
+    from pydantic import TypeAdapter
+    coerce, base = TypeAdapter(info.annotation).validate_python, _base_type(info.annotation)
+    if base is datetime.datetime:
+        coerce = _date_or_datetime(coerce)
+    return coerce, base
+
+
+def _date_or_datetime(coerce):
+    """pydantic exige fecha y hora en los campos datetime: una fecha sola se toma a medianoche"""
+    def coerce_datetime(value):
+        if isinstance(value, str) and DATE_ONLY.match(value):
+            value = f"{value}T00:00:00"
+        return coerce(value)
+    return coerce_datetime
+
+
+def parse_terms(query_str: str) -> list:
+    """Separa la consulta en (campo, operador, valor)"""
+    terms = []
+    for cond in query_str.split(","):
+        kv = cond.split(":", 1)
+        key, value = (kv[0], kv[1]) if len(kv) == 2 else (kv[0], None)
+        field, op = key, "eq"
+        if "__" in key:
+            candidate_field, candidate_op = key.rsplit("__", 1)
+            if candidate_op in OPERATORS:
+                field, op = candidate_field, candidate_op
+        terms.append((field, op, value))
+    return terms
+
+
+def _index_can_serve(field: str, equality_fields: set, equality_values: dict, index: dict) -> bool:
+    """El campo está en el índice y todos los campos previos del índice tienen igualdad"""
+    partial = index.get("options", {}).get("partialFilterExpression", {})
+    if any(equality_values.get(k, object()) != v for k, v in partial.items()):
+        return False
+    for key_field, _ in index["keys"]:
+        if key_field == field:
+            return True
+        if key_field not in equality_fields:
+            return False
+    return False
+
+
+def check_indexed(terms: list, collection: str, equality_values: dict):
+    """Modo estricto: cada predicado debe poder usar algún índice declarado"""
+    equality_fields = {field for field, op, _ in terms if op in EQUALITY_OPERATORS}
+    indexes = INDEXES.get(collection, [])
+    # Campos fijados por el filtro de un índice parcial aplicable (p.ej. activo: true)
+    partial_fields = {
+        k for index in indexes
+        for k, v in index.get("options", {}).get("partialFilterExpression", {}).items()
+        if equality_values.get(k, object()) == v
+    }
+    if all(field in partial_fields for field, _, _ in terms):
+        # Sin otro predicado el índice parcial no tiene prefijo utilizable
+        partial_fields = set()
+    for field, op, _ in terms:
+        if field == "_id" or field in partial_fields:
+            continue
+        if not any(_index_can_serve(field, equality_fields, equality_values, index) for index in indexes):
+            raise ValueError(f"Predicate {field}__{op} cannot be served by any declared index")
+
+
+def _compile_plan(shape: tuple, model, overrides: dict) -> list:
+    plan = []
+    for field, op in shape:
+        coerce, base = _field_spec(field, model, overrides)
+        orderable = base is None or field in overrides or (
+            isinstance(base, type) and issubclass(base, ORDERABLE_TYPES) and base is not bool)
+        if op in RANGE_OPERATORS and op != "ne" and not orderable:
+            raise ValueError(f"Operator {op} is not supported for field {field}")
+        if op == "prefix" and base not in (None, str):
+            raise ValueError(f"Operator prefix is only supported for text fields ({field})")
+        plan.append((field, op, coerce))
+    return plan
+
+
+def _predicate(field: str, op: str, value, coerce):
+    if value is None:
+        if op != "eq":
+            raise ValueError(f"Operator {op} requires a value ({field})")
+        return None
+    if op == "eq":
+        return coerce(value)
+    if op in RANGE_OPERATORS:
+        return {RANGE_OPERATORS[op]: coerce(value)}
+    if op in LIST_OPERATORS:
+        return {LIST_OPERATORS[op]: [coerce(v) for v in value.split("|")]}
+    if op == "prefix":
+        return {"$regex": f"^{re.escape(value)}"}
+    if op == "exists":
+        return {"$exists": value.lower() == 'true'}
+
+
+def _merge(field: str, current, predicate):
+    """Combina dos condiciones del mismo campo; la igualdad se expresa como $eq"""
+    current = current if isinstance(current, dict) else {"$eq": current}
+    predicate = predicate if isinstance(predicate, dict) else {"$eq": predicate}
+    for operator in current.keys() & predicate.keys():
+        if current[operator] != predicate[operator]:
+            raise ValueError(f"Conflicting {operator} conditions for field {field}")
+    return {**current, **predicate}
+
+
+def compile_query(query_str: str, model, collection: str, overrides: dict = None, strict: bool = False) -> dict:
+    """Convierte el parámetro query en un filtro de Mongo"""
+    overrides = overrides or {}
+    terms = parse_terms(query_str)
+    shape = tuple((field, op) for field, op, _ in terms)
+    plan_key = (collection, shape)
+    plan = _plans.get(plan_key)
+    if plan is None:
+        plan = _plans[plan_key] = _compile_plan(shape, model, overrides)
+        if len(_plans) > QUERY_PLAN_CACHE_MAX_ENTRIES:
+            _plans.popitem(last=False)
+    else:
+        _plans.move_to_end(plan_key)
+
+    query_total = {}
+    equality_values = {}
+    for (field, op, value), (_, _, coerce) in zip(terms, plan):
+        predicate = _predicate(field, op, value, coerce)
+        if op == "eq":
+            equality_values[field] = predicate
+        if field in query_total:
+            query_total[field] = _merge(field, query_total[field], predicate)
+        else:
+            query_total[field] = predicate
+
+    if strict:
+        check_indexed(terms, collection, equality_values)
+    return query_total
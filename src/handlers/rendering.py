@@ -0,0 +1,246 @@
+# Renderizado de plantillas (contenido) en el servidor
+# Las plantillas usan sintaxis Jinja2 y se compilan en un entorno sandbox, ya que
+# el contenido lo escriben los usuarios. Las plantillas compiladas se guardan en un
+# caché LRU + TTL del contenedor con llave "<colección>:<_id>", junto con la versión y
+# el contenido (o el hash del contenido externalizado) con que se compilaron. Cada
+# renderizado lee esos campos del documento y sólo reutiliza la plantilla compilada si
+# coinciden, por lo que una escritura atendida por otro contenedor o por los handlers
+# anteriores se refleja de inmediato. Los caminos de escritura además liberan la
+# entrada a través de cache.invalidate.
+#
+# Renderizado masivo (render_rows / render_many): la plantilla se compila una vez y
+# las filas se reparten en bloques de RENDER_CHUNK_SIZE entre RENDER_WORKERS:
+#   RENDER_POOL=none     -> en el mismo hilo (por defecto)
+#   RENDER_POOL=thread   -> hilos; el renderizado es Python puro y el GIL lo limita a un
+#                           núcleo: sólo conviene si las filas esperan E/S
+#   RENDER_POOL=process  -> procesos, escala con los núcleos; requiere multiprocessing
+#                           completo (no disponible en Lambda, que no tiene /dev/shm)
+# benchmarks/bench_render.py compara las opciones.
+# Los resultados se entregan en el orden de las filas, con el error de cada fila.
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from bson import ObjectId
+from jinja2.sandbox import SandboxedEnvironment
+
+from cache import MemoryCache, cache_key, register_invalidation_hook
+import logger
+from content_store import REF_FIELD, hydrate
+from metrics import phase, record
+from serializer import dumps
+from streaming import RESPONSE_MAX_BYTES, RESPONSE_TAIL_BYTES
+
+# Optional environment variables
+RENDER_CACHE_TTL_S = float(os.environ.get('RENDER_CACHE_TTL_S', 300))
+RENDER_CACHE_MAX_ENTRIES = int(os.environ.get('RENDER_CACHE_MAX_ENTRIES', 256))
+RENDER_AUTOESCAPE = os.environ.get('RENDER_AUTOESCAPE', 'true').lower() == 'true'
+RENDER_POOL = os.environ.get('RENDER_POOL', 'none')
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', os.cpu_count() or 1))
+RENDER_CHUNK_SIZE = int(os.environ.get('RENDER_CHUNK_SIZE', 100))
+
+_environment = SandboxedEnvironment(autoescape=RENDER_AUTOESCAPE)
+_templates = MemoryCache(max_entries=RENDER_CACHE_MAX_ENTRIES, ttl_s=RENDER_CACHE_TTL_S)
+_executor = None
+# Plantillas compiladas dentro de cada proceso trabajador, por texto de la plantilla
+_worker_templates = {}
+
+
+class TemplateNotFound(Exception):
+    """La plantilla no existe, está inactiva o no tiene contenido"""
+
+
+def _invalidate(collection: str, _id):
+    _templates.delete(cache_key(collection, _id))
+
+
+register_invalidation_hook(_invalidate)
+
+
+def get_template(_id: str, collection) -> dict:
+    """
+    Retorna {"version", "template", "source", "cache", "compile_ms"} de la plantilla,
+    compilándola sólo si el caché no tiene la versión y el contenido actuales.
+    """
+    document = collection.find_one({"_id": ObjectId(_id), "activo": True},
+                                   {"contenido": 1, REF_FIELD: 1, "version": 1})
+    if document is None:
+        raise TemplateNotFound(f"Plantilla {_id} not found")
+    # El contenido externalizado se identifica por su hash, sin leerlo
+    ref = document.get(REF_FIELD)
+    fingerprint = (document.get("version"), ref["hash"] if ref else document.get("contenido"))
+    key = cache_key(collection.name, ObjectId(_id))
+    cached = _templates.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        _, template, source = cached
+        return {"version": fingerprint[0], "template": template, "source": source, "cache": "HIT",
+                "compile_ms": 0.0}
+
+    hydrate([document], collection)
+    if document.get("contenido") is None:
+        raise TemplateNotFound(f"Plantilla {_id} has no contenido")
+
+    start = time.perf_counter()
+    template = _environment.from_string(document["contenido"])
+    compile_ms = (time.perf_counter() - start) * 1000
+    _templates.set(key, (fingerprint, template, document["contenido"]))
+    return {"version": document.get("version"), "template": template, "source": document["contenido"],
+            "cache": "MISS", "compile_ms": compile_ms}
+
+
+def render(template, datos: dict) -> tuple:
+    """Retorna (salida, render_ms)"""
+    with phase("render"):
+        start = time.perf_counter()
+        output = template.render(**datos)
+    return output, (time.perf_counter() - start) * 1000
+
+
+def render_plantilla(_id: str, datos: dict, collection) -> dict:
+    """Compila (o toma del caché) y renderiza la plantilla con los datos dados"""
+    compiled = get_template(_id, collection)
+    output, render_ms = render(compiled["template"], datos)
+    record(template_cache=compiled["cache"], compile_ms=round(compiled["compile_ms"], 3))
+    logger.debug("Render", collection=collection.name, id=_id, version=compiled["version"], cache=compiled["cache"],
+                 compile_ms=round(compiled["compile_ms"], 3), render_ms=round(render_ms, 3))
+    return {
+        "_id": _id,
+        "version": compiled["version"],
+        "output": output,
+        "cache": compiled["cache"],
+        "compile_ms": round(compiled["compile_ms"], 3),
+        "render_ms": round(render_ms, 3),
+    }
+
+
+def get_executor():
+    """Pool de trabajadores del contenedor según RENDER_POOL, o None para renderizar en línea"""
+    global _executor
+    if _executor is None and RENDER_POOL != "none":
+        if RENDER_POOL == "process":
+            _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+    return _executor
+
+
+def _render_chunk(start: int, rows: list, template) -> list:
+    """Renderiza filas (datos, error) y retorna el resultado de cada una"""
+    results = []
+    for index, (datos, error) in enumerate(rows, start):
+        if error is None and not isinstance(datos, dict):
+            error = "row must be a JSON object"
+        if error is not None:
+            results.append({"index": index, "Success": False, "Message": f"Error in input data: {error}"})
+            continue
+        try:
+            results.append({"index": index, "Success": True, "output": template.render(**datos)})
+        except Exception as ex:
+            results.append({"index": index, "Success": False, "Message": f"Error in template: {ex}"})
+    return results
+
+
+def _render_chunk_in_process(source: str, start: int, rows: list) -> list:
+    """Tarea de ProcessPoolExecutor: compila una vez por proceso y plantilla"""
+    template = _worker_templates.get(source)
+    if template is None:
+        if len(_worker_templates) >= RENDER_CACHE_MAX_ENTRIES:
+            _worker_templates.clear()
+        template = _worker_templates[source] = _environment.from_string(source)
+    return _render_chunk(start, rows, template)
+
+
+def render_rows(template, source: str, rows: list, executor=None, chunk_size: int = None, workers: int = None):
+    """
+    Genera el resultado de cada fila en orden. Mantiene a lo sumo dos bloques por
+    trabajador (workers, por defecto RENDER_WORKERS) en curso; si el consumidor se
+    detiene, los bloques pendientes se cancelan.
+    """
+    chunk_size = chunk_size or RENDER_CHUNK_SIZE
+    starts = range(0, len(rows), chunk_size)
+    if executor is None:
+        for start in starts:
+            yield from _render_chunk(start, rows[start:start + chunk_size], template)
+        return
+
+    in_process = isinstance(executor, ProcessPoolExecutor)
+    window = 2 * (workers or RENDER_WORKERS)
+    pending = deque()
+    starts = iter(starts)
+    try:
+        while True:
+            while len(pending) < window:
+                start = next(starts, None)
+                if start is None:
+                    break
+                chunk = rows[start:start + chunk_size]
+                if in_process:
+                    pending.append(executor.submit(_render_chunk_in_process, source, start, chunk))
+                else:
+                    pending.append(executor.submit(_render_chunk, start, chunk, template))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def render_many(_id: str, rows: list, collection, max_bytes: int = None) -> dict:
+    """
+    Renderiza la plantilla con cada fila y construye un body NDJSON: una línea por fila
+    ({"index", "Success", "output" | "Message"}) y una línea final de resumen. Si el body
+    alcanza el presupuesto de tamaño, el resumen indica NextIndex para continuar.
+    """
+    max_bytes = max_bytes or RESPONSE_MAX_BYTES
+    compiled = get_template(_id, collection)
+    parts = []
+    size = 0
+    rendered, failed, next_index = 0, 0, None
+    start = time.perf_counter()
+    results = render_rows(compiled["template"], compiled["source"], rows, get_executor())
+    with phase("render"):
+        try:
+            for result in results:
+                line = dumps(result) + "\n"
+                line_size = len(line.encode())
+                if parts and size + line_size + RESPONSE_TAIL_BYTES > max_bytes:
+                    next_index = result["index"]
+                    logger.info("Render truncated", next_index=next_index, bytes=size)
+                    break
+                parts.append(line)
+                size += line_size
+                if result["Success"]:
+                    rendered += 1
+                else:
+                    failed += 1
+        finally:
+            results.close()
+    render_ms = (time.perf_counter() - start) * 1000
+    record(template_cache=compiled["cache"], compile_ms=round(compiled["compile_ms"], 3),
+           rows=rendered + failed, failed_rows=failed)
+    logger.debug("Bulk render", collection=collection.name, id=_id, version=compiled["version"],
+                 rows=rendered + failed, failed=failed, cache=compiled["cache"],
+                 compile_ms=round(compiled["compile_ms"], 3), render_ms=round(render_ms, 3),
+                 pool=RENDER_POOL, workers=RENDER_WORKERS)
+
+    if failed and not rendered:
+        status_code, message = 400, "Render unsuccessful"
+    elif failed:
+        status_code, message = 207, "Render partially successful"
+    else:
+        status_code, message = 200, "Render successful"
+    summary = {
+        "_id": _id,
+        "version": compiled["version"],
+        "rendered": rendered,
+        "failed": failed,
+        "NextIndex": next_index,
+        "cache": compiled["cache"],
+        "compile_ms": round(compiled["compile_ms"], 3),
+        "render_ms": round(render_ms, 3),
+    }
+    parts.append(dumps({"Success": status_code != 400, "Status": status_code, "Message": message, "Data": summary}))
+    return {"statusCode": status_code, "headers": {"Content-Type": "application/x-ndjson"}, "body": "".join(parts)}
@@ -0,0 +1,74 @@
+# Router de una sola función
+# Atiende todas las rutas del API desde una Lambda (RouterFunction en template.yaml,
+# Deployment=router): un contenedor caliente y un pool de conexiones para todo el tráfico,
+# en lugar de un arranque en frío y un pool por función.
+# ROUTES asocia httpMethod + resource (la ruta declarada en API Gateway, p.ej.
+# "/plantilla/{id}") al módulo y la función que la atienden. El módulo se importa en la
+# primera petición de una de sus rutas, por lo que /health no carga pydantic ni Jinja2.
+# Las funciones de destino no están instrumentadas (handle); la instrumentación y el
+# logging de la invocación los agrega lambda_handler una sola vez.
+# Con Deployment=per-route cada módulo se despliega como su propia función, como antes.
+
+import importlib
+
+import logger
+from core import format_response
+from metrics import instrument
+
+PLANTILLA = ("crud_plantilla.app", "handle")
+TIPO_PLANTILLA = ("crud_tipo_plantilla.app", "handle")
+HEALTH = ("health.app", "handle")
+
+# (httpMethod, resource) -> (módulo, función); las mismas rutas que los Events de template.yaml
+# get_plantilla, get_all_plantilla, create_plantilla y put_plantilla quedan cubiertos por
+# las rutas equivalentes de crud_plantilla.
+ROUTES = {
+    ("POST", "/plantilla"): PLANTILLA,
+    ("GET", "/plantilla"): PLANTILLA,
+    ("GET", "/plantilla/search"): PLANTILLA,
+    ("GET", "/plantilla/{id}"): PLANTILLA,
+    ("PUT", "/plantilla/{id}"): PLANTILLA,
+    ("POST", "/plantilla/bulk"): PLANTILLA,
+    ("PUT", "/plantilla/bulk"): PLANTILLA,
+    ("DELETE", "/plantilla/bulk"): PLANTILLA,
+    ("GET", "/plantilla/grupo/{grupo_id}"): PLANTILLA,
+    ("GET", "/plantilla/grupo/{grupo_id}/latest"): PLANTILLA,
+    ("POST", "/plantilla/{id}/render"): PLANTILLA,
+    ("POST", "/plantilla/{id}/render/bulk"): PLANTILLA,
+    ("POST", "/tipo_plantilla"): TIPO_PLANTILLA,
+    ("GET", "/tipo_plantilla"): TIPO_PLANTILLA,
+    ("GET", "/tipo_plantilla/{id}"): TIPO_PLANTILLA,
+    ("PUT", "/tipo_plantilla/{id}"): TIPO_PLANTILLA,
+    ("DELETE", "/tipo_plantilla/{id}"): TIPO_PLANTILLA,
+    ("GET", "/health"): HEALTH,
+}
+RESOURCES = {resource for _, resource in ROUTES}
+
+# Funciones de destino ya importadas en el contenedor
+_targets = {}
+
+
+def resolve(http_method: str, resource: str):
+    """Función que atiende la ruta, o None si no está declarada"""
+    target = ROUTES.get((http_method, resource))
+    if target is None:
+        return None
+    function = _targets.get(target)
+    if function is None:
+        module_name, function_name = target
+        function = _targets[target] = getattr(importlib.import_module(module_name), function_name)
+    return function
+
+
+@logger.log_invocation
+@instrument
+def lambda_handler(event, context):
+    http_method = event.get("httpMethod")
+    resource = event.get("resource")
+    function = resolve(http_method, resource)
+    if function is not None:
+        return function(event, context)
+    if resource in RESOURCES:
+        return format_response({}, "HTTP method not allowed", 405, False)
+    logger.warning("Route not found", method=http_method, resource=resource)
+    return format_response({}, "Route not found", 404, False)
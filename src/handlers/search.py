@@ -0,0 +1,148 @@
+# Búsqueda de texto sobre plantilla (GET /plantilla/search?q=)
+# Usa el índice de texto "texto" declarado en indexes.py ($** con pesos para nombre,
+# codigo_abreviacion y contenido; metadatos y demás campos de texto con peso 1).
+# Sintaxis de q (la de $text): palabras, "frases exactas" y -palabras excluidas.
+# Los resultados se ordenan por textScore y se limitan a SEARCH_MAX_LIMIT por página,
+# por lo que el costo depende de las coincidencias del índice y no del tamaño de la
+# colección. Los fragmentos (highlights) se calculan sólo sobre la página retornada.
+#
+# De los contenidos externalizados (content_store.py) se indexa contenido_texto, su
+# texto sin marcado; los fragmentos de contenido se calculan sobre ese texto.
+
+import html
+import os
+import re
+import time
+import unicodedata
+
+import logger
+
+# Optional environment variables
+SEARCH_LANGUAGE = os.environ.get('SEARCH_LANGUAGE', 'spanish')
+SEARCH_DEFAULT_LIMIT = int(os.environ.get('SEARCH_DEFAULT_LIMIT', 10))
+SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', 50))
+# Caracteres de contexto a cada lado de una coincidencia
+SEARCH_SNIPPET_CHARS = int(os.environ.get('SEARCH_SNIPPET_CHARS', 60))
+
+HIGHLIGHT_FIELDS = ("nombre", "codigo_abreviacion", "contenido")
+MAX_FRAGMENTS_PER_FIELD = 3
+# contenido_texto y contenido_ref: campos internos de content_store.py
+SEARCH_TEXT_FIELD = "contenido_texto"
+RESULT_EXCLUDED_FIELDS = ("contenido", "metadatos", SEARCH_TEXT_FIELD, "contenido_ref")
+
+TERM_PATTERN = re.compile(r'-?"[^"]+"|\S+')
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sin tildes, conservando la longitud (para ubicar coincidencias)"""
+    return "".join(unicodedata.normalize("NFD", c)[0].lower()[0] for c in text)
+
+
+def parse_terms(q: str) -> list:
+    """Términos positivos de q (sin exclusiones), normalizados"""
+    terms = []
+    for token in TERM_PATTERN.findall(q):
+        if token.startswith("-"):
+            continue
+        token = token.strip('"').strip()
+        if token:
+            terms.append(_fold(token))
+    return terms
+
+
+def _term_pattern(terms: list):
+    """
+    Coincidencias al inicio de palabra. Las palabras se recortan para aproximar la
+    reducción a la raíz (stemming) que hace el índice: "plantillas" -> "plantil".
+    """
+    stems = sorted({term if len(term) <= 5 or " " in term else term[:len(term) - 2] for term in terms},
+                   key=len, reverse=True)
+    if not stems:
+        return None
+    return re.compile(r"\b(" + "|".join(re.escape(stem) for stem in stems) + r")\w*")
+
+
+def _fragments(text: str, pattern) -> list:
+    """Fragmentos de text alrededor de las coincidencias, con <em> y el resto escapado"""
+    windows = []
+    for match in pattern.finditer(_fold(text)):
+        start = max(match.start() - SEARCH_SNIPPET_CHARS, 0)
+        end = min(match.end() + SEARCH_SNIPPET_CHARS, len(text))
+        if windows and start <= windows[-1][1]:
+            # Coincidencias cercanas comparten fragmento
+            windows[-1][1] = end
+            windows[-1][2].append(match)
+        elif len(windows) < MAX_FRAGMENTS_PER_FIELD:
+            windows.append([start, end, [match]])
+        else:
+            break
+    fragments = []
+    for start, end, matches in windows:
+        parts = ["…" if start else ""]
+        position = start
+        for match in matches:
+            parts += [html.escape(text[position:match.start()]), "<em>",
+                      html.escape(text[match.start():match.end()]), "</em>"]
+            position = match.end()
+        parts += [html.escape(text[position:end]), "…" if end < len(text) else ""]
+        fragments.append("".join(parts))
+    return fragments
+
+
+def _metadatos_strings(value, path: str = "metadatos"):
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            yield from _metadatos_strings(v, f"{path}.{k}")
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from _metadatos_strings(v, f"{path}.{i}")
+
+
+def highlights(document: dict, terms: list) -> list:
+    """[{"field", "fragments"}] de los campos del documento que contienen los términos"""
+    pattern = _term_pattern(terms)
+    if pattern is None:
+        return []
+    fields = [(field, document.get(field)) for field in HIGHLIGHT_FIELDS]
+    if document.get("contenido") is None:
+        # Contenido externalizado: fragmentos del texto indexado
+        fields[HIGHLIGHT_FIELDS.index("contenido")] = ("contenido", document.get(SEARCH_TEXT_FIELD))
+    fields += list(_metadatos_strings(document.get("metadatos")))
+    result = []
+    for field, value in fields:
+        if isinstance(value, str) and value:
+            fragments = _fragments(value, pattern)
+            if fragments:
+                result.append({"field": field, "fragments": fragments})
+    return result
+
+
+def build_search(q: str, filters: dict, limit: int = None, skip: int = 0) -> dict:
+    """Argumentos de find para la búsqueda, ordenada por relevancia"""
+    limit = min(limit or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+    score = {"$meta": "textScore"}
+    return {
+        "filter": {"$text": {"$search": q, "$language": SEARCH_LANGUAGE}, **filters},
+        "projection": {"score": score},
+        "sort": [("score", score)],
+        "limit": limit,
+        "skip": skip,
+    }
+
+
+def search(q: str, filters: dict, collection, limit: int = None, skip: int = 0) -> list:
+    """Documentos más relevantes con score y highlights (sin contenido ni metadatos)"""
+    start = time.perf_counter()
+    documents = list(collection.find(**build_search(q, filters, limit, skip)))
+    terms = parse_terms(q)
+    results = []
+    for document in documents:
+        document["highlights"] = highlights(document, terms)
+        for field in RESULT_EXCLUDED_FIELDS:
+            document.pop(field, None)
+        results.append(document)
+    logger.debug("Search", collection=collection.name, q=q, filters=filters, results=len(results),
+                 ms=round((time.perf_counter() - start) * 1000, 3))
+    return results
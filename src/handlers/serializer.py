@@ -0,0 +1,60 @@
+# Serialización JSON de documentos de Mongo (BSON)
+# Convierte en una sola pasada, sin modificar los documentos, cualquier valor BSON
+# (ObjectId, UUID, datetime, Decimal128, Binary, ...) en cualquier nivel de anidamiento,
+# incluidos los valores dentro de metadatos.
+# Si orjson está instalado se usa como backend; si no, json de la librería estándar.
+
+import base64
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from bson import Code, DBRef, Decimal128, ObjectId, Regex, Timestamp
+from bson.max_key import MaxKey
+from bson.min_key import MinKey
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Los datetime se siguen serializando con str() (formato histórico de la API)
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def default(value):
+    """Convierte los tipos que el encoder JSON no soporta de forma nativa"""
+    if isinstance(value, (ObjectId, uuid.UUID, Decimal128, Decimal, datetime.datetime,
+                          datetime.date, datetime.time)):
+        return str(value)
+    if isinstance(value, bytes):
+        # bson.Binary es subclase de bytes
+        return base64.b64encode(value).decode()
+    if isinstance(value, Timestamp):
+        return {"t": value.time, "i": value.inc}
+    if isinstance(value, Regex):
+        return value.pattern
+    if isinstance(value, DBRef):
+        return value.as_doc()
+    if isinstance(value, (Code, MinKey, MaxKey)):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps_json(obj) -> str:
+    return json.dumps(obj, default=default)
+
+
+def _dumps_orjson(obj) -> str:
+    try:
+        return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS).decode()
+    except TypeError:
+        # p.ej. enteros de más de 64 bits: json los soporta
+        return _dumps_json(obj)
+
+
+dumps = _dumps_orjson if orjson else _dumps_json
+BACKEND = "orjson" if orjson else "json"
@@ -0,0 +1,106 @@
+# Serialización incremental de respuestas de listas (get_all)
+# Lee el cursor de Mongo por lotes (batch_size) y codifica cada documento a
+# medida que llega, sin materializar la lista completa. Si el cuerpo se acerca
+# al presupuesto de tamaño se detiene y retorna un token de continuación:
+#   NextCursor -> si la petición usa cursor (ver pagination.py)
+#   NextOffset -> si la petición usa offset
+# Todo el body se codifica con serializer.dumps. Un documento que por sí solo excede
+# el presupuesto no se puede paginar: la respuesta es un error (ResponseTooLarge).
+
+import os
+
+import logger
+from metrics import phase, record
+from pagination import encode_cursor, sort_key
+from serializer import dumps
+
+# Optional environment variables
+# La respuesta de Lambda tiene un límite de 6 MB y el body viaja escapado dentro
+# de otro JSON, por lo que el presupuesto por defecto deja margen.
+RESPONSE_MAX_BYTES = int(os.environ.get('RESPONSE_MAX_BYTES', 4000000))
+FIND_BATCH_SIZE = int(os.environ.get('FIND_BATCH_SIZE', 100))
+# Bytes reservados para el cierre del body y el token de continuación
+RESPONSE_TAIL_BYTES = 1024
+# Separador entre elementos con el formato del backend de serializer ("," o ", ")
+ITEM_SEPARATOR = dumps([0, 0])[2:-2]
+
+
+class ResponseTooLarge(Exception):
+    """Un documento excede RESPONSE_MAX_BYTES por sí solo"""
+
+
+def _batches(cursor, size: int, prepare):
+    """Entrega los documentos del cursor después de aplicar prepare a cada lote"""
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == size:
+            yield from prepare(batch)
+            batch = []
+    if batch:
+        yield from prepare(batch)
+
+
+def stream_find(query: dict, collection, message: str, max_bytes: int = None, stats: dict = None,
+                prepare=None) -> dict:
+    """
+    Ejecuta collection.find(**query) y construye la respuesta HTTP de forma incremental.
+    query puede venir preparada con pagination.apply_cursor.
+    Si se entrega stats, se llena con la cantidad de documentos y bytes del body.
+    prepare(lista) permite completar cada lote antes de serializarlo (p.ej. content_store).
+    """
+    max_bytes = max_bytes or RESPONSE_MAX_BYTES
+    query = dict(query)
+    keyset = query.pop("cursor", None) is not None
+    limit = query.get("limit", 0)
+    if keyset:
+        # Un documento extra indica que existe una página siguiente
+        query["limit"] = limit + 1
+
+    # {"Success": ..., "Data": [  ->  los elementos y el cierre se agregan a continuación
+    head = dumps({"Success": True, "Status": 200, "Message": message, "Data": []})[:-2]
+    parts = [head]
+    size = len(head.encode())
+    count = 0
+    last_key = None
+    continuation = None
+
+    cursor = collection.find(**query).batch_size(FIND_BATCH_SIZE)
+    documents = _batches(cursor, FIND_BATCH_SIZE, prepare) if prepare else cursor
+    # El tiempo de los comandos de Mongo (find, getMore, prepare) se descuenta de serialize
+    with phase("serialize"):
+        try:
+            for document in documents:
+                if keyset and count == limit:
+                    continuation = ("NextCursor", encode_cursor(query["sort"], last_key))
+                    break
+                key = sort_key(query["sort"], document) if keyset else None
+                item = dumps(document)
+                item_size = len(item.encode()) + len(ITEM_SEPARATOR)
+                if size + item_size + RESPONSE_TAIL_BYTES > max_bytes:
+                    if not count:
+                        raise ResponseTooLarge(
+                            f"Document {document.get('_id')} exceeds the response size limit "
+                            f"({item_size} bytes), request fewer fields")
+                    if keyset:
+                        continuation = ("NextCursor", encode_cursor(query["sort"], last_key))
+                    else:
+                        continuation = ("NextOffset", query.get("skip", 0) + count)
+                    logger.info("Response truncated", documents=count, bytes=size)
+                    break
+                parts.append(ITEM_SEPARATOR + item if count else item)
+                size += item_size
+                count += 1
+                last_key = key
+        finally:
+            cursor.close()
+
+    parts.append("]")
+    if continuation:
+        # {"NextCursor": ...}  ->  "NextCursor": ... con el mismo formato que el resto del body
+        parts.append(ITEM_SEPARATOR + dumps(dict([continuation]))[1:-1])
+    parts.append("}")
+    if stats is not None:
+        stats.update(count=count, bytes=size)
+    record(documents=count)
+    return {"statusCode": 200, "body": "".join(parts)}
@@ -1,21 +1,199 @@
-from pymongo import MongoClient
+# Utilidades compartidas entre handlers
+# Gestión de conexión con la BD: un único MongoClient (pool) por contenedor; async_db.py
+# crea el suyo con las mismas opciones (client_options) y el mismo ciclo de vida
 
+import os
+import sys
+import time
+from datetime import datetime
 
-def connect_db(database: str):
+from bson import decode, encode
+from pymongo import MongoClient, WriteConcern
+from pymongo.errors import ConnectionFailure
+
+import logger
+from metrics import event_listeners, timed
+
+# Required environment variables
+PLANTILLAS_CRUD_HOST = os.environ.get('PLANTILLAS_CRUD_HOST')
+PLANTILLAS_CRUD_PORT = os.environ.get('PLANTILLAS_CRUD_PORT')
+PLANTILLAS_CRUD_USERNAME = os.environ.get('PLANTILLAS_CRUD_USERNAME')
+PLANTILLAS_CRUD_PASS = os.environ.get('PLANTILLAS_CRUD_PASS')
+PLANTILLAS_CRUD_DB = os.environ.get('PLANTILLAS_CRUD_DB')
+TIMEZONE = os.environ.get('TIMEZONE')
+
+# Optional environment variables (pool tuning)
+# PLANTILLAS_CRUD_SRV: "true" para usar mongodb+srv (Atlas)
+PLANTILLAS_CRUD_SRV = os.environ.get('PLANTILLAS_CRUD_SRV', 'false').lower() == 'true'
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 10))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+# Segundos sin uso tras los cuales se verifica el cliente con un ping antes de reutilizarlo
+# (p.ej. contenedor congelado entre invocaciones o failover del replica set)
+MONGO_HEALTHCHECK_AFTER_S = float(os.environ.get('MONGO_HEALTHCHECK_AFTER_S', 60))
+# Write concern por defecto (vacío = el del servidor). Se puede sobrescribir por endpoint
+# con MONGO_WRITE_W_<ENDPOINT> y MONGO_WRITE_J_<ENDPOINT> (CREATE, UPDATE, DELETE, BULK)
+MONGO_WRITE_W = os.environ.get('MONGO_WRITE_W', '')
+MONGO_WRITE_J = os.environ.get('MONGO_WRITE_J', '')
+# INDEXES_SYNC_ON_START: "true" para crear los índices declarados (indexes.py) en el arranque en frío
+INDEXES_SYNC_ON_START = os.environ.get('INDEXES_SYNC_ON_START', 'false').lower() == 'true'
+
+# Estado por contenedor: se conserva entre invocaciones "warm"
+_client = None
+_last_used = 0.0
+_write_concerns = {}
+_timezone = None
+
+
+def build_uri() -> str:
+    """Construye el URI de conexión a partir de las variables de entorno"""
+    scheme = "mongodb+srv" if PLANTILLAS_CRUD_SRV else "mongodb"
+    host = PLANTILLAS_CRUD_HOST if PLANTILLAS_CRUD_SRV else f"{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}"
+    # With password
+    if PLANTILLAS_CRUD_USERNAME and PLANTILLAS_CRUD_PASS:
+        return f"{scheme}://{PLANTILLAS_CRUD_USERNAME}:{PLANTILLAS_CRUD_PASS}@{host}/"
+    # Without password
+    return f"{scheme}://{host}/"
+
+
+def client_options(**overrides) -> dict:
+    """Opciones de pool y timeouts comunes al MongoClient del contenedor y al de async_db"""
+    return {
+        "uuidRepresentation": 'standard',
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "retryReads": True,
+        "retryWrites": True,
+        **overrides,
+    }
+
+
+def connect_db_client():
+    """Genera un nuevo cliente (pool de conexiones) hacia la base de datos"""
     try:
-        uri = "mongodb://localhost:27017/bd"
-        client = MongoClient(uri)
-        db = client[database]
-        print("Connection Successful")
-        return db
+        client = MongoClient(build_uri(), **client_options(), event_listeners=event_listeners())
+        logger.info("Successful connection to the database")
+        return client
     except Exception as ex:
-        print("Fallo estableciendo la conexión a la bd")
-        print(ex)
+        logger.error("Error connecting to the database", error=ex)
+        return None
 
 
 def close_connect_db(client):
     try:
-        client.close()
+        logger.info("Closing client DB")
+        if client:
+            client.close()
     except Exception as ex:
-        print("Error cerrando la conexión a la bd")
-        print(ex)
+        logger.error("Error close Client DB", error=ex)
+
+
+def reset_db_client():
+    """
+    Descarta el cliente compartido; el siguiente get_db_client() crea uno nuevo.
+    El cliente de async_db, si se cargó, se descarta con él.
+    """
+    global _client
+    client, _client = _client, None
+    close_connect_db(client)
+    async_db = sys.modules.get("async_db")
+    if async_db is not None:
+        async_db.reset_client()
+
+
+def _is_alive(client) -> bool:
+    try:
+        client.admin.command("ping")
+        return True
+    except ConnectionFailure as ex:
+        logger.warning("Stale client DB, reconnecting", error=ex)
+        return False
+
+
+def get_db_client():
+    """
+    Retorna el cliente compartido del contenedor, creándolo la primera vez.
+    Si el cliente lleva más de MONGO_HEALTHCHECK_AFTER_S sin usarse se verifica
+    con un ping y, si la conexión quedó obsoleta, se reemplaza por uno nuevo.
+    """
+    global _client, _last_used
+    now = time.monotonic()
+    if _client is not None and now - _last_used > MONGO_HEALTHCHECK_AFTER_S:
+        if not _is_alive(_client):
+            reset_db_client()
+    if _client is None:
+        _client = connect_db_client()
+    _last_used = now
+    return _client
+
+
+@timed("connect")
+def get_collection(collection: str, database: str = None):
+    """Retorna la colección usando el cliente compartido, o None si no hay conexión"""
+    client = get_db_client()
+    if client is None:
+        return None
+    db_collection = client[str(database or PLANTILLAS_CRUD_DB)][collection]
+    if INDEXES_SYNC_ON_START:
+        from indexes import ensure_indexes
+        ensure_indexes(db_collection)
+    return db_collection
+
+
+def handle_db_error(ex):
+    """Descarta el cliente compartido ante errores de conexión para forzar la reconexión"""
+    if isinstance(ex, ConnectionFailure):
+        reset_db_client()
+
+
+def get_write_concern(endpoint: str) -> WriteConcern:
+    """Write concern configurado para el endpoint (create, update, delete, bulk)"""
+    if endpoint not in _write_concerns:
+        w = os.environ.get(f'MONGO_WRITE_W_{endpoint.upper()}', MONGO_WRITE_W)
+        j = os.environ.get(f'MONGO_WRITE_J_{endpoint.upper()}', MONGO_WRITE_J)
+        options = {}
+        if w:
+            options["w"] = int(w) if w.isdigit() else w
+        if j:
+            options["j"] = j.lower() == 'true'
+        _write_concerns[endpoint] = WriteConcern(**options)
+    return _write_concerns[endpoint]
+
+
+def with_write_concern(collection, endpoint: str):
+    """Retorna la colección con el write concern del endpoint"""
+    return collection.with_options(write_concern=get_write_concern(endpoint))
+
+
+def as_stored(document: dict, collection) -> dict:
+    """
+    El documento tal como queda en la base de datos, sin releerlo: codificado a BSON con
+    las opciones de la colección (fechas en UTC con precisión de milisegundos)
+    """
+    return decode(encode(document, codec_options=collection.codec_options),
+                  codec_options=collection.codec_options)
+
+
+def get_header(event, name: str):
+    """Obtiene un header de la petición sin distinguir mayúsculas"""
+    headers = event.get("headers") or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# Fechas
+def local_now() -> datetime:
+    """Datetime por Timezone. La zona (pytz) se carga y resuelve una sola vez por contenedor"""
+    global _timezone
+    if _timezone is None:
+        import pytz
+        _timezone = pytz.timezone(TIMEZONE)
+    return datetime.now(tz=_timezone)
@@ -0,0 +1,183 @@
+# Versiones de plantilla por grupo_id
+# Cada grupo tiene un documento en VERSIONS_COLLECTION (_id = grupo_id) con:
+#   versiones       -> cantidad de versiones asignadas; la siguiente es este valor
+#   version_actual  -> versión activa más alta
+#   plantilla_id    -> _id de la plantilla con version_actual
+# Las versiones se reservan con $inc atómico, por lo que escritores concurrentes
+# nunca reciben el mismo número. El puntero sólo avanza con una actualización
+# condicional (version_actual < nueva) y sólo retrocede, al desactivar la plantilla
+# actual, si aún apunta a ella.
+# Los grupos creados antes de este registro se inicializan desde la colección
+# principal la primera vez que se usan (índice grupo_id_version).
+# Una plantilla que cambia de grupo (PUT /plantilla/bulk con grupo_id) recibe una
+# versión nueva del grupo destino y los punteros de ambos grupos se recalculan.
+
+import os
+
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+import logger
+
+# Optional environment variables
+VERSIONS_COLLECTION = os.environ.get('VERSIONS_COLLECTION', 'plantilla_grupo')
+# A partir de este número de grupos, sync_groups consulta los grupos en paralelo (async_db);
+# con pocos grupos las consultas secuenciales cuestan menos que la ida al event loop
+SYNC_GROUPS_CONCURRENT_MIN = int(os.environ.get('SYNC_GROUPS_CONCURRENT_MIN', 8))
+
+
+def versions_collection(collection):
+    """Colección de punteros en la misma base de datos que la colección principal"""
+    return collection.database[VERSIONS_COLLECTION]
+
+
+def find_latest(collection, grupo_id, projection=None):
+    """Plantilla activa con la versión más alta del grupo, consultando la colección principal"""
+    return collection.find_one({"grupo_id": grupo_id, "activo": True}, projection,
+                               sort=[("version", DESCENDING)])
+
+
+def _seed(collection, grupo_id):
+    """Crea el puntero de un grupo existente a partir de sus plantillas"""
+    top = collection.find_one({"grupo_id": grupo_id}, {"version": 1}, sort=[("version", DESCENDING)])
+    latest = find_latest(collection, grupo_id, {"version": 1})
+    pointer = {
+        "_id": grupo_id,
+        "versiones": top["version"] + 1 if top and top.get("version") is not None else 0,
+        "version_actual": latest["version"] if latest else None,
+        "plantilla_id": latest["_id"] if latest else None,
+    }
+    try:
+        versions_collection(collection).insert_one(pointer)
+    except DuplicateKeyError:
+        # Otro escritor lo inicializó primero
+        pass
+
+
+def allocate_versions(collection, grupo_id, count: int = 1, new_group: bool = False) -> int:
+    """Reserva count versiones consecutivas del grupo y retorna la primera"""
+    versions = versions_collection(collection)
+    inc = {"$inc": {"versiones": count}}
+    if new_group:
+        # Un grupo recién generado no tiene plantillas previas
+        pointer = versions.find_one_and_update({"_id": grupo_id}, inc, upsert=True,
+                                               return_document=ReturnDocument.AFTER)
+    else:
+        pointer = versions.find_one_and_update({"_id": grupo_id}, inc, return_document=ReturnDocument.AFTER)
+        if pointer is None:
+            _seed(collection, grupo_id)
+            pointer = versions.find_one_and_update({"_id": grupo_id}, inc, return_document=ReturnDocument.AFTER)
+    return pointer["versiones"] - count
+
+
+def set_latest(collection, document: dict):
+    """Avanza el puntero del grupo si el documento activo tiene una versión mayor"""
+    if not document.get("activo") or document.get("version") is None:
+        return
+    versions_collection(collection).update_one(
+        {"_id": document["grupo_id"],
+         "$or": [{"version_actual": None}, {"version_actual": {"$lt": document["version"]}}]},
+        {"$set": {"version_actual": document["version"], "plantilla_id": document["_id"]}})
+
+
+def refresh_latest(collection, grupo_id, plantilla_ids: list):
+    """Recalcula el puntero si apunta a alguna de las plantillas dadas (p.ej. desactivadas)"""
+    latest = find_latest(collection, grupo_id, {"version": 1})
+    versions_collection(collection).update_one(
+        {"_id": grupo_id, "plantilla_id": {"$in": plantilla_ids}},
+        {"$set": {"version_actual": latest["version"] if latest else None,
+                  "plantilla_id": latest["_id"] if latest else None}})
+
+
+def get_pointer(collection, grupo_id):
+    """Puntero del grupo, inicializándolo si el grupo es anterior a este registro"""
+    versions = versions_collection(collection)
+    pointer = versions.find_one({"_id": grupo_id})
+    if pointer is None and collection.find_one({"grupo_id": grupo_id}, {"_id": 1}):
+        _seed(collection, grupo_id)
+        pointer = versions.find_one({"_id": grupo_id})
+    return pointer
+
+
+def find_latest_many(collection, grupo_ids: list, projection=None) -> dict:
+    """
+    find_latest de varios grupos en paralelo (async_db); los que fallan se consultan
+    de nuevo con pymongo. Retorna {grupo_id: plantilla o None}.
+    """
+    import async_db
+    results = async_db.run(async_db.gather(*(
+        async_db.find_one(collection.name, {"grupo_id": grupo_id, "activo": True}, projection,
+                          sort=[("version", DESCENDING)], database=collection.database.name)
+        for grupo_id in grupo_ids)))
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        logger.warning("Error finding latest versions in parallel, retrying sequentially",
+                       groups=len(grupo_ids), failed=len(failed), error=failed[0])
+    return {grupo_id: find_latest(collection, grupo_id, projection) if isinstance(latest, BaseException) else latest
+            for grupo_id, latest in zip(grupo_ids, results)}
+
+
+def sync_groups(collection, documents: list, activo: bool):
+    """Actualiza los punteros tras activar o desactivar las plantillas dadas ({_id, grupo_id})"""
+    groups = {}
+    for document in documents:
+        if document.get("grupo_id") is not None:
+            groups.setdefault(document["grupo_id"], []).append(document["_id"])
+    if len(groups) < SYNC_GROUPS_CONCURRENT_MIN:
+        for grupo_id, plantilla_ids in groups.items():
+            if activo:
+                latest = find_latest(collection, grupo_id, {"version": 1, "grupo_id": 1, "activo": 1})
+                if latest:
+                    set_latest(collection, latest)
+            else:
+                refresh_latest(collection, grupo_id, plantilla_ids)
+        return
+
+    # Varios grupos: las consultas por grupo en paralelo y los punteros en un solo bulk_write,
+    # con los mismos filtros condicionales de set_latest y refresh_latest
+    latest = find_latest_many(collection, list(groups), {"version": 1, "grupo_id": 1, "activo": 1})
+    updates = []
+    for grupo_id, plantilla_ids in groups.items():
+        document = latest[grupo_id]
+        if activo and document and document.get("version") is not None:
+            updates.append(UpdateOne(
+                {"_id": grupo_id,
+                 "$or": [{"version_actual": None}, {"version_actual": {"$lt": document["version"]}}]},
+                {"$set": {"version_actual": document["version"], "plantilla_id": document["_id"]}}))
+        elif not activo:
+            updates.append(UpdateOne(
+                {"_id": grupo_id, "plantilla_id": {"$in": plantilla_ids}},
+                {"$set": {"version_actual": document["version"] if document else None,
+                          "plantilla_id": document["_id"] if document else None}}))
+    if updates:
+        versions_collection(collection).bulk_write(updates, ordered=False)
+
+
+def move_to_group(collection, documents: list, grupo_id, filter_: dict, data: dict, write_collection=None):
+    """
+    Aplica el $set data con grupo_id a las plantillas dadas ({_id, grupo_id}) que aún
+    cumplen filter_. Las que cambian de grupo reciben versiones nuevas del destino, en el
+    orden dado; luego se actualizan los punteros de los grupos de origen y del destino.
+    Retorna el BulkWriteResult.
+    """
+    moving = [document for document in documents if document.get("grupo_id") != grupo_id]
+    first = allocate_versions(collection, grupo_id, len(moving)) if moving else 0
+    versions = {document["_id"]: first + offset for offset, document in enumerate(moving)}
+    requests = []
+    for document in documents:
+        update = {**data, "grupo_id": grupo_id}
+        if document["_id"] in versions:
+            update["version"] = versions[document["_id"]]
+        requests.append(UpdateOne({"$and": [filter_, {"_id": document["_id"]}]}, {"$set": update}))
+    result = (write_collection or collection).bulk_write(requests, ordered=False)
+
+    # Origen: el puntero se recalcula si apuntaba a una plantilla que salió del grupo
+    sync_groups(collection, moving, False)
+    # Destino: desactivadas -> se recalcula si apuntaba a ellas; si no, avanza a la más alta
+    if data.get("activo") is False:
+        refresh_latest(collection, grupo_id, [document["_id"] for document in documents])
+    else:
+        latest = find_latest(collection, grupo_id, {"version": 1, "grupo_id": 1, "activo": 1})
+        if latest:
+            set_latest(collection, latest)
+    return result
@@ -0,0 +1,70 @@
+# Pruebas unitarias de src/handlers
+# Mongo se reemplaza por mongomock: utils.MongoClient retorna un cliente en memoria
+# nuevo en cada prueba, por lo que no se requiere un mongod.
+
+import os
+import sys
+
+HANDLERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "handlers")
+sys.path.insert(0, HANDLERS)
+
+for _name, _value in {"PLANTILLAS_CRUD_HOST": "localhost", "PLANTILLAS_CRUD_PORT": "27017",
+                      "PLANTILLAS_CRUD_DB": "plantillas_test", "TIMEZONE": "America/Bogota",
+                      "METRICS_SAMPLE_RATE": "0"}.items():
+    os.environ.setdefault(_name, _value)
+
+import json  # noqa: E402
+
+import mongomock  # noqa: E402
+import pytest  # noqa: E402
+from bson.binary import UuidRepresentation  # noqa: E402
+from bson.codec_options import CodecOptions  # noqa: E402
+
+import cache  # noqa: E402
+import utils  # noqa: E402
+
+
+CODEC_OPTIONS = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
+
+
+class MockClient:
+    """mongomock con las opciones de codec de utils.connect_db_client (uuidRepresentation=standard)"""
+
+    def __init__(self):
+        self.client = mongomock.MongoClient()
+
+    def __getitem__(self, name: str):
+        return self.client.get_database(name, codec_options=CODEC_OPTIONS)
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Base de datos mongomock compartida por utils.get_collection durante la prueba"""
+    client = MockClient()
+    monkeypatch.setattr(utils, "MongoClient", lambda *args, **kwargs: client)
+    monkeypatch.setattr(utils, "_client", None)
+    monkeypatch.setattr(cache, "_cache", None)
+    return client[utils.PLANTILLAS_CRUD_DB]
+
+
+def api_event(http_method: str, resource: str = None, query: dict = None, path: dict = None,
+              body=None, headers: dict = None) -> dict:
+    """Evento de API Gateway (proxy) como lo recibe lambda_handler"""
+    return {
+        "httpMethod": http_method,
+        "resource": resource,
+        "queryStringParameters": query,
+        "pathParameters": path,
+        "headers": headers or {},
+        "body": None if body is None else json.dumps(body),
+    }
+
+
+def response_body(response: dict) -> dict:
+    return json.loads(response["body"])
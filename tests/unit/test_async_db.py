@@ -0,0 +1,16 @@
+import async_db
+import utils
+
+
+async def get_client():
+    return async_db.get_client()
+
+
+def test_async_client_shares_options_and_lifecycle(mongo):
+    pool = async_db.run(get_client()).options.pool_options
+    assert (pool.max_pool_size, pool.min_pool_size) == (async_db.ASYNC_MAX_CONCURRENCY, 0)
+    assert pool.max_idle_time_seconds * 1000 == utils.MONGO_MAX_IDLE_TIME_MS
+
+    utils.get_db_client()
+    utils.reset_db_client()
+    assert async_db._client is None
@@ -0,0 +1,38 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import rendering
+from tests.unit.conftest import api_event
+from tests.unit.test_crud_plantilla import create
+
+
+def test_render_rows_keeps_the_order_across_chunks():
+    template = rendering._environment.from_string("{{ n }}")
+    rows = [({"n": n}, None) for n in range(25)] + [(None, "bad json"), ([1], None)]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(rendering.render_rows(template, "{{ n }}", rows, executor, chunk_size=4, workers=3))
+    assert [result["index"] for result in results] == list(range(27))
+    assert [result["output"] for result in results[:25]] == [str(n) for n in range(25)]
+    assert [result["Success"] for result in results[25:]] == [False, False]
+
+
+def test_bulk_render_truncates_with_next_index(mongo, monkeypatch):
+    from crud_plantilla import app
+    created = create(app, contenido="{{ n }}" + "x" * 100)
+    monkeypatch.setattr(rendering, "RESPONSE_MAX_BYTES", 1000)
+    event = api_event("POST", "/plantilla/{id}/render/bulk", path={"id": created["_id"]})
+    event["body"] = "\n".join(json.dumps({"n": n}) for n in range(50)) + "\nnot json\n"
+    lines = [json.loads(line) for line in app.lambda_handler(event, None)["body"].splitlines()]
+    summary = lines.pop()["Data"]
+    assert [line["index"] for line in lines] == list(range(len(lines)))
+    assert summary["NextIndex"] == len(lines) == summary["rendered"]
+
+
+def test_all_failed_batch_reports_success_false(mongo):
+    from crud_plantilla import app
+    created = create(app, contenido="{{ n }}")
+    event = api_event("POST", "/plantilla/{id}/render/bulk", path={"id": created["_id"]})
+    event["body"] = "not json\n[1]\n"
+    response = app.lambda_handler(event, None)
+    summary = json.loads(response["body"].splitlines()[-1])
+    assert (response["statusCode"], summary["Status"], summary["Success"]) == (400, 400, False)
@@ -0,0 +1,71 @@
+import types
+
+import pytest
+
+import cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        cache.CacheBackend()
+
+
+def test_memory_cache_evicts_the_least_recently_used(clock):
+    memory = cache.MemoryCache(max_entries=2, ttl_s=60)
+    memory.set("a", 1)
+    memory.set("b", 2)
+    assert memory.get("a") == 1
+    memory.set("c", 3)
+
+    assert memory.get("b") is None
+    assert (memory.get("a"), memory.get("c")) == (1, 3)
+    assert memory.evictions == 1 and memory.size() == 2
+    assert (memory.hits, memory.misses) == (3, 1)
+
+
+def test_memory_cache_expires_entries_after_the_ttl(clock):
+    memory = cache.MemoryCache(max_entries=10, ttl_s=60)
+    memory.set("a", 1)
+    clock.now += 60
+    assert memory.get("a") == 1
+    clock.now += 1
+    assert memory.get("a") is None
+    assert memory.size() == 0
+
+    # Reescribir la entrada renueva su vencimiento
+    memory.set("a", 2)
+    clock.now += 30
+    memory.set("a", 3)
+    clock.now += 45
+    assert memory.get("a") == 3
+
+
+def test_invalidate_deletes_the_entry_and_runs_the_hooks(monkeypatch):
+    memory = cache.MemoryCache()
+    calls = []
+    monkeypatch.setattr(cache, "_cache", memory)
+    monkeypatch.setattr(cache, "_invalidation_hooks", [])
+    cache.register_invalidation_hook(lambda collection, _id: calls.append((collection, _id)))
+    memory.set(cache.cache_key("plantilla", "1"), "body")
+    memory.set(cache.cache_key("plantilla", "2"), "body")
+
+    cache.invalidate("plantilla", "1")
+    assert memory.get("plantilla:1") is None
+    assert memory.get("plantilla:2") == "body"
+    assert calls == [("plantilla", "1")]
+
+
+@pytest.mark.parametrize("backend, expected", [("memory", cache.MemoryCache), ("none", cache.NullCache),
+                                               ("redis", cache.MemoryCache)])
+def test_get_cache_selects_the_backend(monkeypatch, backend, expected):
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(cache, "CACHE_BACKEND", backend)
+    assert type(cache.get_cache()) is expected
+    assert cache.get_cache() is cache.get_cache()
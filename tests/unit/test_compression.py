@@ -0,0 +1,48 @@
+import base64
+import gzip
+import zlib
+
+import pytest
+
+import compression
+from compression import compress_response, negotiate
+from tests.unit.conftest import api_event
+
+BODY = "[" + ",".join(['{"nombre":"plantilla"}'] * 200) + "]"
+
+
+def compress(body: str, accept_encoding: str, headers: dict = None) -> dict:
+    response = {"statusCode": 200, "body": body, "headers": dict(headers or {})}
+    return compress_response(response, api_event("GET", "/plantilla", headers={"Accept-Encoding": accept_encoding}))
+
+
+def decompress(coding: str, data: bytes) -> bytes:
+    if coding == "zstd":
+        return compression.zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data) if coding == "gzip" else zlib.decompress(data)
+
+
+@pytest.mark.parametrize("coding", list(compression.CODECS))
+def test_round_trip(coding):
+    response = compress(BODY, coding, {"ETag": '"abc"'})
+    assert response["headers"]["Content-Encoding"] == coding
+    assert response["headers"]["ETag"] == 'W/"abc"'
+    assert decompress(coding, base64.b64decode(response["body"])).decode() == BODY
+
+
+def test_small_bodies_are_not_compressed():
+    response = compress("[]", "gzip")
+    assert (response["body"], response["headers"]) == ("[]", {"Vary": "Accept-Encoding"})
+
+
+def test_negotiate_prefers_the_server_order():
+    assert negotiate("*") == next(iter(compression.CODECS))
+    assert negotiate("*;q=0, deflate") == "deflate"
+    assert negotiate("identity") is None
+    assert negotiate("gzip;q=abc") is None
+
+
+def test_negotiate_weights():
+    assert negotiate("deflate;q=1, gzip;q=0.5") == "deflate"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate(None) is None
@@ -0,0 +1,37 @@
+import content_store
+import search
+from content_store import hydrate, offload, read_projection, search_text
+
+
+def test_small_contenido_stays_inline(mongo):
+    document = offload({"contenido": "hola"}, mongo["plantilla"])
+    assert document == {"contenido": "hola", "contenido_ref": None, "contenido_texto": None}
+
+
+def test_offloaded_contenido_keeps_search_text(mongo, monkeypatch):
+    monkeypatch.setattr(content_store, "CONTENT_OFFLOAD_BYTES", 16)
+    contenido = "<p>Certificado de {{ nombre }}</p>{% if x %}<b>notas&nbsp;finales</b>{% endif %}"
+    document = offload({"contenido": contenido}, mongo["plantilla"])
+    assert document["contenido"] is None
+    assert document["contenido_texto"] == "Certificado de notas finales"
+    assert hydrate([document], mongo["plantilla"]) == [{"contenido": contenido}]
+
+
+def test_search_text_is_truncated(monkeypatch):
+    monkeypatch.setattr(content_store, "CONTENT_SEARCH_MAX_BYTES", 4)
+    assert search_text("<p>ñañaña</p>") == "ña"
+
+
+def test_read_projection_hides_internal_fields():
+    assert read_projection(None) is None
+    assert read_projection({"contenido": 0, "metadatos": 0}) == {
+        "contenido": 0, "metadatos": 0, "contenido_ref": 0, "contenido_texto": 0}
+    assert read_projection({"metadatos": 0}) == {"metadatos": 0, "contenido_texto": 0}
+    assert read_projection({"nombre": 1}) == {"nombre": 1}
+    assert read_projection({"contenido": 1}) == {"contenido": 1, "contenido_ref": 1}
+
+
+def test_highlights_use_search_text_of_offloaded_contenido():
+    document = {"nombre": "Acta", "contenido": None, "contenido_texto": "Certificado de notas finales"}
+    assert search.highlights(document, search.parse_terms('"notas finales"')) == [
+        {"field": "contenido", "fragments": ["Certificado de <em>notas finales</em>"]}]
@@ -0,0 +1,171 @@
+import json
+import types
+
+import pytest
+
+import content_store
+from tests.unit.conftest import api_event, response_body
+
+
+def create(app, **data):
+    body = {"tipo_plantilla_id": "t1", "sistema_id": 1, "nombre": "a", "contenido": "hola {{ x }}", **data}
+    response = app.lambda_handler(api_event("POST", "/plantilla", body=body), None)
+    assert response["statusCode"] == 201
+    return response_body(response)["Data"]
+
+
+def get_one(app, _id: str) -> dict:
+    response = app.lambda_handler(api_event("GET", "/plantilla/{id}", path={"id": _id}), None)
+    assert response["statusCode"] == 200
+    return response_body(response)["Data"]
+
+
+def test_create_returns_stored_document(mongo):
+    from crud_plantilla import app
+    created = create(app)
+    assert created == get_one(app, created["_id"])
+    assert "contenido_ref" not in created
+
+
+def test_create_offloaded_contenido_returns_stored_document(mongo, monkeypatch):
+    from crud_plantilla import app
+    monkeypatch.setattr(content_store, "CONTENT_OFFLOAD_BYTES", 8)
+    created = create(app, contenido="x" * 100)
+    assert created["contenido"] == "x" * 100
+    assert created == get_one(app, created["_id"])
+    assert mongo["plantilla"].find_one()["contenido_ref"]["size"] == 100
+
+
+def test_history_total_count_is_limited_to_the_group(mongo, monkeypatch):
+    import core
+    from crud_plantilla import app
+    monkeypatch.setattr(core, "count_async", lambda collection, filter_: collection.count_documents(filter_))
+    monkeypatch.setattr(core, "await_count", lambda total: total)
+    first = create(app)
+    create(app, grupo_id=first["grupo_id"])
+    create(app)
+
+    response = app.lambda_handler(api_event(
+        "GET", "/plantilla/grupo/{grupo_id}", query={"count": "true", "limit": "1", "cursor": "start"},
+        path={"grupo_id": first["grupo_id"]}), None)
+    assert response["statusCode"] == 200
+    assert response["headers"]["X-Total-Count"] == "2"
+    assert [doc["version"] for doc in response_body(response)["Data"]] == [1]
+
+
+def test_operator_without_value_is_an_incorrect_parameter(mongo):
+    from crud_plantilla import app
+    response = app.lambda_handler(api_event("GET", "/plantilla", query={"query": "version__gte"}), None)
+    assert response["statusCode"] == 404
+
+
+def bulk(app, http_method: str, body: dict, context=None) -> dict:
+    return app.lambda_handler(api_event(http_method, "/plantilla/bulk", body=body), context)
+
+
+def latest_id(app, grupo_id: str):
+    response = app.lambda_handler(
+        api_event("GET", "/plantilla/grupo/{grupo_id}/latest", path={"grupo_id": grupo_id}), None)
+    return response_body(response)["Data"].get("_id")
+
+
+@pytest.mark.parametrize("body", [
+    {"ids": ["0" * 24], "data": {"desconocido": 1}},
+    {"ids": ["0" * 24], "data": {"version": 3}},
+    {"ids": ["0" * 24], "data": {"grupo_id": None}},
+    {"ids": ["0" * 24], "data": {"sistema_id": "abc"}},
+    {"query": "version__gte", "data": {"activo": False}},
+])
+def test_bulk_put_client_errors_return_400(mongo, body):
+    from crud_plantilla import app
+    response = bulk(app, "PUT", body)
+    assert response["statusCode"] == 400
+    assert response_body(response)["Message"].startswith("Error service Bulk: ")
+
+
+def test_bulk_put_dry_run_counts_without_writing(mongo):
+    from crud_plantilla import app
+    for sistema_id in (1, 1, 2):
+        create(app, sistema_id=sistema_id)
+    response = bulk(app, "PUT", {"query": "sistema_id:1", "data": {"nombre": "b"}, "dry_run": True})
+    assert response_body(response)["Data"] == {"matched": 2}
+    assert mongo["plantilla"].count_documents({"nombre": "b"}) == 0
+
+
+def test_bulk_put_resumes_from_cursor(mongo, monkeypatch):
+    from crud_plantilla import app
+    monkeypatch.setattr(app, "BULK_CHUNK_SIZE", 2)
+    ids = [create(app)["_id"] for _ in range(5)]
+    out_of_time = types.SimpleNamespace(aws_request_id="r", get_remaining_time_in_millis=lambda: 0)
+    body = {"ids": ids, "data": {"nombre": "b"}}
+
+    first = response_body(bulk(app, "PUT", body, out_of_time))["Data"]
+    assert first == {"matched": 2, "modified": 2, "cursor": ids[1]}
+    assert mongo["plantilla"].count_documents({"nombre": "b"}) == 2
+
+    second = response_body(bulk(app, "PUT", {**body, "cursor": first["cursor"]}))["Data"]
+    assert second == {"matched": 3, "modified": 3, "cursor": None}
+    assert mongo["plantilla"].count_documents({"nombre": "b"}) == 5
+
+
+def test_bulk_put_group_move_recomputes_both_pointers(mongo):
+    from crud_plantilla import app
+    origin = [create(app)]
+    origin.append(create(app, grupo_id=origin[0]["grupo_id"]))
+    target = [create(app)]
+
+    response = bulk(app, "PUT", {"ids": [origin[1]["_id"]], "data": {"grupo_id": target[0]["grupo_id"]}})
+    assert response_body(response)["Data"] == {"matched": 1, "modified": 1, "cursor": None}
+    assert latest_id(app, origin[0]["grupo_id"]) == origin[0]["_id"]
+    assert latest_id(app, target[0]["grupo_id"]) == origin[1]["_id"]
+    assert get_one(app, origin[1]["_id"])["version"] == 1
+
+
+def test_bulk_delete_recomputes_the_pointer(mongo):
+    from crud_plantilla import app
+    first = create(app)
+    second = create(app, grupo_id=first["grupo_id"])
+    response = bulk(app, "DELETE", {"ids": [second["_id"]]})
+    assert response_body(response)["Data"] == {"matched": 1, "modified": 1, "cursor": None}
+    assert latest_id(app, first["grupo_id"]) == first["_id"]
+
+
+def bulk_create(app, lines: list) -> dict:
+    event = api_event("POST", "/plantilla/bulk")
+    event["body"] = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+    return app.lambda_handler(event, None)
+
+
+PLANTILLA = {"tipo_plantilla_id": "t1", "sistema_id": 1, "contenido": "x"}
+
+
+def test_bulk_create_all_valid_returns_201_in_chunks(mongo, monkeypatch):
+    from crud_plantilla import app
+    monkeypatch.setattr(app, "BULK_CHUNK_SIZE", 2)
+    grupo_id = create(app)["grupo_id"]
+    response = bulk_create(app, [{**PLANTILLA, "nombre": str(i), "grupo_id": grupo_id} for i in range(5)])
+    body = response_body(response)
+    assert (response["statusCode"], body["Success"], body["Data"]["inserted"]) == (201, True, 5)
+    assert [result["version"] for result in body["Data"]["results"]] == [1, 2, 3, 4, 5]
+    assert [doc["nombre"] for doc in mongo["plantilla"].find({"version": {"$gt": 0}}, sort=[("version", 1)])] == [
+        "0", "1", "2", "3", "4"]
+    assert latest_id(app, grupo_id) == body["Data"]["results"][-1]["_id"]
+
+
+def test_bulk_create_partial_returns_207_with_per_item_results(mongo):
+    from crud_plantilla import app
+    response = bulk_create(app, [PLANTILLA, "{not json", {"sistema_id": 1}, PLANTILLA])
+    body = response_body(response)
+    assert (response["statusCode"], body["Success"]) == (207, True)
+    assert (body["Data"]["inserted"], body["Data"]["failed"]) == (2, 2)
+    assert [(result["index"], result["Success"]) for result in body["Data"]["results"]] == [
+        (0, True), (1, False), (2, False), (3, True)]
+    assert body["Data"]["results"][2]["Message"].startswith("Error in input data")
+
+
+def test_bulk_create_all_invalid_returns_400(mongo):
+    from crud_plantilla import app
+    response = bulk_create(app, ["{not json", {"sistema_id": "abc"}])
+    body = response_body(response)
+    assert (response["statusCode"], body["Success"], body["Data"]["failed"]) == (400, False, 2)
+    assert mongo["plantilla"].count_documents({}) == 0
@@ -0,0 +1,67 @@
+from bson import ObjectId
+
+from etags import document_etag, etag_matches
+from tests.unit.conftest import api_event, response_body
+from tests.unit.test_crud_plantilla import create
+
+
+def test_etag_matches_weak_lists_and_wildcard():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"b", W/"a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_document_etag_changes_with_content_at_the_same_version():
+    _id = ObjectId()
+    assert document_etag({"_id": _id, "version": 1, "nombre": "a"}) != document_etag(
+        {"_id": _id, "version": 1, "nombre": "b"})
+
+
+def get(app, resource: str, etag: str = None, **kwargs) -> dict:
+    headers = {"If-None-Match": etag} if etag else {}
+    return app.lambda_handler(api_event("GET", resource, headers=headers, **kwargs), None)
+
+
+def test_conditional_get_one(mongo):
+    from crud_plantilla import app
+    created = create(app)
+    path = {"id": created["_id"]}
+    response = get(app, "/plantilla/{id}", path=path)
+    etag = response["headers"]["ETag"]
+
+    assert get(app, "/plantilla/{id}", etag, path=path)["statusCode"] == 304
+    assert get(app, "/plantilla/{id}", etag, path=path)["headers"]["ETag"] == etag
+
+    body = {"tipo_plantilla_id": "t1", "sistema_id": 1, "nombre": "b", "contenido": created["contenido"]}
+    assert app.lambda_handler(api_event("PUT", "/plantilla/{id}", path=path, body=body), None)["statusCode"] == 200
+    response = get(app, "/plantilla/{id}", etag, path=path)
+    assert response["statusCode"] == 200
+    assert response_body(response)["Data"]["nombre"] == "b"
+
+
+def test_conditional_get_all(mongo):
+    from crud_plantilla import app
+    create(app)
+    etag = get(app, "/plantilla")["headers"]["ETag"]
+    assert get(app, "/plantilla", etag)["statusCode"] == 304
+
+    create(app)
+    assert get(app, "/plantilla", etag)["statusCode"] == 200
+
+
+def test_conditional_reads_are_shared_with_tipo_plantilla(mongo):
+    from crud_tipo_plantilla import app
+    body = {"nombre": "a", "descripcion": "d", "codigo_abreviacion": "A"}
+    created = response_body(app.lambda_handler(api_event("POST", "/tipo_plantilla", body=body), None))["Data"]
+    path = {"id": created["_id"]}
+    miss = get(app, "/tipo_plantilla/{id}", path=path)
+    assert miss["headers"]["X-Cache"] == "MISS"
+    hit = get(app, "/tipo_plantilla/{id}", path=path)
+    assert hit["headers"] == {"X-Cache": "HIT", "ETag": miss["headers"]["ETag"]}
+    assert get(app, "/tipo_plantilla/{id}", miss["headers"]["ETag"], path=path)["statusCode"] == 304
+
+    etag = get(app, "/tipo_plantilla")["headers"]["ETag"]
+    assert get(app, "/tipo_plantilla", etag)["statusCode"] == 304
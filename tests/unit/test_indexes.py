@@ -0,0 +1,107 @@
+import json
+import types
+
+import pytest
+
+import indexes
+import utils
+
+
+def server_info(spec: dict) -> dict:
+    """Índice como lo retorna index_information() del servidor para la declaración spec"""
+    options = dict(spec.get("options", {}))
+    keys = list(spec["keys"])
+    if keys == [("$**", "text")]:
+        keys = [("_fts", "text"), ("_ftsx", 1)]
+        options["weights"] = {"$**": 1, **options["weights"]}
+        options.update(language_override="language", textIndexVersion=3)
+    return {"v": 2, "key": keys, **options}
+
+
+class FakeCollection:
+    """Colección con índices en formato del servidor; registra los create/drop"""
+
+    def __init__(self, name: str, info: dict = None):
+        self.name = name
+        self.info = {"_id_": {"v": 2, "key": [("_id", 1)]}, **(info or {})}
+        self.created = []
+        self.dropped = []
+
+    def index_information(self) -> dict:
+        return self.info
+
+    def create_indexes(self, models):
+        for model in models:
+            document = model.document
+            self.created.append(document["name"])
+            self.info[document["name"]] = {"v": 2, "key": list(document["key"].items()),
+                                           **{k: v for k, v in document.items() if k not in ("name", "key")}}
+
+    def drop_index(self, name: str):
+        self.dropped.append(name)
+        del self.info[name]
+
+
+def synced(name: str = "plantilla") -> FakeCollection:
+    return FakeCollection(name, {spec["name"]: server_info(spec) for spec in indexes.INDEXES[name]})
+
+
+def test_declared_indexes_match_the_server_format():
+    assert indexes.verify_collection(synced()) == {"missing": [], "different": [], "extra": []}
+    assert indexes.verify_collection(synced("tipo_plantilla")) == {"missing": [], "different": [], "extra": []}
+
+
+def test_text_index_weights_are_compared():
+    collection = synced()
+    collection.info["texto"]["weights"] = {"$**": 1, "nombre": 5, "codigo_abreviacion": 8, "contenido": 1}
+    assert indexes.verify_collection(collection)["different"] == ["texto"]
+
+
+def test_partial_index_without_its_filter_is_a_conflict():
+    collection = synced()
+    del collection.info["activo_sistema_id_id"]["partialFilterExpression"]
+    assert indexes.verify_collection(collection)["different"] == ["activo_sistema_id_id"]
+
+    report = indexes.sync_collection(collection)
+    assert report["created"] == [] and collection.dropped == []
+
+    report = indexes.sync_collection(collection, drop_conflicting=True)
+    assert report["created"] == ["activo_sistema_id_id"]
+    assert collection.dropped == ["activo_sistema_id_id"]
+    assert collection.info["activo_sistema_id_id"]["partialFilterExpression"] == {"activo": True}
+    assert indexes.verify_collection(collection)["different"] == []
+
+
+def test_sync_creates_missing_indexes_once_and_prunes_extra():
+    collection = FakeCollection("plantilla", {"viejo": {"v": 2, "key": [("nombre", 1)]}})
+    report = indexes.sync_collection(collection)
+    assert report["created"] == sorted(spec["name"] for spec in indexes.INDEXES["plantilla"])
+    assert report["dropped"] == [] and "viejo" in collection.info
+
+    created = list(collection.created)
+    report = indexes.sync_collection(collection, prune=True)
+    assert report["created"] == [] and collection.created == created
+    assert report["dropped"] == ["viejo"] and "viejo" not in collection.info
+
+
+@pytest.mark.parametrize("missing, code", [([], 0), (["texto"], 1)])
+def test_verify_cli_reports_drift(monkeypatch, capsys, missing, code):
+    collections = {name: synced(name) for name in indexes.INDEXES}
+    for name in missing:
+        del collections["plantilla"].info[name]
+    monkeypatch.setattr(utils, "get_collection", lambda name: collections[name])
+    assert indexes.main(["verify"]) == code
+    assert json.loads(capsys.readouterr().out)["plantilla"]["missing"] == missing
+
+
+def test_cli_fails_without_a_connection(monkeypatch):
+    monkeypatch.setattr(utils, "get_collection", lambda name: None)
+    assert indexes.main(["sync"]) == 2
+
+
+def test_ensure_indexes_syncs_once_per_container(monkeypatch):
+    monkeypatch.setattr(indexes, "_synced", set())
+    collection = FakeCollection("tipo_plantilla")
+    indexes.ensure_indexes(collection)
+    indexes.ensure_indexes(types.SimpleNamespace(name="tipo_plantilla"))
+    assert collection.created == ["codigo_abreviacion", "nombre_id"]
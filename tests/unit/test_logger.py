@@ -0,0 +1,144 @@
+import json
+import types
+
+import pytest
+
+import logger
+
+
+class Stdout:
+    """sys.stdout que registra cada escritura por separado"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text: str):
+        self.writes.append(text)
+
+    def flush(self):
+        pass
+
+    def entries(self) -> list:
+        return [json.loads(line) for line in "".join(self.writes).splitlines()]
+
+
+@pytest.fixture
+def stdout(monkeypatch):
+    stdout = Stdout()
+    # logger sólo usa sys.stdout; se reemplaza el módulo porque la captura de pytest restablece sys.stdout
+    monkeypatch.setattr(logger, "sys", types.SimpleNamespace(stdout=stdout))
+    return stdout
+
+
+def invoke(handler, event: dict = None, request_id: str = "req-1"):
+    context = types.SimpleNamespace(aws_request_id=request_id, function_name="fn")
+    return logger.log_invocation(handler)(event or {}, context)
+
+
+def test_entries_are_written_once_at_the_end_of_the_invocation(stdout):
+    def handler(event, context):
+        logger.info("uno")
+        logger.warning("dos", documents=3)
+        assert stdout.writes == []
+        return {"statusCode": 200}
+
+    invoke(handler)
+    assert len(stdout.writes) == 1
+    assert [(entry["level"], entry["message"]) for entry in stdout.entries()] == [("INFO", "uno"), ("WARNING", "dos")]
+    assert stdout.entries()[1]["documents"] == 3
+
+
+def test_outside_an_invocation_entries_are_written_immediately(stdout):
+    logger.info("arranque")
+    assert len(stdout.writes) == 1
+    assert "request_id" not in stdout.entries()[0]
+
+
+def test_error_flushes_the_buffer_early(stdout):
+    def handler(event, context):
+        logger.info("antes")
+        logger.error("falla", error=ValueError("x"))
+        assert len(stdout.writes) == 1
+        logger.info("después")
+        return {"statusCode": 500}
+
+    invoke(handler)
+    assert len(stdout.writes) == 2
+    assert stdout.entries()[1]["error"] == "ValueError: x"
+
+
+def test_full_buffer_is_flushed_before_the_end(stdout, monkeypatch):
+    monkeypatch.setattr(logger, "LOG_BUFFER_MAX_ENTRIES", 3)
+
+    def handler(event, context):
+        for i in range(4):
+            logger.info("entrada", i=i)
+        assert len(stdout.writes) == 1
+        return {}
+
+    invoke(handler)
+    assert len(stdout.writes) == 2
+    assert [entry["i"] for entry in stdout.entries()] == [0, 1, 2, 3]
+
+
+def test_unhandled_error_is_logged_and_flushed(stdout):
+    def handler(event, context):
+        logger.info("antes")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        invoke(handler)
+    assert [entry["message"] for entry in stdout.entries()] == ["antes", "Unhandled error"]
+
+
+@pytest.mark.parametrize("sample, written", [(0.1, True), (0.9, False)])
+def test_debug_is_sampled_per_invocation(stdout, monkeypatch, sample, written):
+    monkeypatch.setattr(logger, "LOG_DEBUG_SAMPLE_RATE", 0.5)
+    monkeypatch.setattr(logger.random, "random", lambda: sample)
+
+    def handler(event, context):
+        assert logger.enabled(logger.DEBUG) is written
+        logger.debug("detalle")
+        logger.debug("otro detalle")
+        logger.info("resumen")
+        return {}
+
+    invoke(handler)
+    expected = ["detalle", "otro detalle", "resumen"] if written else ["resumen"]
+    assert [entry["message"] for entry in stdout.entries()] == expected
+
+
+def test_debug_is_off_without_sampling_or_outside_an_invocation(stdout):
+    invoke(lambda event, context: logger.debug("detalle"))
+    logger.debug("detalle")
+    assert stdout.writes == []
+
+
+def test_fields_are_truncated(stdout, monkeypatch):
+    monkeypatch.setattr(logger, "LOG_FIELD_MAX_CHARS", 5)
+    monkeypatch.setattr(logger, "LOG_FIELD_MAX_ITEMS", 3)
+    logger.info("campos", text="abcdefgh", ids=list(range(4)), few=[1, 2, "abcdefgh"],
+                doc={"a": {"b": {"c": 1}}}, big={str(i): i for i in range(4)})
+
+    entry = stdout.entries()[0]
+    assert entry["text"] == "abcde…(+3 chars)"
+    assert entry["ids"] == "<list with 4 items>"
+    assert entry["few"] == [1, 2, "abcde…(+3 chars)"]
+    assert entry["doc"] == {"a": {"b": "<dict with 1 keys>"}}
+    assert entry["big"] == "<dict with 4 keys>"
+
+
+@pytest.mark.parametrize("event, expected", [
+    ({"headers": {"x-correlation-id": "corr-1"}, "requestContext": {"requestId": "api-1"}}, "corr-1"),
+    ({"headers": {}, "requestContext": {"requestId": "api-1"}}, "api-1"),
+    ({"headers": None}, "req-1"),
+])
+def test_correlation_id_is_propagated(stdout, event, expected):
+    def handler(event, context):
+        logger.info("petición")
+        return {"statusCode": 200, "headers": {"ETag": '"a"'}}
+
+    response = invoke(handler, event)
+    assert response["headers"] == {"ETag": '"a"', logger.CORRELATION_HEADER: expected}
+    entry = stdout.entries()[0]
+    assert (entry["correlation_id"], entry["request_id"], entry["function"]) == (expected, "req-1", "fn")
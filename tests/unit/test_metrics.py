@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import metrics
+from compression import compress_response
+from metrics import instrument, phase, record, server_timing
+from tests.unit.conftest import api_event, response_body
+
+
+@pytest.fixture
+def sampled(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_SAMPLE_RATE", 1.0)
+
+
+def emf_lines(capsys) -> list:
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if '"_aws"' in line]
+
+
+def metric_names(line: dict) -> set:
+    return {metric["Name"] for metric in line["_aws"]["CloudWatchMetrics"][0]["Metrics"]}
+
+
+def test_phases_and_server_timing(sampled, capsys):
+    @instrument
+    def handler(event, context):
+        with phase("parse"):
+            record(documents=3)
+        return {"statusCode": 200, "body": "{}"}
+
+    response = handler(api_event("GET", "/plantilla"), None)
+    assert response["headers"]["Server-Timing"].startswith("parse;dur=")
+    line, = emf_lines(capsys)
+    assert {"total", "parse", "documents", "cold_start"} <= metric_names(line)
+    assert (line["Route"], line["documents"]) == ("GET /plantilla", 3)
+
+
+def test_server_timing_format():
+    assert server_timing({"db": 1.5, "parse": 0.25}, 2.0, 2) == (
+        'parse;dur=0.25, db;dur=1.50;desc="2 ops", total;dur=2.00')
+
+
+def test_compression_is_published_as_metrics(sampled, capsys):
+    @instrument
+    def handler(event, context):
+        return compress_response({"statusCode": 200, "body": "[" + ",".join(["1"] * 2000) + "]"}, event)
+
+    response = handler(api_event("GET", "/plantilla", headers={"Accept-Encoding": "gzip"}), None)
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    line, = emf_lines(capsys)
+    assert {"uncompressed_bytes", "compressed_bytes", "compress_ms"} <= metric_names(line)
+    assert line["compressed_bytes"] < line["uncompressed_bytes"] == 4001
+    assert line["content_encoding"] == "gzip"
+
+
+def test_get_one_cache_is_published_as_metrics(mongo, sampled, capsys):
+    from crud_plantilla import app
+    created = response_body(app.lambda_handler(api_event("POST", "/plantilla", body={
+        "tipo_plantilla_id": "t1", "sistema_id": 1}), None))["Data"]
+    capsys.readouterr()
+    for _ in range(2):
+        app.lambda_handler(api_event("GET", "/plantilla/{id}", path={"id": created["_id"]}), None)
+    miss, hit = emf_lines(capsys)
+    assert {"cache_hits", "cache_misses", "cache_evictions", "cache_size"} <= metric_names(miss)
+    assert (miss["cache_misses"], miss["cache_size"], hit["cache_hits"], hit["cache"]) == (1, 1, 1, "HIT")
+
+
+def test_health_per_route_handler_is_instrumented(sampled, capsys):
+    from health import app
+
+    response = app.lambda_handler(api_event("GET", "/health"), None)
+    assert response_body(response)["Success"] is True
+    assert "total;dur=" in response["headers"]["Server-Timing"]
+    line, = emf_lines(capsys)
+    assert line["Route"] == "GET /health"
+
+
+def test_router_calls_the_uninstrumented_health_handler(sampled, capsys):
+    import router
+
+    response = router.lambda_handler(api_event("GET", "/health"), None)
+    assert response["statusCode"] == 200
+    assert len(emf_lines(capsys)) == 1
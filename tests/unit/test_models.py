@@ -0,0 +1,24 @@
+import time
+
+import pytest
+
+from create_plantilla import app as create_app
+from crud_plantilla import models
+from put_plantilla import app as put_app
+
+PLANTILLA = {"tipo_plantilla_id": "t1", "sistema_id": 1}
+LEGACY_PLANTILLA = {"id": 1, "tipo": "t", "nombre": "n", "descripcion": "d", "contenido": "c", "enlace": "e",
+                    "version": 1, "versionActual": True}
+
+
+def test_fecha_creacion_is_computed_per_document():
+    first = models.PlantillaCreationModel(**PLANTILLA).fecha_creacion
+    time.sleep(0.002)
+    assert models.PlantillaCreationModel(**PLANTILLA).fecha_creacion > first
+
+
+@pytest.mark.parametrize("app", [create_app, put_app])
+def test_legacy_fecha_creacion_is_computed_per_document(app):
+    first = app.PlantillaModel(**LEGACY_PLANTILLA).FechaCreacion
+    time.sleep(0.002)
+    assert app.PlantillaModel(**LEGACY_PLANTILLA).FechaCreacion > first
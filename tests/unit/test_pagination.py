@@ -0,0 +1,70 @@
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from pagination import apply_cursor, decode_cursor, encode_cursor, keyset_filter, keyset_sort
+from tests.unit.conftest import api_event, response_body
+
+
+def test_keyset_sort_adds_id_tiebreak_with_last_direction():
+    assert keyset_sort([("nombre", DESCENDING)]) == [("nombre", DESCENDING), ("_id", DESCENDING)]
+    assert keyset_sort(None) == [("_id", ASCENDING)]
+    assert keyset_sort([("_id", DESCENDING)]) == [("_id", DESCENDING)]
+
+
+def test_cursor_round_trip_and_sort_mismatch():
+    sort_by = [("version", DESCENDING), ("_id", DESCENDING)]
+    values = [3, ObjectId()]
+    assert decode_cursor(encode_cursor(sort_by, values), sort_by) == values
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(sort_by, values), [("version", ASCENDING), ("_id", ASCENDING)])
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", sort_by)
+
+
+def test_keyset_filter_values():
+    _id = ObjectId()
+    assert keyset_filter([("a", ASCENDING), ("_id", ASCENDING)], [1, _id]) == {
+        "$or": [{"a": {"$gt": 1}}, {"a": 1, "_id": {"$gt": _id}}]}
+    assert keyset_filter([("a", DESCENDING), ("_id", DESCENDING)], [1, _id]) == {
+        "$or": [{"$or": [{"a": {"$lt": 1}}, {"a": None}]}, {"a": 1, "_id": {"$lt": _id}}]}
+
+
+def test_keyset_filter_null_values():
+    _id = ObjectId()
+    # asc: después de null siguen los demás null (por _id) y todos los valores no nulos
+    assert keyset_filter([("a", ASCENDING), ("_id", ASCENDING)], [None, _id]) == {
+        "$or": [{"a": {"$ne": None}}, {"a": None, "_id": {"$gt": _id}}]}
+    # desc: null es lo último, sólo quedan los null con menor _id
+    assert keyset_filter([("a", DESCENDING), ("_id", DESCENDING)], [None, _id]) == {
+        "a": None, "_id": {"$lt": _id}}
+
+
+def test_apply_cursor_requires_limit():
+    with pytest.raises(ValueError):
+        apply_cursor({"limit": 0}, "start")
+
+
+def walk(app, query: dict) -> list:
+    """Nombres de todas las páginas de GET /plantilla siguiendo NextCursor"""
+    names, cursor = [], "start"
+    while cursor:
+        response = app.lambda_handler(api_event("GET", "/plantilla", dict(query, cursor=cursor)), None)
+        assert response["statusCode"] == 200
+        body = response_body(response)
+        names.extend(document.get("nombre") for document in body["Data"])
+        cursor = body.get("NextCursor")
+    return names
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_walk_over_nullable_sort_field(mongo, order):
+    from crud_plantilla import app
+    documents = [{"nombre": name, "activo": True} for name in ("b", None, "a", None, "c")]
+    documents.append({"activo": True})
+    mongo["plantilla"].insert_many(documents)
+
+    names = walk(app, {"sortby": "nombre", "order": order, "limit": "2"})
+
+    nulls = [None, None, None]
+    assert names == (nulls + ["a", "b", "c"] if order == "asc" else ["c", "b", "a"] + nulls)
@@ -0,0 +1,45 @@
+import pytest
+
+from projections import parse_fields, resolve_projection, with_fields
+from tests.unit.conftest import api_event, response_body
+from tests.unit.test_crud_plantilla import create
+
+PROFILES = {"summary": {"contenido": 0}, "full": None}
+
+
+def test_parse_fields():
+    assert parse_fields("nombre, metadatos.x,") == {"nombre": 1, "metadatos.x": 1}
+    assert parse_fields("-contenido,-_id") == {"contenido": 0, "_id": 0}
+    assert parse_fields("nombre,-_id") == {"nombre": 1, "_id": 0}
+    with pytest.raises(ValueError):
+        parse_fields("nombre,-contenido")
+
+
+def test_resolve_projection():
+    assert resolve_projection({}, PROFILES) == {"contenido": 0}
+    assert resolve_projection({"profile": "full"}, PROFILES) is None
+    assert resolve_projection({"profile": "full", "fields": "nombre"}, PROFILES) == {"nombre": 1}
+    with pytest.raises(ValueError):
+        resolve_projection({"profile": "otro"}, PROFILES)
+
+
+def test_with_fields():
+    assert with_fields({"nombre": 1}, ["version", "_id"]) == {"nombre": 1, "version": 1, "_id": 1}
+    assert with_fields({"metadatos": 1}, ["metadatos.x"]) == {"metadatos": 1}
+    assert with_fields({"contenido": 0, "metadatos": 0}, ["metadatos.x"]) == {"contenido": 0}
+    assert with_fields({"version": 0}, ["version"]) is None
+
+
+def test_list_profiles(mongo):
+    from crud_plantilla import app
+    create(app, metadatos={"x": 1})
+
+    def first(query=None) -> dict:
+        response = app.lambda_handler(api_event("GET", "/plantilla", query=query), None)
+        return response_body(response)["Data"][0]
+
+    assert "contenido" not in first() and "metadatos" not in first()
+    assert first({"profile": "full"})["metadatos"] == {"x": 1}
+    assert set(first({"profile": "ids"})) == {"_id"}
+    assert set(first({"fields": "nombre,-_id"})) == {"nombre"}
+    assert "contenido_texto" not in first({"fields": "-metadatos"})
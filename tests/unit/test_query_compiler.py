@@ -0,0 +1,78 @@
+import datetime
+import uuid
+
+import pytest
+from bson import ObjectId
+
+from crud_plantilla import models
+import query_compiler
+from query_compiler import compile_query, parse_terms
+
+OVERRIDES = {"_id": ObjectId, "grupo_id": uuid.UUID}
+
+
+def compile_plantilla(query_str: str, strict: bool = False) -> dict:
+    return compile_query(query_str, models.PlantillaCreationModel, "plantilla", OVERRIDES, strict)
+
+
+def test_parse_terms():
+    assert parse_terms("sistema_id:3,version__gte:2,uid") == [
+        ("sistema_id", "eq", "3"), ("version", "gte", "2"), ("uid", "eq", None)]
+
+
+def test_operators_and_coercion():
+    assert compile_plantilla("sistema_id:3,activo:true") == {"sistema_id": 3, "activo": True}
+    assert compile_plantilla("version__gte:2,version__lt:5") == {"version": {"$gte": 2, "$lt": 5}}
+    assert compile_plantilla("sistema_id__in:1|2") == {"sistema_id": {"$in": [1, 2]}}
+    assert compile_plantilla("nombre__prefix:a.b") == {"nombre": {"$regex": "^a\\.b"}}
+    assert compile_plantilla("uid__exists:false") == {"uid": {"$exists": False}}
+    assert compile_plantilla("metadatos.x:true") == {"metadatos.x": True}
+
+
+def test_invalid_values_and_operators():
+    with pytest.raises(ValueError):
+        compile_plantilla("sistema_id:abc")
+    with pytest.raises(ValueError):
+        compile_plantilla("activo__gt:true")
+    with pytest.raises(ValueError):
+        compile_plantilla("sistema_id__prefix:1")
+
+
+def test_date_only_value_on_datetime_field():
+    assert compile_plantilla("fecha_creacion__gte:2024-01-01") == {
+        "fecha_creacion": {"$gte": datetime.datetime(2024, 1, 1)}}
+    assert compile_plantilla("fecha_creacion__lt:2024-01-02T10:30:00") == {
+        "fecha_creacion": {"$lt": datetime.datetime(2024, 1, 2, 10, 30)}}
+
+
+def test_equality_and_range_on_same_field_are_merged():
+    assert compile_plantilla("version:1,version__gte:0") == {"version": {"$eq": 1, "$gte": 0}}
+    assert compile_plantilla("version__gte:0,version:1") == {"version": {"$gte": 0, "$eq": 1}}
+    assert compile_plantilla("version:1,version:1") == {"version": {"$eq": 1}}
+    with pytest.raises(ValueError):
+        compile_plantilla("version:1,version:2")
+    assert compile_plantilla("version__gte:1,version__gte:1") == {"version": {"$gte": 1}}
+    with pytest.raises(ValueError):
+        compile_plantilla("version__gte:1,version__gte:5")
+
+
+def test_operator_without_value_is_rejected():
+    assert compile_plantilla("uid") == {"uid": None}
+    with pytest.raises(ValueError):
+        compile_plantilla("version__gte")
+
+
+def test_plan_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(query_compiler, "QUERY_PLAN_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(query_compiler, "_plans", query_compiler.OrderedDict())
+    compile_plantilla("version:1")
+    compile_plantilla("sistema_id:1")
+    compile_plantilla("version:2")
+    compile_plantilla("nombre:a")
+    assert [shape for _, shape in query_compiler._plans] == [(("version", "eq"),), (("nombre", "eq"),)]
+
+
+def test_strict_mode_rejects_unindexed_predicates():
+    assert compile_plantilla("sistema_id:1", strict=True) == {"sistema_id": 1}
+    with pytest.raises(ValueError):
+        compile_plantilla("metadatos.x:1", strict=True)
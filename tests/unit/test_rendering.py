@@ -0,0 +1,55 @@
+from bson import ObjectId
+
+import content_store
+from tests.unit.conftest import api_event, response_body
+from tests.unit.test_crud_plantilla import create
+
+
+def render(app, _id: str, datos: dict) -> dict:
+    return app.lambda_handler(api_event("POST", "/plantilla/{id}/render", path={"id": _id},
+                                        body={"datos": datos}), None)
+
+
+def test_render_uses_the_compiled_template_cache(mongo):
+    from crud_plantilla import app
+    created = create(app, contenido="hola {{ x }}")
+    first = response_body(render(app, created["_id"], {"x": "<b>"}))["Data"]
+    second = response_body(render(app, created["_id"], {"x": "mundo"}))["Data"]
+    assert (first["output"], first["cache"]) == ("hola &lt;b&gt;", "MISS")
+    assert (second["output"], second["cache"]) == ("hola mundo", "HIT")
+
+
+def test_update_invalidates_the_compiled_template(mongo):
+    from crud_plantilla import app
+    created = create(app, contenido="hola {{ x }}")
+    render(app, created["_id"], {"x": 1})
+    body = {"tipo_plantilla_id": "t1", "sistema_id": 1, "nombre": "a", "contenido": "chao {{ x }}"}
+    app.lambda_handler(api_event("PUT", "/plantilla/{id}", path={"id": created["_id"]}, body=body), None)
+    data = response_body(render(app, created["_id"], {"x": 1}))["Data"]
+    assert (data["output"], data["cache"]) == ("chao 1", "MISS")
+
+
+def test_render_errors(mongo):
+    from crud_plantilla import app
+    unsafe = create(app, contenido="{{ x.__class__.__mro__ }}")
+    assert render(app, unsafe["_id"], {"x": 1})["statusCode"] == 400
+    assert render(app, "0" * 24, {})["statusCode"] == 404
+
+
+def test_changes_made_elsewhere_recompile_the_template(mongo):
+    from crud_plantilla import app
+    created = create(app, contenido="hola {{ x }}")
+    render(app, created["_id"], {"x": 1})
+    # Escritura de otro contenedor o de un handler anterior: no pasa por cache.invalidate
+    mongo["plantilla"].update_one({"_id": ObjectId(created["_id"])}, {"$set": {"contenido": "chao {{ x }}"}})
+    data = response_body(render(app, created["_id"], {"x": 1}))["Data"]
+    assert (data["output"], data["cache"]) == ("chao 1", "MISS")
+
+
+def test_offloaded_template_is_cached_by_content_hash(mongo, monkeypatch):
+    from crud_plantilla import app
+    monkeypatch.setattr(content_store, "CONTENT_OFFLOAD_BYTES", 8)
+    created = create(app, contenido="hola {{ x }}" + " " * 20)
+    render(app, created["_id"], {"x": 1})
+    data = response_body(render(app, created["_id"], {"x": 2}))["Data"]
+    assert (data["output"].strip(), data["cache"]) == ("hola 2", "HIT")
@@ -0,0 +1,44 @@
+import os
+import re
+
+import pytest
+
+import router
+from tests.unit.conftest import HANDLERS, api_event, response_body
+
+TEMPLATE = os.path.join(HANDLERS, "..", "..", "template.yaml")
+
+
+def template_functions() -> dict:
+    """{función: (módulo del Handler, {(método, ruta)})} de los recursos de template.yaml"""
+    functions = {}
+    name = path = None
+    with open(TEMPLATE) as template:
+        for line in template:
+            if re.match(r"^  \w+:$", line):
+                name = line.strip()[:-1]
+            elif line.strip().startswith("Handler:"):
+                functions[name] = (line.split(":", 1)[1].strip().rsplit(".", 1)[0], set())
+            elif line.strip().startswith("Path:"):
+                path = line.split(":", 1)[1].strip()
+            elif line.strip().startswith("Method:") and name in functions:
+                functions[name][1].add((line.split(":", 1)[1].strip().upper(), path))
+    return functions
+
+
+def test_routes_match_the_template_events():
+    functions = template_functions()
+    assert functions.pop("RouterFunction") == ("router", set(router.ROUTES))
+    per_route = {route: module for module, routes in functions.values() for route in routes}
+    assert per_route == {route: module for route, (module, _) in router.ROUTES.items()}
+
+
+@pytest.mark.parametrize("route", sorted(router.ROUTES))
+def test_every_route_resolves_to_a_function(route):
+    assert callable(router.resolve(*route))
+
+
+def test_unknown_routes():
+    assert router.lambda_handler(api_event("PATCH", "/plantilla/{id}"), None)["statusCode"] == 405
+    response = router.lambda_handler(api_event("GET", "/otra"), None)
+    assert (response["statusCode"], response_body(response)["Message"]) == (404, "Route not found")
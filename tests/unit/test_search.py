@@ -0,0 +1,36 @@
+import search
+from search import build_search, highlights, parse_terms
+
+
+def test_parse_terms_skips_exclusions_and_folds_accents():
+    assert parse_terms('Notificación "pago tardío" -borrador -"no usar"') == ["notificacion", "pago tardio"]
+
+
+def test_highlights_match_word_prefixes_and_escape_html():
+    document = {"nombre": "Plantilla de <b>pago</b>", "contenido": "Las plantillas de notificación",
+                "metadatos": {"tags": ["Notificaciones"]}}
+    assert highlights(document, parse_terms("plantillas notificacion")) == [
+        {"field": "nombre", "fragments": ["<em>Plantilla</em> de &lt;b&gt;pago&lt;/b&gt;"]},
+        {"field": "contenido", "fragments": ["Las <em>plantillas</em> de <em>notificación</em>"]},
+        {"field": "metadatos.tags.0", "fragments": ["<em>Notificaciones</em>"]},
+    ]
+
+
+def test_highlights_use_the_indexed_text_of_offloaded_contenido():
+    document = {"contenido": None, search.SEARCH_TEXT_FIELD: "Estimado cliente, su pago"}
+    assert highlights(document, parse_terms("pago")) == [
+        {"field": "contenido", "fragments": ["Estimado cliente, su <em>pago</em>"]}]
+
+
+def test_highlights_limit_fragments_per_field(monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_SNIPPET_CHARS", 3)
+    fragments, = highlights({"nombre": " ".join(["pago", "x" * 10] * 5)}, ["pago"])
+    assert len(fragments["fragments"]) == search.MAX_FRAGMENTS_PER_FIELD
+    assert fragments["fragments"][1] == "…xx <em>pago</em> xx…"
+
+
+def test_build_search_caps_the_limit():
+    query = build_search("pago", {"activo": True}, limit=1000, skip=20)
+    assert query["filter"] == {"$text": {"$search": "pago", "$language": search.SEARCH_LANGUAGE}, "activo": True}
+    assert (query["limit"], query["skip"]) == (search.SEARCH_MAX_LIMIT, 20)
+    assert query["sort"] == [("score", {"$meta": "textScore"})]
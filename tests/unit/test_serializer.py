@@ -0,0 +1,44 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from bson import Binary, Decimal128, ObjectId, Regex, Timestamp
+
+import serializer
+
+BACKENDS = [serializer._dumps_json] + ([serializer._dumps_orjson] if serializer.orjson else [])
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+def test_bson_values_at_any_depth(dumps):
+    _id = ObjectId()
+    grupo_id = uuid.uuid4()
+    fecha = datetime.datetime(2024, 5, 1, 10, 30)
+    document = {"_id": _id, "metadatos": {"lista": [grupo_id, {"fecha": fecha}], "precio": Decimal128("1.50"),
+                                          "monto": Decimal("2.5"), "dia": datetime.date(2024, 5, 1),
+                                          "archivo": Binary(b"\x00\x01"), "ts": Timestamp(10, 2),
+                                          "patron": Regex("^a"), "tags": ("a",)}}
+    assert json.loads(dumps(document)) == {
+        "_id": str(_id),
+        "metadatos": {"lista": [str(grupo_id), {"fecha": "2024-05-01 10:30:00"}], "precio": "1.50",
+                      "monto": "2.5", "dia": "2024-05-01", "archivo": "AAE=", "ts": {"t": 10, "i": 2},
+                      "patron": "^a", "tags": ["a"]}}
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+def test_datetime_keeps_the_historical_format(dumps):
+    fecha = datetime.datetime(2024, 5, 1, 10, 30, tzinfo=datetime.timezone.utc)
+    assert json.loads(dumps({"fecha": fecha})) == {"fecha": "2024-05-01 10:30:00+00:00"}
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+def test_large_integers_fall_back_to_json(dumps):
+    assert json.loads(dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+
+@pytest.mark.parametrize("dumps", BACKENDS)
+def test_unknown_types_raise_type_error(dumps):
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import serializer
+import streaming
+from pagination import CURSOR_START, apply_cursor
+from streaming import ResponseTooLarge, stream_find
+from tests.unit.conftest import api_event, response_body
+
+
+@pytest.fixture
+def collection(mongo):
+    mongo["items"].insert_many([{"_id": i, "nombre": f"item {i}", "texto": "x" * 100} for i in range(10)])
+    return mongo["items"]
+
+
+def page(collection, query: dict, max_bytes: int = None) -> dict:
+    response = stream_find(query, collection, "Request successful", max_bytes)
+    assert response["statusCode"] == 200
+    return json.loads(response["body"])
+
+
+def item_bytes(collection) -> int:
+    return len(serializer.dumps(collection.find_one())) + len(streaming.ITEM_SEPARATOR)
+
+
+def test_body_is_encoded_with_the_serializer(collection):
+    body = stream_find(apply_cursor({"limit": 2}, CURSOR_START), collection, "Request successful")["body"]
+    assert body == serializer.dumps(json.loads(body))
+
+
+def test_byte_budget_truncates_with_next_offset(collection):
+    max_bytes = 200 + streaming.RESPONSE_TAIL_BYTES + 3 * item_bytes(collection)
+    body = page(collection, {"limit": 10, "skip": 2, "sort": [("_id", 1)]}, max_bytes)
+    assert [doc["_id"] for doc in body["Data"]] == [2, 3, 4]
+    assert body["NextOffset"] == 5
+
+
+def test_byte_budget_truncates_with_next_cursor(collection):
+    max_bytes = 200 + streaming.RESPONSE_TAIL_BYTES + 3 * item_bytes(collection)
+    query = apply_cursor({"limit": 10}, CURSOR_START)
+    first = page(collection, query, max_bytes)
+    second = page(collection, apply_cursor({"limit": 10}, first["NextCursor"]), max_bytes)
+    assert [doc["_id"] for doc in first["Data"] + second["Data"]] == list(range(6))
+
+
+def test_next_cursor_only_when_more_documents_exist(collection):
+    first = page(collection, apply_cursor({"limit": 6}, CURSOR_START))
+    second = page(collection, apply_cursor({"limit": 6}, first["NextCursor"]))
+    assert [doc["_id"] for doc in first["Data"] + second["Data"]] == list(range(10))
+    assert "NextCursor" not in second and "NextOffset" not in second
+
+
+def test_document_larger_than_the_budget_is_an_error(collection):
+    with pytest.raises(ResponseTooLarge):
+        stream_find({"limit": 1}, collection, "Request successful", streaming.RESPONSE_TAIL_BYTES + 100)
+
+
+def test_get_all_reports_an_oversized_document(mongo, monkeypatch):
+    from crud_plantilla import app
+    monkeypatch.setattr(streaming, "RESPONSE_MAX_BYTES", streaming.RESPONSE_TAIL_BYTES + 200)
+    mongo["plantilla"].insert_one({"nombre": "x" * 1000, "activo": True})
+    response = app.lambda_handler(api_event("GET", "/plantilla", query={"fields": "nombre"}), None)
+    assert response["statusCode"] == 500
+    assert "exceeds the response size limit" in response_body(response)["Message"]
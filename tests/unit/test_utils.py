@@ -0,0 +1,78 @@
+import types
+
+import pytest
+from pymongo.errors import ConnectionFailure, OperationFailure
+
+import async_db
+import utils
+from tests.unit.conftest import MockClient
+
+
+@pytest.fixture
+def clients(mongo, monkeypatch):
+    """Clientes creados por utils.connect_db_client, con el reloj de get_db_client controlado"""
+    created = []
+
+    def client_factory(*args, **kwargs):
+        client = MockClient()
+        client.pings = []
+        client.closed = False
+        client.close = lambda: setattr(client, "closed", True)
+        client.admin = types.SimpleNamespace(command=lambda name: client.pings.append(name) or {"ok": 1.0})
+        created.append(client)
+        return client
+
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(utils, "MongoClient", client_factory)
+    monkeypatch.setattr(utils, "_last_used", 0.0)
+    monkeypatch.setattr(utils.time, "monotonic", lambda: clock.now)
+    resets = []
+    monkeypatch.setattr(async_db, "reset_client", lambda: resets.append(True))
+    return types.SimpleNamespace(created=created, clock=clock, async_resets=resets)
+
+
+def test_client_is_reused_across_invocations(clients):
+    client = utils.get_db_client()
+    clients.clock.now += 1
+    assert utils.get_db_client() is client
+    assert utils.get_collection("plantilla").database.client is client.client
+    assert len(clients.created) == 1
+
+
+def test_idle_client_is_pinged_before_reuse(clients):
+    client = utils.get_db_client()
+    clients.clock.now += utils.MONGO_HEALTHCHECK_AFTER_S / 2
+    utils.get_db_client()
+    assert client.pings == []
+
+    clients.clock.now += utils.MONGO_HEALTHCHECK_AFTER_S + 1
+    assert utils.get_db_client() is client
+    assert client.pings == ["ping"]
+    assert len(clients.created) == 1
+
+
+def test_stale_client_is_replaced_when_the_ping_fails(clients):
+    client = utils.get_db_client()
+
+    def unreachable(name):
+        raise ConnectionFailure("connection closed")
+    client.admin = types.SimpleNamespace(command=unreachable)
+
+    clients.clock.now += utils.MONGO_HEALTHCHECK_AFTER_S + 1
+    replacement = utils.get_db_client()
+    assert replacement is not client
+    assert client.closed
+    assert len(clients.created) == 2
+    assert clients.async_resets == [True]
+
+
+def test_connection_failure_resets_both_clients(clients):
+    client = utils.get_db_client()
+    utils.handle_db_error(OperationFailure("bad query"))
+    assert utils.get_db_client() is client
+    assert clients.async_resets == []
+
+    utils.handle_db_error(ConnectionFailure("no primary"))
+    assert client.closed
+    assert clients.async_resets == [True]
+    assert utils.get_db_client() is not client
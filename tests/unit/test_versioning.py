@@ -0,0 +1,116 @@
+import json
+import uuid
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import ConnectionFailure
+
+import async_db
+import versioning
+from tests.unit.conftest import api_event, response_body
+from versioning import allocate_versions, get_pointer
+
+
+def test_allocate_versions_reserves_consecutive_blocks(mongo):
+    grupo_id = uuid.uuid4()
+    assert allocate_versions(mongo["plantilla"], grupo_id, 1, new_group=True) == 0
+    assert allocate_versions(mongo["plantilla"], grupo_id, 3) == 1
+    assert allocate_versions(mongo["plantilla"], grupo_id, 1) == 4
+
+
+def test_allocate_versions_seeds_existing_group(mongo):
+    grupo_id = uuid.uuid4()
+    mongo["plantilla"].insert_many([{"grupo_id": grupo_id, "version": v, "activo": True} for v in (0, 1)])
+    assert allocate_versions(mongo["plantilla"], grupo_id) == 2
+    assert get_pointer(mongo["plantilla"], grupo_id)["version_actual"] == 1
+
+
+def create(app, grupo_id: str = None) -> dict:
+    body = {"tipo_plantilla_id": "t1", "sistema_id": 1, "contenido": "x"}
+    if grupo_id:
+        body["grupo_id"] = grupo_id
+    return response_body(app.lambda_handler(api_event("POST", "/plantilla", body=body), None))["Data"]
+
+
+def latest_id(app, grupo_id: str):
+    response = app.lambda_handler(
+        api_event("GET", "/plantilla/grupo/{grupo_id}/latest", path={"grupo_id": grupo_id}), None)
+    return response_body(response)["Data"].get("_id")
+
+
+def test_versions_are_assigned_per_group(mongo):
+    from crud_plantilla import app
+    first = create(app)
+    second = create(app, first["grupo_id"])
+    assert (first["version"], second["version"]) == (0, 1)
+    assert latest_id(app, first["grupo_id"]) == second["_id"]
+
+
+def test_bulk_put_moves_plantillas_to_another_group(mongo):
+    from crud_plantilla import app
+    source = [create(app)]
+    source.append(create(app, source[0]["grupo_id"]))
+    target = create(app)
+
+    response = app.lambda_handler(api_event("PUT", "/plantilla/bulk", body={
+        "ids": [source[1]["_id"]], "data": {"grupo_id": target["grupo_id"]}}), None)
+    assert response_body(response)["Data"]["modified"] == 1
+
+    moved = mongo["plantilla"].find_one({"_id": ObjectId(source[1]["_id"])})
+    assert (str(moved["grupo_id"]), moved["version"]) == (target["grupo_id"], 1)
+    assert latest_id(app, source[0]["grupo_id"]) == source[0]["_id"]
+    assert latest_id(app, target["grupo_id"]) == source[1]["_id"]
+
+
+def test_single_put_keeps_version_fields(mongo):
+    from crud_plantilla import app
+    created = create(app)
+    response = app.lambda_handler(api_event("PUT", "/plantilla/{id}", path={"id": created["_id"]}, body={
+        "tipo_plantilla_id": "t1", "sistema_id": 2, "grupo_id": str(uuid.uuid4()), "version": 7}), None)
+    updated = response_body(response)["Data"]
+    assert (updated["grupo_id"], updated["version"], updated["sistema_id"]) == (created["grupo_id"], 0, 2)
+
+
+def three_groups(app) -> list:
+    groups = []
+    for _ in range(3):
+        first = create(app)
+        groups.append((first, create(app, first["grupo_id"])))
+    return groups
+
+
+@pytest.mark.parametrize("concurrent_min", [8, 2])
+def test_bulk_delete_syncs_several_groups(mongo, monkeypatch, concurrent_min):
+    from crud_plantilla import app
+    monkeypatch.setattr(versioning, "SYNC_GROUPS_CONCURRENT_MIN", concurrent_min)
+    queried = []
+
+    async def find_one(name, filter_, projection=None, sort=None, database=None):
+        queried.append(filter_["grupo_id"])
+        return mongo[name].find_one(filter_, projection, sort=sort)
+
+    monkeypatch.setattr(async_db, "find_one", find_one)
+    groups = three_groups(app)
+    response = app.lambda_handler(api_event("DELETE", "/plantilla/bulk", body={
+        "ids": [latest["_id"] for _, latest in groups]}), None)
+    assert response_body(response)["Data"]["modified"] == 3
+    assert [latest_id(app, first["grupo_id"]) for first, _ in groups] == [first["_id"] for first, _ in groups]
+    assert len(queried) == (3 if concurrent_min == 2 else 0)
+
+
+def test_parallel_lookup_failures_fall_back_to_sequential(mongo, monkeypatch, capsys):
+    from crud_plantilla import app
+    monkeypatch.setattr(versioning, "SYNC_GROUPS_CONCURRENT_MIN", 2)
+
+    async def find_one(*args, **kwargs):
+        raise ConnectionFailure("unreachable")
+
+    monkeypatch.setattr(async_db, "find_one", find_one)
+    groups = three_groups(app)
+    capsys.readouterr()
+    app.lambda_handler(api_event("DELETE", "/plantilla/bulk", body={
+        "ids": [latest["_id"] for _, latest in groups]}), None)
+    warnings = [json.loads(line) for line in capsys.readouterr().out.splitlines() if '"WARNING"' in line]
+    assert [(w["message"], w["failed"]) for w in warnings] == [
+        ("Error finding latest versions in parallel, retrying sequentially", 3)]
+    assert [latest_id(app, first["grupo_id"]) for first, _ in groups] == [first["_id"] for first, _ in groups]